@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Reproducible synthetic data for the benchmarks. The values are strings
+# written like in the .pdb files (see src.core.rtypes): ints, floats with
+# two decimals, words, dates (dd/mm/yyyy) and hours (HH:MM). The same
+# seed always generates the same relations.
+#
+# The keys of the 'id' field follow a Zipf distribution: with a skew of 0
+# all the keys are equally likely, with a greater skew the small keys
+# are repeated more times.
+
+import random
+from bisect import bisect
+from itertools import accumulate
+from collections import OrderedDict
+
+from src.core.relation import Relation
+
+WORDS = (
+    'Pedro', 'Juan', 'Diego', 'Rosita', 'Manuel', 'Santiago', 'Lima',
+    'Concepción', 'Belén', 'Buenos Aires', 'Python', 'Django', 'Go',
+    'Ruby', 'María', 'José', 'Paz', 'Victor', 'Machine Learning',
+    'Programación Funcional'
+)
+
+# Types of the fields that are not the key, in this order
+TYPES = ('int', 'float', 'str', 'date', 'time')
+
+# Tuples of the relations of a database for each tuple of 'r'
+DIMENSION_RATIO = 10
+PRODUCT_ROWS = 100
+
+
+def _int(rng):
+    return str(rng.randint(0, 99999))
+
+
+def _float(rng):
+    return '{:.2f}'.format(rng.uniform(0, 10000))
+
+
+def _str(rng):
+    return rng.choice(WORDS)
+
+
+def _date(rng):
+    return '{:02d}/{:02d}/{:04d}'.format(
+        rng.randint(1, 28), rng.randint(1, 12), rng.randint(1990, 2020))
+
+
+def _time(rng):
+    return '{:02d}:{:02d}'.format(rng.randint(0, 23), rng.randint(0, 59))
+
+
+VALUES = {
+    'int': _int,
+    'float': _float,
+    'str': _str,
+    'date': _date,
+    'time': _time
+}
+
+
+def zipf_keys(rng, count, key_range, skew):
+    """ Returns *count* keys between 1 and *key_range*, the probability of
+    the key k is proportional to 1 / k ** skew """
+
+    if not skew:
+        return [rng.randint(1, key_range) for _ in range(count)]
+    weights = accumulate(1 / k ** skew for k in range(1, key_range + 1))
+    weights = list(weights)
+    total = weights[-1]
+    return [bisect(weights, rng.random() * total) + 1
+            for _ in range(count)]
+
+
+def generate_relation(cardinality, degree=6, types=TYPES, key_range=None,
+                      key_skew=0.0, prefix='a', seed=0, columnar=False):
+    """ Generates a relation, the header is 'id', prefix1, prefix2...
+
+    :param cardinality: The number of tuples
+    :param degree: The number of fields, with the key
+    :param types: The types of the fields after the key, they are repeated
+                  if there are more fields
+    :param key_range: The keys are between 1 and *key_range*. If it's None
+                      the keys are 1...cardinality, without repeating
+    :param key_skew: The skew of the keys (see zipf_keys)
+    :param seed: The seed of the random numbers
+    :returns: A Relation object
+    """
+
+    rng = random.Random(seed)
+    if key_range is None:
+        keys = range(1, cardinality + 1)
+    else:
+        keys = zipf_keys(rng, cardinality, key_range, key_skew)
+    generators = [VALUES[types[i % len(types)]] for i in range(degree - 1)]
+
+    relation = Relation(columnar)
+    relation.header = ['id'] + ['{0}{1}'.format(prefix, i)
+                                for i in range(1, degree)]
+    for key in keys:
+        relation.insert([str(key)] + [value(rng) for value in generators])
+    return relation
+
+
+def generate_database(cardinality, degree=6, key_skew=0.0, seed=0,
+                      columnar=False):
+    """ Generates the relations used by the benchmarks:
+
+    - r: *cardinality* tuples with skewed keys
+    - s: the keys of the first half of the range of r without repeating,
+         so a part of r doesn't have a pair in s (outer joins)
+    - t: the header of r, the half of its tuples are in r (union,
+         intersect and difference)
+    - p: a part of r and u: PRODUCT_ROWS tuples, their product has about
+         *cardinality* tuples
+
+    :returns: An ordered dictionary (relation name: Relation object)
+    """
+
+    key_range = max(2, cardinality // DIMENSION_RATIO)
+    r = generate_relation(cardinality, degree, key_range=key_range,
+                          key_skew=key_skew, seed=seed, columnar=columnar)
+    s = generate_relation(key_range // 2, degree, prefix='b', seed=seed + 1,
+                          columnar=columnar)
+    t = generate_relation(cardinality - cardinality // 2, degree,
+                          key_range=key_range, key_skew=key_skew,
+                          seed=seed + 2, columnar=columnar)
+    for i, record in enumerate(r.content):
+        if not i % 2:
+            t.insert(record)
+    p = Relation(columnar)
+    p.header = r.header
+    for i, record in enumerate(r.content):
+        if i == max(1, cardinality // PRODUCT_ROWS):
+            break
+        p.insert(record)
+    u = generate_relation(PRODUCT_ROWS, 2, prefix='c', seed=seed + 3,
+                          columnar=columnar)
+    u.header = ['c0', 'c1']
+    return OrderedDict([('r', r), ('s', s), ('t', t), ('p', p), ('u', u)])
+
+
+QUERIES = (
+    "q{0} := select a1 > {1} and a3 = 'Lima' (r);",
+    "q{0} := project id, a1, a2 (r njoin s);",
+    "q{0} := (r union t) difference (select a4 >= '01/01/2000' (t));",
+    "q{0} := r louter s;",
+    "q{0} := project a3 (select a2 <= {1}.50 or id <> {1} (r intersect t));",
+    "q{0} := p product u;"
+)
+
+
+def generate_queries(count, seed=0):
+    """ Returns the text of *count* assignments over the relations of
+    generate_database """
+
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        template = QUERIES[i % len(QUERIES)]
+        lines.append(template.format(i, rng.randint(0, 99999)))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Runs the benchmarks for each size of the data and writes the results
+# as JSON. Each benchmark is executed --repeat times and the best time is
+# kept, the garbage collector is disabled while it runs (like timeit).
+# The results of two commits are compared with --compare:
+#
+#   git checkout master && python -m benchmarks.run -o base.json
+#   git checkout branch && python -m benchmarks.run --compare base.json
+
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import datetime
+import tempfile
+import subprocess
+from collections import OrderedDict
+
+from benchmarks import generator
+from src.core import (
+    file_manager,
+    pdbx
+)
+from src.core.interpreter import (
+    scanner,
+    lexer,
+    parser
+)
+from src.core.interpreter.tokens import EOF
+
+FORMAT_VERSION = 1
+
+SIZES = (1000, 100000, 1000000)
+
+# Assignments of the parse and lex benchmarks for each tuple
+QUERIES_RATIO = 100
+
+# Slower results than ratio 1 + REGRESSION_THRESHOLD are regressions
+REGRESSION_THRESHOLD = 0.1
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name):
+    """ Registers a benchmark. The function receives the data (see
+    setup) and returns the function that is timed """
+
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def setup(cardinality, degree, key_skew, seed, columnar, path):
+    """ Generates the data of the benchmarks
+
+    :param path: A folder for the database files
+    :returns: A dictionary with the relations of the database, the text of
+              the queries and the filenames
+    """
+
+    relations = generator.generate_database(cardinality, degree, key_skew,
+                                            seed, columnar)
+    # The values are casted when a database is opened
+    for relation in relations.values():
+        relation.infer_types()
+    return {
+        'relations': relations,
+        'queries': generator.generate_queries(
+            max(1, cardinality // QUERIES_RATIO), seed),
+        'pdb': os.path.join(path, 'database.pdb'),
+        'pdbx': os.path.join(path, 'database' + pdbx.EXTENSION)
+    }
+
+
+@benchmark('select')
+def bench_select(data):
+    r = data['relations']['r']
+    return lambda: r.select("a1 > 50000 and a3 == 'Lima'")
+
+
+@benchmark('project')
+def bench_project(data):
+    r = data['relations']['r']
+    return lambda: r.project('a3', 'a5')
+
+
+@benchmark('product')
+def bench_product(data):
+    relations = data['relations']
+    return lambda: relations['p'].product(relations['u'])
+
+
+@benchmark('njoin')
+def bench_njoin(data):
+    relations = data['relations']
+    return lambda: relations['r'].njoin(relations['s'])
+
+
+@benchmark('louter')
+def bench_louter(data):
+    relations = data['relations']
+    return lambda: relations['r'].louter(relations['s'])
+
+
+@benchmark('router')
+def bench_router(data):
+    relations = data['relations']
+    return lambda: relations['s'].router(relations['r'])
+
+
+@benchmark('fouter')
+def bench_fouter(data):
+    relations = data['relations']
+    return lambda: relations['r'].fouter(relations['s'])
+
+
+@benchmark('union')
+def bench_union(data):
+    relations = data['relations']
+    return lambda: relations['r'].union(relations['t'])
+
+
+@benchmark('intersect')
+def bench_intersect(data):
+    relations = data['relations']
+    return lambda: relations['r'].intersect(relations['t'])
+
+
+@benchmark('difference')
+def bench_difference(data):
+    relations = data['relations']
+    return lambda: relations['r'].difference(relations['t'])
+
+
+@benchmark('lex')
+def bench_lex(data):
+
+    def lex():
+        tokens = lexer.Lexer(scanner.Scanner(data['queries']))
+        count = 0
+        while tokens.next_token().type != EOF:
+            count += 1
+        return count
+    return lex
+
+
+@benchmark('parse')
+def bench_parse(data):
+
+    def parse():
+        tree = parser.Parser(lexer.Lexer(scanner.Scanner(data['queries'])))
+        return len(tree.parse().children)
+    return parse
+
+
+@benchmark('save_pdb')
+def bench_save_pdb(data):
+    return lambda: file_manager.write_database(data['pdb'],
+                                               data['relations'])
+
+
+@benchmark('load_pdb')
+def bench_load_pdb(data):
+    file_manager.write_database(data['pdb'], data['relations'])
+    return lambda: file_manager.read_database(data['pdb'])
+
+
+@benchmark('save_pdbx')
+def bench_save_pdbx(data):
+    return lambda: file_manager.write_database(data['pdbx'],
+                                               data['relations'])
+
+
+@benchmark('load_pdbx')
+def bench_load_pdbx(data):
+    file_manager.write_database(data['pdbx'], data['relations'])
+    return lambda: file_manager.read_database(data['pdbx'])
+
+
+def size(result):
+    """ Returns the number of tuples (or items) of the *result* of a
+    benchmark """
+
+    if result is None:
+        return None
+    if isinstance(result, int):
+        return result
+    if hasattr(result, 'cardinality'):
+        return result.cardinality()
+    return sum(relation.cardinality() for relation in result.values())
+
+
+def measure(function, repeat):
+    """ Executes *function* *repeat* times
+
+    :returns: A tuple (list of times in seconds, result of the last run)
+    """
+
+    times = []
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            result = function()
+            times.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return times, result
+
+
+def run(sizes=SIZES, names=None, repeat=3, degree=6, key_skew=1.0, seed=0,
+        columnar=False, report=None):
+    """ Runs the benchmarks *names* (all by default) for each size
+
+    :param report: Function called with each result
+    :returns: The list of results, a dictionary with the name, the size of
+              the data, the best time, the times and the number of tuples
+              of the result
+    """
+
+    names = names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise Exception("Unknown benchmark: '{}'".format(name))
+    results = []
+    path = tempfile.mkdtemp()
+    try:
+        for cardinality in sizes:
+            data = setup(cardinality, degree, key_skew, seed, columnar, path)
+            for name in names:
+                times, result = measure(BENCHMARKS[name](data), repeat)
+                item = OrderedDict([
+                    ('name', name),
+                    ('size', cardinality),
+                    ('seconds', min(times)),
+                    ('times', times),
+                    ('rows', size(result))
+                ])
+                results.append(item)
+                if report is not None:
+                    report(item)
+    finally:
+        shutil.rmtree(path)
+    return results
+
+
+def git_commit():
+    """ Returns the current commit of the repository, or None """
+
+    try:
+        output = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR,
+            stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip()
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """ Compares the *results* with the results of *baseline* (the
+    dictionary written by main)
+
+    :returns: A list of tuples (name, size, baseline seconds, seconds,
+              ratio, True if it's a regression)
+    """
+
+    previous = {(item['name'], item['size']): item['seconds']
+                for item in baseline['results']}
+    comparison = []
+    for item in results:
+        before = previous.get((item['name'], item['size']))
+        if before is None:
+            continue
+        ratio = item['seconds'] / before if before else float('inf')
+        comparison.append((item['name'], item['size'], before,
+                           item['seconds'], ratio, ratio > 1 + threshold))
+    return comparison
+
+
+def create_parser():
+    pargs = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description='Benchmarks of Pireal over synthetic data')
+    pargs.add_argument('-s', '--sizes', type=int, nargs='+',
+                       default=list(SIZES), metavar='N',
+                       help="Number of tuples of the data (default: "
+                            "%(default)s)")
+    pargs.add_argument('-b', '--benchmark', action='append',
+                       dest='benchmarks', choices=list(BENCHMARKS),
+                       metavar='NAME',
+                       help="Benchmark to run, can be repeated (all by "
+                            "default): " + ', '.join(BENCHMARKS))
+    pargs.add_argument('-r', '--repeat', type=int, default=3,
+                       help="Runs of each benchmark (default: %(default)s)")
+    pargs.add_argument('--degree', type=int, default=6,
+                       help="Fields of the relations (default: %(default)s)")
+    pargs.add_argument('--skew', type=float, default=1.0,
+                       help="Zipf skew of the keys (default: %(default)s)")
+    pargs.add_argument('--seed', type=int, default=0)
+    pargs.add_argument('--columnar', action='store_true',
+                       help="Use the columnar storage")
+    pargs.add_argument('-o', '--output', metavar='FILE',
+                       help="Write the results in FILE (JSON)")
+    pargs.add_argument('--compare', metavar='FILE',
+                       help="Compare with the results of FILE, the exit "
+                            "status is 1 if there are regressions")
+    pargs.add_argument('--threshold', type=float,
+                       default=REGRESSION_THRESHOLD,
+                       help="Slowdown considered a regression (default: "
+                            "%(default)s)")
+    return pargs
+
+
+def main(argv=None):
+    args = create_parser().parse_args(argv)
+
+    def report(item):
+        sys.stdout.write("{name:<12} {size:>9} tuples {0:>12.2f} ms "
+                         "{rows!s:>9} rows\n".format(item['seconds'] * 1000,
+                                                     **item))
+        sys.stdout.flush()
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as _file:
+            baseline = json.load(_file)
+
+    results = run(args.sizes, args.benchmarks, args.repeat, args.degree,
+                  args.skew, args.seed, args.columnar, report)
+    if args.output is not None:
+        document = OrderedDict([
+            ('version', FORMAT_VERSION),
+            ('commit', git_commit()),
+            ('date', datetime.datetime.now().isoformat()),
+            ('python', platform.python_version()),
+            ('platform', platform.platform()),
+            ('config', OrderedDict([
+                ('repeat', args.repeat),
+                ('degree', args.degree),
+                ('skew', args.skew),
+                ('seed', args.seed),
+                ('columnar', args.columnar)
+            ])),
+            ('results', results)
+        ])
+        with open(args.output, 'w') as _file:
+            json.dump(document, _file, indent=2)
+
+    if baseline is None:
+        return 0
+    regressions = 0
+    sys.stdout.write("\nCompared with {}:\n".format(
+        baseline.get('commit') or args.compare))
+    for name, size_, before, after, ratio, regression in compare(
+            results, baseline, args.threshold):
+        regressions += regression
+        sys.stdout.write(
+            "{0:<12} {1:>9} tuples {2:>12.2f} ms -> {3:>12.2f} ms "
+            "{4:>6.2f}x{5}\n".format(name, size_, before * 1000,
+                                     after * 1000, ratio,
+                                     ' REGRESSION' if regression else ''))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
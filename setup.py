@@ -112,7 +112,7 @@ setup(
         "src.gui.dialogs",
         "src.gui.query_container"
     ],
-    scripts=['pireal'],
+    scripts=['pireal', 'pireal-run'],
     classifiers=classifiers,
     cmdclass={'install': CustomInstall},
 )
\ No newline at end of file
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Command line runner (pireal-run): executes the queries of a .pqf file
+# over a database without the interface, it doesn't import PyQt5. The
+# results are written as a database (.pdb or .pdbx), as CSV files or to
+# the standard output, and the time of each assignment is reported in the
+# standard error. With --convert the database is written in the other
+# format (.pdb or .pdbx) and no queries are executed.
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+from collections import OrderedDict
+
+from src.core import (
+    file_manager,
+    lazy,
+    stats
+)
+from src.core.interpreter import (
+    scanner,
+    lexer,
+    parser,
+    optimizer,
+    executor,
+    explain
+)
+
+DATABASE_EXTENSIONS = ('.pdb', '.pdbx')
+
+
+def create_parser():
+    pargs = argparse.ArgumentParser(
+        prog='pireal-run',
+        description='Executes the queries of a Pireal query file over a '
+                    'database, without the interface',
+        epilog='Pireal website: http://centaurialpha.github.io/pireal')
+    pargs.add_argument('database', help="Database file (.pdb or .pdbx)")
+    pargs.add_argument('queries', nargs='?', help="Query file (.pqf)")
+    pargs.add_argument('-r', '--relation', action='append', dest='relations',
+                       metavar='NAME',
+                       help="Result to write, can be repeated (all the "
+                            "assignments by default)")
+    pargs.add_argument('-o', '--output', metavar='PATH',
+                       help="A database file (.pdb or .pdbx) or a folder "
+                            "for CSV files. The results are written to the "
+                            "standard output in .pdb format by default")
+    pargs.add_argument('--columnar', action='store_true',
+                       help="Use the columnar storage")
+    pargs.add_argument('--parallel', action='store_true',
+                       help="Execute the independent assignments in a pool "
+                            "of processes")
+    pargs.add_argument('--no-optimize', action='store_true',
+                       help="Don't optimize the queries")
+    pargs.add_argument('-q', '--quiet', action='store_true',
+                       help="Don't report the timings")
+    pargs.add_argument('--explain', action='store_true',
+                       help="Write the plan of the queries instead of the "
+                            "results")
+    pargs.add_argument('--analyze', action='store_true',
+                       help="Like --explain, but the queries are executed "
+                            "and the tuples, the time and the memory of "
+                            "each operator are reported")
+    pargs.add_argument('--json', action='store_true',
+                       help="Write the plans as JSON")
+    pargs.add_argument('--convert', metavar='PATH',
+                       help="Write the database in PATH (.pdb or .pdbx) "
+                            "instead of executing queries")
+    return pargs
+
+
+def compile_queries(text, relations, optimize=True):
+    """ Parses the *text* of the queries. The statistics of the relations
+    used by the queries are collected to optimize them (their tuples are
+    read anyway)
+
+    :returns: A tuple (Executor, ordered dictionary of queries)
+    """
+
+    tree = parser.Parser(lexer.Lexer(scanner.Scanner(text))).parse()
+    query_optimizer = None
+    if optimize:
+        schemas = {name: rela.header for name, rela in relations.items()}
+        used = set()
+        for assignment in tree.children:
+            used |= executor.references(assignment.query)
+        statistics = {name: stats.collect(relations[name])
+                      for name in used if name in relations}
+        query_optimizer = optimizer.Optimizer(schemas, statistics)
+    query_executor = executor.Executor(relations, query_optimizer)
+    return query_executor, query_executor.compile(tree)
+
+
+def run(query_executor, queries, parallel=False, report=None):
+    """ Executes the *queries*, *report* is called with (relation name,
+    relation, seconds) when each assignment finishes
+
+    :returns: An ordered dictionary (relation name: relation)
+    """
+
+    if parallel:
+        results = query_executor.run_parallel(queries)
+    else:
+        results = query_executor.execute_all(queries)
+    executed = OrderedDict()
+    start = time.perf_counter()
+    for relation_name, new_relation in results:
+        end = time.perf_counter()
+        executed[relation_name] = new_relation
+        if report is not None:
+            report(relation_name, new_relation, end - start)
+        start = time.perf_counter()
+    return executed
+
+
+def write_csv(path, relations):
+    """ Writes each relation in *path*/name.csv, the first row is the
+    header """
+
+    os.makedirs(path, exist_ok=True)
+    for relation_name, relation in relations.items():
+        filename = os.path.join(path, relation_name + '.csv')
+        with open(filename, 'w', newline='',
+                  encoding=file_manager.ENCODING) as _file:
+            writer = csv.writer(_file)
+            writer.writerow(relation.header)
+            writer.writerows(relation.content)
+
+
+def write_results(output, relations):
+    if output is None:
+        file_manager.write_relations(sys.stdout, relations)
+    elif file_manager.get_extension(output) in DATABASE_EXTENSIONS:
+        file_manager.write_database(output, relations)
+    else:
+        write_csv(output, relations)
+
+
+def write_plans(output, plans, as_json=False):
+    """ Writes the *plans* (see Executor.explain) as text or JSON in the
+    file *output*, or to the standard output if it's None """
+
+    if as_json:
+        text = json.dumps(explain.as_dict(plans), indent=2) + '\n'
+    else:
+        text = explain.format_text(plans)
+    if output is None:
+        sys.stdout.write(text)
+    else:
+        with open(output, 'w', encoding=file_manager.ENCODING) as _file:
+            _file.write(text)
+
+
+def main(argv=None):
+    pargs = create_parser()
+    args = pargs.parse_args(argv)
+    if args.queries is None and args.convert is None:
+        pargs.error("the following arguments are required: queries")
+
+    def report(relation_name, relation, seconds):
+        if not args.quiet:
+            sys.stderr.write("{0}: {1} tuples in {2:.2f} ms\n".format(
+                relation_name, relation.cardinality(), seconds * 1000))
+
+    start = time.perf_counter()
+    try:
+        if args.convert is not None:
+            if (file_manager.get_extension(args.convert) not in
+                    DATABASE_EXTENSIONS):
+                raise Exception("'{}' is not a database file (.pdb or "
+                                ".pdbx)".format(args.convert))
+            file_manager.convert_database(args.database, args.convert)
+            return 0
+        relations = lazy.open_database(args.database, args.columnar)
+        with open(args.queries, encoding=file_manager.ENCODING) as _file:
+            text = _file.read()
+        query_executor, queries = compile_queries(
+            text, dict(relations), not args.no_optimize)
+        names = args.relations or list(queries)
+        for name in names:
+            if name not in queries:
+                raise Exception("'{}' is not an assignment of the "
+                                "queries".format(name))
+        if args.explain or args.analyze:
+            plans = query_executor.explain(queries, args.analyze)
+            write_plans(args.output,
+                        OrderedDict((name, plans[name]) for name in names),
+                        args.json)
+            return 0
+        results = run(query_executor, queries, args.parallel, report)
+        write_results(args.output,
+                      OrderedDict((name, results[name]) for name in names))
+    except Exception as reason:
+        sys.stderr.write("pireal-run: error: {}\n".format(reason))
+        return 1
+    if not args.quiet:
+        sys.stderr.write("Total: {0:.2f} ms\n".format(
+            (time.perf_counter() - start) * 1000))
+    return 0
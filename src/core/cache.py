@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Cache of the results of the queries. The key of a result is built from
+# the AST of the query (so the spaces, comments and the name of the
+# assignment don't matter) and the version of each relation used in it
+# (see Relation.touch), so a result is not used after the data changes.
+# When the size of the results is greater than the budget the least
+# recently used results are removed.
+#
+# The stored relations are the results shown in the interface, they can
+# be edited there. A result is only used while its version is the
+# version that it had when it was stored.
+
+import sys
+from collections import OrderedDict
+
+# Default budget, in bytes
+DEFAULT_SIZE = 64 * 1024 * 1024
+
+# Tuples used to estimate the size of a relation
+SAMPLE_SIZE = 100
+
+
+def relation_size(relation):
+    """ Returns the estimated size in bytes of *relation* """
+
+    size = sys.getsizeof(relation.header) + sum(
+        sys.getsizeof(field) for field in relation.header)
+    if relation.columnar:
+        for column in relation.content.columns:
+            size += column.codes.itemsize * len(column.codes)
+            size += sum(sys.getsizeof(value)
+                        for value in column.dictionary.values)
+        return size
+    cardinality = relation.cardinality()
+    if not cardinality:
+        return size
+    sample = [relation.content[i]
+              for i in range(min(cardinality, SAMPLE_SIZE))]
+    sample_size = sum(sys.getsizeof(row) + sum(map(sys.getsizeof, row))
+                      for row in sample)
+    return size + sample_size * cardinality // len(sample)
+
+
+class ResultCache(object):
+    """ LRU cache of relations
+
+    :param max_size: Budget in bytes
+    """
+
+    def __init__(self, max_size=DEFAULT_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # key: (relation, size, version), from the least to the most
+        # recently used
+        self.__items = OrderedDict()
+
+    def get(self, key):
+        """ Returns the relation of *key*, or None. A relation that was
+        modified after it was stored is discarded """
+
+        item = self.__items.get(key)
+        if item is not None and item[0].version != item[2]:
+            self.discard(key)
+            item = None
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, relation):
+        """ Stores *relation*, it's ignored if it's bigger than the
+        budget """
+
+        size = relation_size(relation)
+        if size > self.max_size:
+            return
+        self.discard(key)
+        self.__items[key] = (relation, size, relation.version)
+        self.size += size
+        while self.size > self.max_size:
+            old_key, old_item = self.__items.popitem(last=False)
+            self.size -= old_item[1]
+
+    def discard(self, key):
+        item = self.__items.pop(key, None)
+        if item is not None:
+            self.size -= item[1]
+
+    def clear(self):
+        self.__items.clear()
+        self.size = 0
+
+    def __contains__(self, key):
+        return key in self.__items
+
+    def __len__(self):
+        return len(self.__items)
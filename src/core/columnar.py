@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# This module implements the columnar storage of a relation. Each field
+# is stored as an array of integer codes plus a dictionary with the
+# distinct strings of the field, so the original strings (for example
+# '01') are kept for display while the typed values are casted only once
+# per distinct string.
+
+from array import array
+
+from src.core import rtypes
+
+# Type code of the arrays of codes
+CODE_TYPE = 'I'
+
+
+class Dictionary(object):
+    """ The distinct strings of a column. The code of a string is its
+    position in Dictionary.values. The dictionary only grows, so it can be
+    shared between columns """
+
+    __slots__ = ('values', 'codes', '_typed')
+
+    def __init__(self, values=None):
+        self.values = []
+        self.codes = {}
+        self._typed = []
+        if values is not None:
+            for value in values:
+                self.encode(value)
+
+    def encode(self, value):
+        """ Returns the code of *value*, adding it if it's a new string """
+
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.codes[value] = code
+        return code
+
+    def set_typed(self, typed):
+        """ Sets the casted values, by code, when they are known (see
+        src.core.pdbx) """
+
+        self._typed = list(typed)
+
+    def typed(self):
+        """ Returns the casted values, by code """
+
+        typed = self._typed
+        if len(typed) < len(self.values):
+            typed.extend(map(rtypes.cast, self.values[len(typed):]))
+        return typed
+
+    def __len__(self):
+        return len(self.values)
+
+
+class Column(object):
+    """ A field of a relation stored as an array of codes of a Dictionary.
+
+    When a column is shared between relations (see ColumnarContent.project)
+    it's marked as shared and the relation that modifies it works on a
+    copy (copy on write) """
+
+    __slots__ = ('dictionary', 'codes', 'shared', '_typed', '_array')
+
+    def __init__(self, dictionary=None, codes=None):
+        if dictionary is None:
+            dictionary = Dictionary()
+        if codes is None:
+            codes = array(CODE_TYPE)
+        self.dictionary = dictionary
+        self.codes = codes
+        self.shared = False
+        self._typed = None
+        self._array = None
+
+    def __changed(self):
+        self._typed = None
+        self._array = None
+
+    def append(self, value):
+        self.codes.append(self.dictionary.encode(value))
+        self.__changed()
+
+    def set(self, index, value):
+        self.codes[index] = self.dictionary.encode(value)
+        self.__changed()
+
+    def delete(self, index):
+        del self.codes[index]
+        self.__changed()
+
+    def copy(self):
+        return Column(self.dictionary, array(CODE_TYPE, self.codes))
+
+    def take(self, indexes):
+        """ Returns a new column with the values at *indexes*, the
+        dictionary is shared """
+
+        codes = self.codes
+        return Column(self.dictionary,
+                      array(CODE_TYPE, [codes[i] for i in indexes]))
+
+    def decode(self):
+        """ Returns the list of strings of the column """
+
+        return list(map(self.dictionary.values.__getitem__, self.codes))
+
+    def typed(self):
+        """ Returns the list of casted values of the column """
+
+        if self._typed is None:
+            typed = self.dictionary.typed()
+            self._typed = list(map(typed.__getitem__, self.codes))
+        return self._typed
+
+    def typed_array(self, factory):
+        """ Returns the array built by *factory* from the casted values,
+        it's cached until the column changes """
+
+        if self._array is None:
+            self._array = factory(self.typed())
+        return self._array
+
+    def __getitem__(self, index):
+        return self.dictionary.values[self.codes[index]]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+class ColumnarContent(object):
+    """ Columnar version of relation.Content, it has the same interface
+    so a Relation works with both of them. The tuples are built from the
+    columns when they are read """
+
+    def __init__(self, columns=None):
+        if columns is None:
+            columns = []
+        self.columns = columns
+        self.__length = len(columns[0]) if columns else 0
+        self.__index = None
+
+    @property
+    def content(self):
+        """ Returns the tuples as a list of lists """
+
+        return list(self)
+
+    def __own(self, column):
+        """ Returns the column at position *column*, copying it before if
+        it's shared with another relation """
+
+        col = self.columns[column]
+        if col.shared:
+            col = col.copy()
+            self.columns[column] = col
+        return col
+
+    def __get_index(self):
+        if self.__index is None:
+            self.__index = set(zip(*[c.decode() for c in self.columns]))
+        return self.__index
+
+    def set_degree(self, degree):
+        """ Creates the empty columns of a content without tuples, it's
+        called when the header of the relation is set """
+
+        if not self.__length and len(self.columns) != degree:
+            self.columns = [Column() for i in range(degree)]
+            self.__index = None
+
+    def typed_column(self, column):
+        """ Returns a list with the casted values of *column* """
+
+        return self.columns[column].typed()
+
+    def typed_array(self, column, factory):
+        """ Returns an array built by *factory* from the casted values of
+        *column*, cached until the column changes """
+
+        return self.columns[column].typed_array(factory)
+
+    def add(self, item):
+        for column in range(len(self.columns)):
+            self.__own(column).append(item[column])
+        self.__length += 1
+        if self.__index is not None:
+            self.__index.add(tuple(item))
+
+    def update(self, row, column, value):
+        self.__own(column).set(row, value)
+        self.__index = None
+
+    def append_column(self, value):
+        dictionary = Dictionary()
+        codes = array(CODE_TYPE, [dictionary.encode(value)]) * self.__length
+        self.columns.append(Column(dictionary, codes))
+        self.__index = None
+
+    def remove_column(self, column):
+        del self.columns[column]
+        self.__index = None
+
+    def clear(self):
+        self.columns = [Column() for c in self.columns]
+        self.__length = 0
+        self.__index = None
+
+    def take(self, indexes):
+        """ Returns a new content with the tuples at positions *indexes* """
+
+        content = ColumnarContent([c.take(indexes) for c in self.columns])
+        content.__length = len(indexes)
+        return content
+
+    def project(self, columns):
+        """ Returns a new content with the *columns*, the columns are
+        shared (not copied) """
+
+        projected = []
+        for column in columns:
+            col = self.columns[column]
+            col.shared = True
+            projected.append(col)
+        content = ColumnarContent(projected)
+        content.__length = self.__length
+        return content
+
+    def difference(self, other):
+        return [x for x in self if x not in other]
+
+    def intersection(self, other):
+        return [x for x in other if x in self]
+
+    def union(self, other):
+        return list(self) + [x for x in other if x not in self]
+
+    def __contains__(self, item):
+        return tuple(item) in self.__get_index()
+
+    def __iter__(self):
+        if not self.columns:
+            return iter([[] for i in range(self.__length)])
+        return map(list, zip(*[c.decode() for c in self.columns]))
+
+    def __str__(self):
+        return str([x for x in self])
+
+    def __len__(self):
+        return self.__length
+
+    def __getitem__(self, index):
+        return [c[index] for c in self.columns]
+
+    def __setitem__(self, index, value):
+        for column in range(len(self.columns)):
+            self.__own(column).set(index, value[column])
+        self.__index = None
+
+    def __delitem__(self, index):
+        for column in range(len(self.columns)):
+            self.__own(column).delete(index)
+        self.__length -= 1
+        self.__index = None
@@ -17,7 +17,25 @@
 # You should have received a copy of the GNU General Public License
 # along with Pireal; If not, see <http://www.gnu.org/licenses/>.
 
+import io
 import os
+import csv
+import shutil
+import tempfile
+from collections import OrderedDict
+
+from src.core import (
+    pdbx,
+    pdb_index
+)
+from src.core.relation import Relation
+
+# Size of the chunks read from the database file, in bytes
+READ_BUFFER_SIZE = 1024 * 1024
+# Size of the buffer used to write the database file, in bytes
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Encoding of the text files (databases and queries)
+ENCODING = 'utf-8'
 
 
 def get_extension(filename):
@@ -45,6 +63,100 @@ def get_path(filename):
     return os.path.dirname(filename)
 
 
+class _EncodedStream(object):
+    """ Text stream that writes in a binary file, it counts the written
+    bytes so the position of the relations is known (see pdb_index) """
+
+    def __init__(self, binary, encoding):
+        self.binary = binary
+        self.encoding = encoding
+        self.position = 0
+
+    def write(self, text):
+        data = text.encode(self.encoding)
+        self.binary.write(data)
+        self.position += len(data)
+
+    def tell(self):
+        return self.position
+
+
+def write_relations(stream, relations, index=False):
+    """ This function writes the content of the database in *stream*, a
+    relation at a time. The values are quoted by csv.writer when it's
+    needed, so they are read as they were written
+
+    :param stream: File object opened with newline=''
+    :param relations: Dictionary with relations (Relation Object)
+    :param index: If it's True the positions of the relations are read
+                  with stream.tell(), the stream can't be a pipe
+    :returns: The sections of the index of the file (see pdb_index), or
+              None without index
+    """
+
+    sections = [] if index else None
+    writer = csv.writer(stream, lineterminator='\n')
+    for count, (relation_name, relation) in enumerate(relations.items()):
+        if count:
+            stream.write('\n')
+        stream.write('@%s:%s\n' % (relation_name, ','.join(relation.header)))
+        if index:
+            offset = stream.tell()
+        writer.writerows(relation.content)
+        if index:
+            sections.append({
+                'name': relation_name,
+                'header': list(relation.header),
+                'cardinality': relation.cardinality(),
+                'offset': offset,
+                'length': stream.tell() - offset
+            })
+    return sections
+
+
+def write_database(filename, relations):
+    """ This function writes the database in *filename*. The content is
+    written in a temporary file that replaces *filename* when it's
+    complete, so the previous file is kept if there is an error. The
+    index of a .pdb file is written next to it (see pdb_index)
+
+    The format is chosen by the extension: .pdbx (see src.core.pdbx) or
+    .pdb
+
+    :param filename: Filename path
+    :param relations: Dictionary with relations (Relation Object)
+    """
+
+    binary = get_extension(filename) == pdbx.EXTENSION
+    path = os.path.dirname(os.path.abspath(filename))
+    fd, temp_filename = tempfile.mkstemp(suffix='.tmp', dir=path)
+    try:
+        with open(fd, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            # The permissions of the temporary file are only for the user
+            if os.path.exists(filename):
+                shutil.copymode(filename, temp_filename)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temp_filename, 0o666 & ~umask)
+            if binary:
+                pdbx.write_relations(f, relations)
+            else:
+                sections = write_relations(
+                    _EncodedStream(f, ENCODING),
+                    relations, index=True)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.remove(temp_filename)
+        raise
+    if not binary:
+        try:
+            pdb_index.write_index(filename, sections)
+        except OSError:
+            # The database is opened without the index
+            pdb_index.remove_index(filename)
+
+
 def generate_database(relations):
     """ This function generates the content of the database
 
@@ -52,17 +164,87 @@ def generate_database(relations):
     :returns: The content of the database
     """
 
-    content = ""
-    for relation_name, relation in list(relations.items()):
-        content += '@%s:' % relation_name
-        header = ','.join(relation.header)
-        content += header + '\n'
-        for i in relation.content:
-            content += ','.join(i) + '\n'
-        content += '\n'
-    # Remove last line
-    content = content[:-1]
-    return content
+    content = io.StringIO(newline='')
+    write_relations(content, relations)
+    return content.getvalue()
+
+
+def parse_header(line, line_count):
+    """ This function parses the header of a relation in a .pdb file,
+    for example: "@people:id, name"
+
+    :returns: A tuple (relation name, header)
+    """
+
+    table_name, tpoint, line = line.partition(':')
+    if not tpoint:
+        raise Exception("Invalid syntax at line {}".format(line_count))
+    return table_name[1:].strip(), list(map(str.strip, line.split(',')))
+
+
+def insert_tuples(relation, lines):
+    """ This function parses the *lines* of a relation in a .pdb file
+    and inserts the tuples in *relation* """
+
+    # The values are separated by ", " in the files
+    for row in csv.reader(lines, skipinitialspace=True):
+        # Ignore blank lines
+        if not row:
+            continue
+        # Remove spaces
+        relation.insert(list(map(str.strip, row)))
+
+
+def read_database(filename, columnar=False):
+    """ This function reads a database file (.pdb) in a single pass.
+    The file is read in chunks and the tuples of each relation are
+    inserted while they are parsed, there is no copy of the whole file.
+    The .pdbx files are read by src.core.pdbx
+
+    :param filename: Filename path
+    :param columnar: Storage of the relations (see Relation)
+    :returns: An ordered dictionary (relation name: Relation object)
+    """
+
+    if get_extension(filename) == pdbx.EXTENSION:
+        return pdbx.read_database(filename, columnar)
+    relations = OrderedDict()
+    with open(filename, encoding=ENCODING, newline='',
+              buffering=READ_BUFFER_SIZE) as _file:
+        lines = enumerate(_file, 1)
+        # The line of the header of the next relation
+        next_header = []
+
+        def section():
+            """ Generates the lines of a relation, until the next header """
+
+            for line_count, line in lines:
+                if line.startswith('@'):
+                    next_header.append((line_count, line))
+                    return
+                yield line
+
+        # Lines before the first relation
+        reader = csv.reader(section())
+        for row in reader:
+            if row:
+                raise Exception("Invalid syntax at line {}".format(
+                    reader.line_num))
+        while next_header:
+            line_count, line = next_header.pop()
+            table_name, header = parse_header(line, line_count)
+            rela = Relation(columnar)
+            rela.header = header
+            insert_tuples(rela, section())
+            relations[table_name] = rela
+    return relations
+
+
+def convert_database(source, target):
+    """ This function converts the database *source* to the format of
+    *target* (.pdb or .pdbx), by the extension of the files """
+
+    write_database(target, read_database(source, columnar=True))
 
 
 def get_files_from_folder(path):
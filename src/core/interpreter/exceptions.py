@@ -51,3 +51,8 @@ class ConsumeError(InterpreterError):
 class DuplicateRelationNameError(InterpreterError):
     """ Excepción para errores generados por el Interpreter cuando se
     usa un nombre que ya existe en el SCOPE """
+
+
+class CancelledError(InterpreterError):
+    """ Excepción generada por el Executor cuando se cancela la ejecución
+    de las consultas """
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# This module executes the AST built by the Parser. The nodes are visited
+# and the operators of the plan (see src.core.plan) are called directly,
+# without converting the queries to Python code. Only the conditions of
+# the selections are converted to Python expressions, they are compiled
+# once by Relation.select.
+#
+# With a cache (see src.core.cache) the result of each assignment is
+# stored, and the subexpressions of the next queries with the same AST
+# and the same versions of the relations are read from the cache.
+#
+# The independent assignments can be executed at the same time in a pool
+# of processes (see Executor.run_parallel). An assignment is sent to the
+# pool when the assignments that it uses are finished, the relations are
+# sent in the compact form of src.core.serialize. When the execution is
+# cancelled the processes of the pool are terminated, the assignments
+# that they were executing are lost. The processes of the pool solve the
+# big joins without another pool (see relation.partitioned_join), before
+# Python 3.9 they are daemonic and can't start processes.
+
+from collections import OrderedDict
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    FIRST_COMPLETED,
+    wait
+)
+
+from src.core import (
+    plan,
+    relation,
+    serialize
+)
+from src.core.interpreter.explain import Explainer
+from src.core.interpreter.parser import (
+    NodeVisitor,
+    Interpreter,
+    Variable,
+    ProjectExpr,
+    SelectExpr,
+    BinaryOp,
+    EquiJoinExpr,
+    Assignment
+)
+from src.core.interpreter.exceptions import (
+    DuplicateRelationNameError,
+    CancelledError
+)
+
+
+# Seconds between the checks of Executor.cancel while the pool works
+CHECK_INTERVAL = 0.1
+
+# Relations of the database in a process of the pool
+_relations = {}
+
+
+def _initialize(packed_relations):
+    """ Called when a process of the pool starts """
+
+    relation.PARTITIONED_JOIN_ROWS = float('inf')
+    _relations.clear()
+    for name, packed in packed_relations.items():
+        _relations[name] = serialize.unpack(packed)
+
+
+def _execute(query, packed_inputs):
+    """ Executes *query* in a process of the pool, *packed_inputs* are the
+    results of the assignments used in the query """
+
+    relations = dict(_relations)
+    for name, packed in packed_inputs.items():
+        relations[name] = serialize.unpack(packed)
+    return serialize.pack(Executor(relations).visit(query).materialize())
+
+
+def _terminate(pool):
+    """ Terminates the processes of *pool*, ProcessPoolExecutor has no
+    public method to stop the calls that are running """
+
+    processes = getattr(pool, '_processes', None) or {}
+    for process in list(processes.values()):
+        process.terminate()
+
+
+def references(node):
+    """ Returns the set of relation names used in *node* """
+
+    if isinstance(node, Variable):
+        return {node.value}
+    if isinstance(node, (ProjectExpr, SelectExpr)):
+        return references(node.expr)
+    return references(node.left) | references(node.right)
+
+
+class Executor(NodeVisitor):
+    """ Executes the assignments of a query
+
+    :param relations: Dictionary with the relations, the results of the
+                      assignments are added to it
+    :param optimizer: Optional Optimizer object, if it's provided the
+                      queries are optimized before they are executed
+    :param cache: Optional ResultCache object
+    """
+
+    def __init__(self, relations, optimizer=None, cache=None):
+        self.relations = relations
+        self.optimizer = optimizer
+        self.cache = cache
+        # Functions called with (node, rows, seconds) when a node of the
+        # plan finishes, the time includes its children
+        self.hooks = []
+        # Functions called with (relation name, rows) while an assignment
+        # is executed, rows is the number of tuples of the result so far
+        self.progress_hooks = []
+        # If it's True the execution can be stopped with Executor.cancel,
+        # it's checked while the tuples are produced
+        self.interruptible = False
+        self.__cancelled = False
+        # The conditions are converted to Python expressions
+        self.__python = Interpreter(None)
+
+    def add_hook(self, function):
+        self.hooks.append(function)
+
+    def add_progress_hook(self, function):
+        self.progress_hooks.append(function)
+
+    def cancel(self):
+        """ Stops the execution, CancelledError is raised by the operator
+        that is running (it can be called from another thread). The
+        processes of Executor.run_parallel are terminated """
+
+        self.__cancelled = True
+
+    def __check(self):
+        if self.__cancelled:
+            raise CancelledError("The execution was cancelled")
+
+    def compile(self, tree):
+        """ Checks the names of the assignments of *tree* and optimizes
+        the queries
+
+        :param tree: Compound or Assignment node
+        :returns: An ordered dictionary (relation name: query node)
+        """
+
+        if isinstance(tree, Assignment):
+            assignments = [tree]
+        else:
+            assignments = tree.children
+        queries = OrderedDict()
+        for assignment in assignments:
+            rname = assignment.rname.value
+            if rname in queries:
+                raise DuplicateRelationNameError(rname)
+            query = assignment.query
+            if self.optimizer is not None:
+                query = self.optimizer.optimize(query)
+                self.optimizer.assign(rname, query)
+            queries[rname] = query
+        return queries
+
+    def execute(self, rname, query):
+        """ Executes *query* and stores the result as *rname*
+
+        :returns: The new relation
+        """
+
+        self.__check()
+        query_plan = self.visit(query)
+        if self.interruptible or self.progress_hooks:
+            def progress(rows):
+                for hook in self.progress_hooks:
+                    hook(rname, rows)
+                self.__check()
+            query_plan = plan.Checkpoint(query_plan, progress)
+        new_relation = query_plan.materialize()
+        self.__store(rname, query, new_relation)
+        return new_relation
+
+    def __store(self, rname, query, new_relation):
+        if self.cache is not None and not isinstance(query, Variable):
+            key = self.key(query)
+            if key is not None:
+                self.cache.put(key, new_relation)
+        self.relations[rname] = new_relation
+
+    def execute_all(self, queries, results=None):
+        """ Executes the *queries* in order. Generates the pairs (relation
+        name, relation) of the executed assignments
+
+        :param queries: Ordered dictionary returned by Executor.compile
+        :param results: Optional dictionary with the known results of
+                        some assignments, they are not executed
+        """
+
+        if results is None:
+            results = {}
+        for rname, query in queries.items():
+            if rname in results:
+                self.relations[rname] = results[rname]
+                continue
+            yield rname, self.execute(rname, query)
+
+    def run_parallel(self, queries, results=None, max_workers=None):
+        """ Like Executor.execute_all, but the assignments that don't
+        depend on each other are executed in a pool of *max_workers*
+        processes. The results are generated in the order of the
+        *queries*, an error is raised when its assignment is reached """
+
+        if results is None:
+            results = {}
+        names = list(queries)
+        # Assignments used by each assignment, and the relations of the
+        # database used by all of them
+        dependencies = {}
+        database = set()
+        for position, rname in enumerate(names):
+            if rname in results:
+                continue
+            previous = set(names[:position])
+            used = references(queries[rname])
+            dependencies[rname] = used & previous
+            database |= used - previous
+        packed_database = {name: serialize.pack(self.relations[name])
+                           for name in database if name in self.relations}
+
+        finished = dict(results)
+        packed = {}
+        errors = {}
+        running = {}
+        pool = ProcessPoolExecutor(max_workers, initializer=_initialize,
+                                   initargs=(packed_database,))
+
+        def submit():
+            for rname, used in list(dependencies.items()):
+                if not used.issubset(finished):
+                    continue
+                del dependencies[rname]
+                inputs = {}
+                for name in used:
+                    if name not in packed:
+                        packed[name] = serialize.pack(finished[name])
+                    inputs[name] = packed[name]
+                future = pool.submit(_execute, queries[rname], inputs)
+                running[future] = rname
+
+        try:
+            submit()
+            for rname in names:
+                if rname in results:
+                    self.relations[rname] = results[rname]
+                    continue
+                while rname not in finished and rname not in errors:
+                    self.__check()
+                    done = wait(running, timeout=CHECK_INTERVAL,
+                                return_when=FIRST_COMPLETED).done
+                    for future in done:
+                        name = running.pop(future)
+                        try:
+                            packed[name] = future.result()
+                        except Exception as reason:
+                            errors[name] = reason
+                        else:
+                            finished[name] = serialize.unpack(packed[name])
+                    submit()
+                if rname in errors:
+                    raise errors[rname]
+                self.__store(rname, queries[rname], finished[rname])
+                yield rname, finished[rname]
+        finally:
+            for future in running:
+                future.cancel()
+            if self.__cancelled:
+                _terminate(pool)
+            pool.shutdown(wait=False)
+
+    def relation_key(self, name):
+        """ Returns the key of the relation *name*, or None if it doesn't
+        exist """
+
+        relation = self.relations.get(name)
+        if relation is None:
+            return None
+        return ('relation', name, relation.version)
+
+    def key(self, node, resolve=None):
+        """ Returns the key of the result of *node* in the cache, or None
+        if some relation doesn't exist
+
+        :param resolve: Function that returns the key of a relation name,
+                        Executor.relation_key by default
+        """
+
+        if resolve is None:
+            resolve = self.relation_key
+        if isinstance(node, Variable):
+            return resolve(node.value)
+        if isinstance(node, ProjectExpr):
+            expr = self.key(node.expr, resolve)
+            if expr is None:
+                return None
+            return ('project', tuple(i.value for i in node.attrs), expr)
+        if isinstance(node, SelectExpr):
+            expr = self.key(node.expr, resolve)
+            if expr is None:
+                return None
+            return ('select', self.__python.visit(node.condition), expr)
+        left = self.key(node.left, resolve)
+        right = self.key(node.right, resolve)
+        if left is None or right is None:
+            return None
+        if isinstance(node, EquiJoinExpr):
+            return ('equijoin', tuple(node.pairs), left, right)
+        return (node.token.value, left, right)
+
+    def visit(self, node):
+        if self.cache is not None and isinstance(
+                node, (ProjectExpr, SelectExpr, BinaryOp, EquiJoinExpr)):
+            key = self.key(node)
+            if key is not None:
+                relation = self.cache.get(key)
+                if relation is not None:
+                    return plan.Scan(relation)
+        return NodeVisitor.visit(self, node)
+
+    def signatures(self, queries):
+        """ Returns the signature of each query (see Executor.compile)
+        before they are executed. The signature of a query changes when
+        its text changes, when a relation used in it is modified or when
+        the signature of an assignment used in it changes, so two runs
+        with the same signature give the same result
+
+        :returns: An ordered dictionary (relation name: signature), the
+                  signature is None if some relation doesn't exist
+        """
+
+        signatures = OrderedDict()
+
+        def resolve(name):
+            if name in signatures:
+                if signatures[name] is None:
+                    return None
+                return ('assignment', signatures[name])
+            return self.relation_key(name)
+
+        for rname, query in queries.items():
+            signatures[rname] = self.key(query, resolve)
+        return signatures
+
+    def explain(self, queries, analyze=False):
+        """ Returns the plan of each query (see Executor.compile), with
+        *analyze* the queries are executed and each operator is measured
+        (see src.core.interpreter.explain). The relations and the cache
+        are not modified
+
+        :returns: An ordered dictionary (relation name: Operation object)
+        """
+
+        check = self.__check if self.interruptible else None
+        explainer = Explainer(dict(self.relations), analyze, check)
+        return explainer.explain_all(queries)
+
+    def run(self, tree):
+        """ Compiles and executes all the assignments of *tree*
+
+        :returns: An ordered dictionary (relation name: relation)
+        """
+
+        return OrderedDict(self.execute_all(self.compile(tree)))
+
+    def __profile(self, node, plan_node):
+        if self.interruptible:
+            plan_node = plan.Checkpoint(plan_node,
+                                        lambda rows: self.__check())
+        if not self.hooks:
+            return plan_node
+
+        def finished(rows, seconds):
+            for hook in self.hooks:
+                hook(node, rows, seconds)
+        return plan.Profile(plan_node, finished)
+
+    def visit_Compound(self, node):
+        return self.run(node)
+
+    def visit_Variable(self, node):
+        try:
+            relation = self.relations[node.value]
+        except KeyError:
+            raise NameError("name '{}' is not defined".format(node.value))
+        # The scans are not profiled, so the operators over them can use
+        # the relation directly
+        return plan.Scan(relation)
+
+    def visit_ProjectExpr(self, node):
+        expr = self.visit(node.expr)
+        attrs = [i.value for i in node.attrs]
+        return self.__profile(node, expr.project(*attrs))
+
+    def visit_SelectExpr(self, node):
+        expr = self.visit(node.expr)
+        condition = self.__python.visit(node.condition)
+        return self.__profile(node, expr.select(condition))
+
+    def visit_BinaryOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        operator = getattr(left, node.token.value)
+        return self.__profile(node, operator(right))
+
+    def visit_EquiJoinExpr(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        fields = [a for a, b in node.pairs]
+        other_fields = [b for a, b in node.pairs]
+        return self.__profile(node, left.equijoin(right, fields,
+                                                  other_fields))
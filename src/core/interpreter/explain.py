@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# EXPLAIN and EXPLAIN ANALYZE. The Explainer visits the (optimized) AST
+# of each assignment and builds the tree of its operators, with the
+# header of each one. With analyze the operators are executed too:
+#
+#   - the result of each operator is materialized before the next one
+#     starts (there is no pipeline), so the time and the memory of each
+#     operator don't include its children
+#   - the peak of the memory allocated by an operator (with its result)
+#     is measured with tracemalloc, started and stopped around each
+#     operator. The times include the overhead of tracemalloc. If
+#     tracemalloc was already started the peak can only be reset with
+#     Python 3.9+, with older versions the memory is unknown
+#
+# The plans are written as text or as dictionaries (JSON).
+
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from src.core import plan
+from src.core.relation import Relation
+from src.core.interpreter.parser import (
+    NodeVisitor,
+    Interpreter
+)
+
+
+class Operation(object):
+    """ An operator of the plan of an assignment
+
+    :param name: The operator: 'scan', 'select', 'project', 'njoin'...
+    :param detail: The relation of a scan, the condition of a select, the
+                   fields of a project...
+    :param children: The operations of the operands
+    """
+
+    def __init__(self, name, detail='', children=()):
+        self.name = name
+        self.detail = detail
+        self.children = list(children)
+        self.header = []
+        # These are known after EXPLAIN ANALYZE, the tuples of a scan are
+        # always known
+        self.rows = None
+        self.seconds = None
+        self.memory = None
+
+    @property
+    def rows_in(self):
+        """ The number of tuples read from the children, or None """
+
+        if not self.children:
+            return None
+        rows = [child.rows for child in self.children]
+        if None in rows:
+            return None
+        return sum(rows)
+
+    @property
+    def label(self):
+        if self.detail:
+            return "{0} {1}".format(self.name, self.detail)
+        return self.name
+
+    def as_dict(self):
+        return OrderedDict([
+            ('operator', self.name),
+            ('detail', self.detail),
+            ('header', self.header),
+            ('rows_in', self.rows_in),
+            ('rows', self.rows),
+            ('seconds', self.seconds),
+            ('memory', self.memory),
+            ('children', [child.as_dict() for child in self.children])
+        ])
+
+
+class Explainer(NodeVisitor):
+    """ Builds the plan of the assignments
+
+    :param relations: Dictionary with the relations, the results of the
+                      assignments are added to it
+    :param analyze: If it's True the operators are executed and measured
+    :param check: Optional function called before each operator and while
+                  the tuples are produced, it can stop the execution
+                  raising an exception (see Executor.cancel)
+    """
+
+    def __init__(self, relations, analyze=False, check=None):
+        self.relations = relations
+        self.analyze = analyze
+        self.check = check
+        # Results of the assignments that were not executed
+        self.__not_executed = set()
+        # The conditions are converted to Python expressions
+        self.__python = Interpreter(None)
+
+    def explain(self, rname, query):
+        """ Returns the plan (Operation object) of *query*, the result is
+        stored as *rname*. Without analyze the result is an empty
+        relation with the header """
+
+        operation, node = self.visit(query)
+        if isinstance(node, plan.Scan):
+            self.relations[rname] = node.relation
+        else:
+            new_relation = Relation(node.columnar)
+            new_relation.header = list(node.header)
+            self.relations[rname] = new_relation
+            self.__not_executed.add(rname)
+        return operation
+
+    def explain_all(self, queries):
+        """ Returns an ordered dictionary (relation name: Operation) with
+        the plan of each query (see Executor.compile) """
+
+        plans = OrderedDict()
+        for rname, query in queries.items():
+            plans[rname] = self.explain(rname, query)
+        return plans
+
+    def __measure(self, operation, function):
+        """ Calls *function* and stores its time and the peak of the
+        memory allocated in *operation*
+
+        :returns: The value returned by *function*
+        """
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+            current = 0
+        elif hasattr(tracemalloc, 'reset_peak'):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        else:
+            current = None
+        try:
+            start = time.perf_counter()
+            value = function()
+            operation.seconds = time.perf_counter() - start
+            if current is not None:
+                operation.memory = max(
+                    0, tracemalloc.get_traced_memory()[1] - current)
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        return value
+
+    def __run(self, operation, node):
+        """ Executes *node* if it's EXPLAIN ANALYZE
+
+        :returns: A tuple (operation, plan node)
+        """
+
+        operation.header = list(node.header)
+        if not self.analyze:
+            return operation, node
+        if self.check is not None:
+            self.check()
+            node = plan.Checkpoint(node, lambda rows: self.check())
+        new_relation = self.__measure(operation, node.materialize)
+        operation.rows = new_relation.cardinality()
+        # The next operator reads the result
+        return operation, plan.Scan(new_relation)
+
+    def visit_Variable(self, node):
+        try:
+            relation = self.relations[node.value]
+        except KeyError:
+            raise NameError("name '{}' is not defined".format(node.value))
+        operation = Operation('scan', node.value)
+        operation.header = list(relation.header)
+        if self.analyze:
+            # The time of the scan is the time spent reading the tuples
+            # of the relations that are not loaded (see src.core.lazy)
+            self.__measure(operation, lambda: relation.content)
+        if node.value not in self.__not_executed:
+            operation.rows = relation.cardinality()
+        return operation, plan.Scan(relation)
+
+    def visit_ProjectExpr(self, node):
+        child, expr = self.visit(node.expr)
+        attrs = [i.value for i in node.attrs]
+        return self.__run(Operation('project', ', '.join(attrs), [child]),
+                          expr.project(*attrs))
+
+    def visit_SelectExpr(self, node):
+        child, expr = self.visit(node.expr)
+        condition = self.__python.visit(node.condition)
+        return self.__run(Operation('select', condition, [child]),
+                          expr.select(condition))
+
+    def visit_BinaryOp(self, node):
+        left, left_node = self.visit(node.left)
+        right, right_node = self.visit(node.right)
+        operator = getattr(left_node, node.token.value)
+        return self.__run(Operation(node.token.value, '', [left, right]),
+                          operator(right_node))
+
+    def visit_EquiJoinExpr(self, node):
+        left, left_node = self.visit(node.left)
+        right, right_node = self.visit(node.right)
+        fields = [a for a, b in node.pairs]
+        other_fields = [b for a, b in node.pairs]
+        detail = ' and '.join('{0} = {1}'.format(a, b)
+                              for a, b in node.pairs)
+        return self.__run(Operation('equijoin', detail, [left, right]),
+                          left_node.equijoin(right_node, fields,
+                                             other_fields))
+
+
+def format_memory(size):
+    """ Returns the number of bytes *size* in B, KB, MB or GB """
+
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = 'GB'
+    if unit == 'B':
+        return "{0} {1}".format(size, unit)
+    return "{0:.1f} {1}".format(size, unit)
+
+
+def format_operation(operation, depth=0):
+    """ Returns the lines of the text of *operation* and its children """
+
+    details = []
+    if operation.rows_in is not None:
+        details.append("in={}".format(operation.rows_in))
+    if operation.rows is not None:
+        details.append("rows={}".format(operation.rows))
+    if operation.seconds is not None:
+        details.append("time={0:.3f} ms".format(operation.seconds * 1000))
+    if operation.memory is not None:
+        details.append("memory={}".format(format_memory(operation.memory)))
+    if operation.seconds is None:
+        details.append("fields={}".format(', '.join(operation.header)))
+    prefix = '  ' * depth + ('-> ' if depth else '')
+    lines = ["{0}{1}  ({2})".format(prefix, operation.label,
+                                    ', '.join(details))]
+    for child in operation.children:
+        lines.extend(format_operation(child, depth + 1))
+    return lines
+
+
+def format_text(plans):
+    """ Returns the text of the *plans* (see Explainer.explain_all) """
+
+    lines = []
+    for rname, operation in plans.items():
+        lines.append("{}:".format(rname))
+        lines.extend('  ' + line for line in format_operation(operation))
+    return '\n'.join(lines) + '\n'
+
+
+def as_dict(plans):
+    """ Returns the *plans* as an ordered dictionary that can be written
+    as JSON """
+
+    return OrderedDict((rname, operation.as_dict())
+                       for rname, operation in plans.items())
@@ -19,8 +19,17 @@
 
 # This module is responsible for organizing called "tokens" pieces,
 # each of these tokens has a meaning in language
+#
+# The tokens are recognized with one compiled regular expression, the
+# text is not visited one character at a time. Each line is split with
+# TOKEN_REGEX.findall into pairs (whitespace, token), the column of each
+# token is the sum of their lengths, the whitespace at the end of a line
+# has no token and it's skipped. Only the strings can have new lines, a
+# quote without end in its line is searched in the next lines.
 
 import re
+from collections import deque
+
 from src.core.interpreter.tokens import (
     ID,
     ASSIGNMENT,
@@ -52,19 +61,47 @@ IS_DATE = re.compile(
 # Formato HH:MM
 IS_TIME = re.compile(r'^[\d+]{2}:[\d+]{2}$')
 
+TOKEN_REGEX = re.compile(r"""
+    (\s*)                   # Whitespace before the token
+    ([^\W\d_]\w*            # Identifiers and keywords
+    | \d+(?:\.\d*)?         # Integers and reals
+    | '[^']*'               # Strings
+    | %.*                   # Comments
+    | :=|<>|<=|>=
+    | \S                    # Other symbols, quotes without end and
+                            # invalid characters
+    )""", re.VERBOSE)
+
+SYMBOLS = {
+    ':=': ASSIGNMENT,
+    '<>': NOTEQUAL,
+    '<=': LEQUAL,
+    '>=': GEQUAL,
+    '<': LESS,
+    '>': GREATER,
+    '=': EQUAL,
+    '(': LPAREN,
+    ')': RPAREN,
+    ',': SEMI,
+    ';': SEMICOLON
+}
+
 
 class Token(object):
     """ A Token is the kind of thing that Lexer returns.
     It holds:
     - The value of the token
     - The type of token that it is
+    - The line and the column where it starts
     """
 
-    __slots__ = ('type', 'value')
+    __slots__ = ('type', 'value', 'lineno', 'colno')
 
-    def __init__(self, type, value):
+    def __init__(self, type, value, lineno=None, colno=None):
         self.type = type
         self.value = value
+        self.lineno = lineno
+        self.colno = colno
 
     def __str__(self):
         """ Returns a representation of token. For example:
@@ -86,8 +123,8 @@ class Lexer(object):
     """ This is the first stage of analysys.
 
     The Lexer serves to break up the source text into chuncks, "tokens".
-    It calls the Scanner to get characters one at a time and organizes them
-    into token types.
+    It reads the text of the Scanner and organizes it into token types,
+    each token has its line and column.
 
     For example, if the source text is:
 
@@ -102,76 +139,97 @@ class Lexer(object):
     Token(IDENTIFIER, 'skills')
     """
 
-    __slots__ = ('sc', 'token')
+    __slots__ = ('sc', 'token', '_tokens', '_lookahead')
 
     def __init__(self, scanner):
         self.sc = scanner
         # Current token
         self.token = None
-
-    def _skip_whitespace(self):
-        while self.sc.char is not None and self.sc.char.isspace():
-            self.sc.next()
-
-    def _skip_comment(self):
-        while self.sc.char is not None and self.sc.char != '\n':
-            self.sc.next()
-        self.sc.next()
-
-    def _get_identifier_or_keyword(self):
-        """ Handle identifiers and reserved keywords """
-
-        var = ''
-        while self.sc.char is not None and not self.sc.char.isspace():
-            # Recognize identifiers like: query_1, query2323
-            # FIXME: improve this, regex?
-            if self.sc.char == '_':
-                var += '_'
-                self.sc.next()
-                continue
-            if self.sc.char.isdigit():
-                var += self.sc.char
-                self.sc.next()
+        self._tokens = self._tokenize(scanner.text, scanner.index)
+        # Tokens read by peek
+        self._lookahead = deque()
+
+    @staticmethod
+    def _string(string, lineno, colno):
+        """ Returns the token of the text of a string """
+
+        # Tengo la cadena, ahora compruebo si es una fecha o una hora
+        # (time)
+        if IS_DATE.match(string):
+            return Token(DATE, string, lineno, colno)
+        elif IS_TIME.match(string):
+            return Token(TIME, string, lineno, colno)
+        return Token(STRING, string, lineno, colno)
+
+    def _tokenize(self, text, index):
+        """ Generates the tokens of *text* from *index*. The errors are
+        raised when the wrong token is reached """
+
+        findall = TOKEN_REGEX.findall
+        symbols = SYMBOLS
+        keywords = KEYWORDS
+        length = len(text)
+        lineno = text.count('\n', 0, index) + 1
+        # Index of the first character of the line
+        line_start = text.rfind('\n', 0, index) + 1
+        # Index where the tokens of the line start
+        position = index
+        while True:
+            line_end = text.find('\n', position)
+            if line_end == -1:
+                line_end = length
+            colno = position - line_start + 1
+            for space, value in findall(text, position, line_end):
+                colno += len(space)
+                kind = symbols.get(value)
+                if kind is not None:
+                    yield Token(kind, value, lineno, colno)
+                elif value in keywords:
+                    yield Token(keywords[value], value, lineno, colno)
+                else:
+                    first = value[0]
+                    if first.isdecimal():
+                        if '.' in value:
+                            yield Token(REAL, float(value), lineno, colno)
+                        else:
+                            yield Token(INTEGER, int(value), lineno, colno)
+                    elif first.isalnum():
+                        yield Token(ID, value, lineno, colno)
+                    elif first == "'":
+                        if len(value) > 1:
+                            yield self._string(value[1:-1], lineno, colno)
+                        else:
+                            break
+                    elif first != '%':
+                        raise InvalidSyntaxError(lineno, colno, value)
+                colno += len(value)
+            else:
+                if line_end == length:
+                    break
+                lineno += 1
+                position = line_start = line_end + 1
                 continue
-            if not self.sc.char.isalpha():
-                break
-            var += self.sc.char
-            self.sc.next()
-
-        return var
-
-    def _get_number(self):
-        """ Returns a multidigit integer or float """
-
-        number = ''
-        while self.sc.char is not None and self.sc.char.isdigit():
-            number += self.sc.char
-            self.sc.next()
-
-        if self.sc.char == '.':
-            number += self.sc.char
-            self.sc.next()
-
-            while self.sc.char is not None and self.sc.char.isdigit():
-                number += self.sc.char
-                self.sc.next()
-
-            token = Token(REAL, float(number))
-        else:
-            token = Token(INTEGER, int(number))
-
-        return token
+            # The string continues in the next lines
+            start = line_start + colno - 1
+            end = text.find("'", start + 1)
+            if end == -1:
+                raise MissingQuoteError("Missing quote on line: {0}",
+                                        text.count('\n') + 1)
+            string = text[start + 1:end]
+            yield self._string(string, lineno, colno)
+            lineno += string.count('\n')
+            line_start = text.rfind('\n', start, end) + 1
+            position = end + 1
+        # EOF
+        while True:
+            yield Token(EOF, None, lineno, length - line_start + 1)
 
     def peek(self, n=1):
-        index = self.sc.index
-        col = self.sc.colno
-        line = self.sc.lineno
-        for i in range(n):
-            token = self.next_token()
-        self.sc.index = index
-        self.sc.colno = col
-        self.sc.lineno = line
-        return token
+        """ Returns the *n*-th next token without consuming it """
+
+        while len(self._lookahead) < n:
+            self._lookahead.append(next(self._tokens))
+        return self._lookahead[n - 1]
 
     def next_token(self):
         """ Lexical analyzer.
@@ -180,113 +238,11 @@ class Lexer(object):
         into tokens. One token at a time
         """
 
-        while self.sc.char is not None:
-            # Recognize identifiers and keywords
-            if self.sc.char.isalpha():
-                _id = self._get_identifier_or_keyword()
-                if _id in KEYWORDS:
-                    return Token(KEYWORDS[_id], _id)
-                return Token(ID, _id)
-
-            # Assignment
-            if self.sc.char == ':':
-                self.sc.next()
-                if self.sc.char == '=':
-                    self.sc.next()
-                    return Token(ASSIGNMENT, ':=')
-
-            # Ignore any whitespace characters
-            if self.sc.char.isspace():
-                self._skip_whitespace()
-                continue
-
-            # Comments inline
-            if self.sc.char == '%':
-                self._skip_comment()
-                continue
-
-            # Operators
-            # Less, not-equal and less-equal
-            if self.sc.char == '<':
-                self.sc.next()
-                if self.sc.char == '>':
-                    self.sc.next()
-                    return Token(NOTEQUAL, '<>')
-                elif self.sc.char == '=':
-                    self.sc.next()
-                    return Token(LEQUAL, '<=')
-                return Token(LESS, '<')
-
-            # Equal
-            if self.sc.char == '=':
-                self.sc.next()
-                return Token(EQUAL, '=')
-
-            # Greater and greater-equal
-            if self.sc.char == '>':
-                self.sc.next()
-                if self.sc.char == '=':
-                    self.sc.next()
-                    return Token(GEQUAL, '>=')
-                return Token(GREATER, '>')
-
-            # Semicolon
-            if self.sc.char == ';':
-                self.sc.next()
-                return Token(SEMICOLON, ';')
-
-            # Number
-            if self.sc.char.isdigit():
-                return self._get_number()
-
-            # Strings
-            if self.sc.char == "'":
-                self.sc.next()
-                string = ""
-
-                while True:
-                    if self.sc.char == "'":
-                        break
-                    try:
-                        string += self.sc.char
-                    except TypeError:
-                        raise MissingQuoteError(
-                            "Missing quote on line: {0}",
-                            self.sc.lineno
-                        )
-                    self.sc.next()
-
-                self.sc.next()
-                # Tengo la cadena, ahora compruebo si es una fecha o una
-                # hora (time)
-                if IS_DATE.match(string):
-                    return Token(DATE, string)
-                elif IS_TIME.match(string):
-                    return Token(TIME, string)
-                return Token(STRING, string)
-
-            if self.sc.char == '(':
-                self.sc.next()
-                return Token(LPAREN, '(')
-
-            # Right parenthesis
-            if self.sc.char == ')':
-                self.sc.next()
-                return Token(RPAREN, ')')
-
-            # Comma
-            if self.sc.char == ',':
-                self.sc.next()
-                return Token(SEMI, ',')
-
-            raise InvalidSyntaxError(
-                self.sc.lineno,
-                self.sc.colno,
-                self.sc.char
-            )
-
-        # EOF
-        return Token(EOF, None)
+        if self._lookahead:
+            self.token = self._lookahead.popleft()
+        else:
+            self.token = next(self._tokens)
+        return self.token
 
     def __str__(self):
         """ Returns a representation of token """
@@ -0,0 +1,561 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015-2017 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# This module rewrites the AST of a query before it's evaluated, applying
+# the classic rules of the relational algebra:
+#
+# - The selections are pushed below the natural joins, products and
+#   unions, so the tuples are filtered before they are combined. They are
+#   not pushed below a difference, an intersection or an outer join:
+#   the predicate would test tuples that the original query never tests
+#   (and that may not support the comparison).
+# - select a = b (R product S), with a in R and b in S, is converted to
+#   an equi-join, solved with a hash table instead of a product.
+# - The projections are pushed below the selections and joins, so the
+#   fields that are not used are removed as soon as possible.
+#
+# - The chains of natural joins and products (associative and
+#   commutative) are reordered with the statistics of the relations (see
+#   src.core.stats), so the smallest intermediate results are built first.
+#
+# The optimizer needs the header of the relations. When a header can't be
+# known (for example, the name of the relation is wrong) the node is not
+# modified, so the errors are the same that without optimization.
+
+from src.core.interpreter.tokens import (
+    ID,
+    EQUAL,
+    NJOIN,
+    PRODUCT,
+    LEFT_OUTER_JOIN,
+    RIGHT_OUTER_JOIN,
+    FULL_OUTER_JOIN,
+    UNION,
+    INTERSECT,
+    KEYWORDS
+)
+from src.core import stats
+from src.core.interpreter.lexer import Token
+from src.core.interpreter.parser import (
+    Variable,
+    Number,
+    String,
+    Date,
+    Time,
+    ProjectExpr,
+    SelectExpr,
+    BinaryOp,
+    EquiJoinExpr,
+    Condition,
+    BoolOp
+)
+
+JOINS = (NJOIN, LEFT_OUTER_JOIN, RIGHT_OUTER_JOIN, FULL_OUTER_JOIN)
+
+
+def _operator(node):
+    """ Returns the token type of a BinaryOp node """
+
+    return KEYWORDS.get(node.token.value)
+
+
+def _variable(name):
+    return Variable(Token(ID, name))
+
+
+def _attributes(condition):
+    """ Returns the field names used in a Condition """
+
+    return set(op.value for op in (condition.op1, condition.op2)
+               if isinstance(op, Variable))
+
+
+def _conjuncts(condition):
+    """ Splits a condition in the conditions joined with 'and'. If there
+    is some 'or' the condition can't be splitted """
+
+    if isinstance(condition, BoolOp):
+        if all(op == 'and' for op in condition.ops):
+            return list(condition.conditions)
+        return [condition]
+    return [condition]
+
+
+def _join_conditions(conditions):
+    """ Inverse of _conjuncts """
+
+    if len(conditions) == 1:
+        return conditions[0]
+    bool_op = BoolOp()
+    bool_op.conditions = list(conditions)
+    bool_op.ops = ['and'] * (len(conditions) - 1)
+    return bool_op
+
+
+def _condition_attributes(condition):
+    attrs = set()
+    for conjunct in _conjuncts(condition):
+        if isinstance(conjunct, BoolOp):
+            for c in conjunct.conditions:
+                attrs |= _attributes(c)
+        else:
+            attrs |= _attributes(conjunct)
+    return attrs
+
+
+def _select(conditions, expr):
+    if not conditions:
+        return expr
+    return SelectExpr(_join_conditions(conditions), expr)
+
+
+def _constant(node):
+    """ Returns the value of a constant of a condition, or None """
+
+    if isinstance(node, Number):
+        return node.num
+    if isinstance(node, String):
+        return node.string
+    if isinstance(node, Date):
+        return node.date
+    if isinstance(node, Time):
+        return node.time
+    return None
+
+
+# The comparison operator seen from the other side: c < a is a > c
+MIRROR = {'<': '>', '>': '<', '<=': '>=', '>=': '<=', '=': '=', '<>': '<>'}
+
+
+class Optimizer(object):
+    """ Rule based optimizer
+
+    :param schemas: Dictionary with the headers of the relations, it's
+                    updated with the assignments (see Optimizer.assign)
+    :param statistics: Optional dictionary with the Statistics of the
+                       relations, used to reorder the joins
+    """
+
+    def __init__(self, schemas=None, statistics=None):
+        if schemas is None:
+            schemas = {}
+        if statistics is None:
+            statistics = {}
+        self.schemas = dict(schemas)
+        self.statistics = dict(statistics)
+
+    def assign(self, name, node):
+        """ Registers the header (and the estimated statistics) of the
+        result of an assignment """
+
+        header = self.header(node)
+        if header is not None:
+            self.schemas[name] = header
+        estimation = self.estimate(node)
+        if estimation is not None:
+            self.statistics[name] = estimation
+        else:
+            self.statistics.pop(name, None)
+
+    def optimize(self, node):
+        """ Returns the optimized version of *node* """
+
+        node = self.push_selections(node)
+        node = self.reorder_joins(node)
+        node = self.push_projections(node)
+        return node
+
+    def header(self, node):
+        """ Returns the header of the result of *node*, or None if it
+        can't be known """
+
+        if isinstance(node, Variable):
+            return self.schemas.get(node.value)
+        if isinstance(node, SelectExpr):
+            return self.header(node.expr)
+        if isinstance(node, ProjectExpr):
+            header = self.header(node.expr)
+            attrs = [attr.value for attr in node.attrs]
+            if header is None or not set(attrs).issubset(header):
+                return None
+            return attrs
+        if isinstance(node, EquiJoinExpr):
+            left, right = self.header(node.left), self.header(node.right)
+            if left is None or right is None:
+                return None
+            return left + right
+        if isinstance(node, BinaryOp):
+            left, right = self.header(node.left), self.header(node.right)
+            if left is None or right is None:
+                return None
+            op = _operator(node)
+            if op == PRODUCT:
+                return left + right
+            if op in JOINS:
+                return left + [i for i in right if i not in left]
+            return left
+        return None
+
+    # Selections
+
+    def push_selections(self, node):
+        if isinstance(node, SelectExpr):
+            expr = self.push_selections(node.expr)
+            return self._push_conditions(_conjuncts(node.condition), expr)
+        if isinstance(node, ProjectExpr):
+            return ProjectExpr(node.attrs, self.push_selections(node.expr))
+        if isinstance(node, BinaryOp):
+            return BinaryOp(self.push_selections(node.left), node.token,
+                            self.push_selections(node.right))
+        return node
+
+    def _push_conditions(self, conditions, node):
+        """ Places the *conditions* (joined with 'and') over *node*, as
+        deep as possible """
+
+        if isinstance(node, SelectExpr):
+            # Both selections are merged
+            return self._push_conditions(
+                conditions + _conjuncts(node.condition), node.expr)
+        if not isinstance(node, (BinaryOp, EquiJoinExpr)):
+            return _select(conditions, node)
+        left_header = self.header(node.left)
+        right_header = self.header(node.right)
+        if left_header is None or right_header is None:
+            return _select(conditions, node)
+        if isinstance(node, EquiJoinExpr):
+            op = PRODUCT
+        else:
+            op = _operator(node)
+        if op == PRODUCT and set(left_header) & set(right_header):
+            # The product fails with duplicate field names, don't change it
+            return _select(conditions, node)
+
+        left, right, top = [], [], []
+        pairs = []
+        for condition in conditions:
+            attrs = _condition_attributes(condition)
+            in_left = bool(attrs) and attrs.issubset(left_header)
+            in_right = bool(attrs) and attrs.issubset(right_header)
+            if op == UNION and in_left and in_right:
+                # The selection is distributive over the union
+                left.append(condition)
+                right.append(condition)
+            elif op in (PRODUCT, NJOIN) and (in_left or in_right):
+                if in_left:
+                    left.append(condition)
+                if in_right:
+                    right.append(condition)
+            elif op == PRODUCT and self._is_equality(
+                    condition, left_header, right_header):
+                op1, op2 = condition.op1.value, condition.op2.value
+                if op1 in left_header:
+                    pairs.append((op1, op2))
+                else:
+                    pairs.append((op2, op1))
+            else:
+                top.append(condition)
+
+        new_left = self._push_conditions(left, node.left)
+        new_right = self._push_conditions(right, node.right)
+        if isinstance(node, EquiJoinExpr):
+            new_node = EquiJoinExpr(new_left, new_right,
+                                    node.pairs + pairs)
+        elif pairs:
+            new_node = EquiJoinExpr(new_left, new_right, pairs)
+        else:
+            new_node = BinaryOp(new_left, node.token, new_right)
+        return _select(top, new_node)
+
+    @staticmethod
+    def _is_equality(condition, left_header, right_header):
+        """ Returns True if *condition* compares for equality a field of
+        the left side with a field of the right side """
+
+        if not isinstance(condition, Condition):
+            return False
+        if condition.operator.type != EQUAL:
+            return False
+        op1, op2 = condition.op1, condition.op2
+        if not isinstance(op1, Variable) or not isinstance(op2, Variable):
+            return False
+        return ((op1.value in left_header and op2.value in right_header) or
+                (op2.value in left_header and op1.value in right_header))
+
+    # Projections
+
+    def push_projections(self, node):
+        if isinstance(node, ProjectExpr):
+            needed = set(attr.value for attr in node.attrs)
+            if self.header(node) is None:
+                return ProjectExpr(node.attrs,
+                                   self.push_projections(node.expr))
+            return ProjectExpr(node.attrs, self._prune(node.expr, needed))
+        if isinstance(node, SelectExpr):
+            return SelectExpr(node.condition,
+                              self.push_projections(node.expr))
+        if isinstance(node, BinaryOp):
+            return BinaryOp(self.push_projections(node.left), node.token,
+                            self.push_projections(node.right))
+        if isinstance(node, EquiJoinExpr):
+            return EquiJoinExpr(self.push_projections(node.left),
+                                self.push_projections(node.right),
+                                node.pairs)
+        return node
+
+    def _prune(self, node, needed):
+        """ Pushes the projection of the fields *needed* into *node* """
+
+        if isinstance(node, ProjectExpr):
+            return self.push_projections(node)
+        if isinstance(node, SelectExpr):
+            needed = needed | _condition_attributes(node.condition)
+            return SelectExpr(node.condition, self._prune(node.expr, needed))
+        if isinstance(node, EquiJoinExpr):
+            left_needed = needed | set(a for a, b in node.pairs)
+            right_needed = needed | set(b for a, b in node.pairs)
+            return EquiJoinExpr(self._narrow(node.left, left_needed),
+                                self._narrow(node.right, right_needed),
+                                node.pairs)
+        # The full outer join is not included, it's built with an union
+        # and removing fields could join tuples that are different
+        if isinstance(node, BinaryOp) and _operator(node) in (
+                PRODUCT, NJOIN, LEFT_OUTER_JOIN, RIGHT_OUTER_JOIN):
+            left_header = self.header(node.left)
+            right_header = self.header(node.right)
+            if left_header is None or right_header is None:
+                return self.push_projections(node)
+            shared = set(left_header) & set(right_header)
+            if _operator(node) == PRODUCT and shared:
+                return self.push_projections(node)
+            return BinaryOp(self._narrow(node.left, needed | shared),
+                            node.token,
+                            self._narrow(node.right, needed | shared))
+        return self.push_projections(node)
+
+    def _narrow(self, node, needed):
+        """ Like _prune, but also removes the fields of the result of
+        *node* that are not *needed* """
+
+        node = self._prune(node, needed)
+        header = self.header(node)
+        if header is None or set(header).issubset(needed):
+            return node
+        attrs = [_variable(i) for i in header if i in needed]
+        if not attrs:
+            return node
+        return ProjectExpr(attrs, node)
+
+    # Join ordering
+
+    def estimate(self, node):
+        """ Returns the estimated Statistics of the result of *node*, or
+        None if they can't be estimated """
+
+        if isinstance(node, Variable):
+            return self.statistics.get(node.value)
+        if isinstance(node, SelectExpr):
+            estimation = self.estimate(node.expr)
+            if estimation is None:
+                return None
+            fraction = self._selectivity(node.condition, estimation)
+            return estimation.scale(estimation.cardinality * fraction)
+        if isinstance(node, ProjectExpr):
+            estimation = self.estimate(node.expr)
+            if estimation is None:
+                return None
+            return estimation.scale(estimation.cardinality,
+                                    [attr.value for attr in node.attrs])
+        if isinstance(node, EquiJoinExpr):
+            left, right = self.estimate(node.left), self.estimate(node.right)
+            if left is None or right is None:
+                return None
+            return stats.join(left, right, node.pairs)
+        if isinstance(node, BinaryOp):
+            left, right = self.estimate(node.left), self.estimate(node.right)
+            if left is None or right is None:
+                return None
+            op = _operator(node)
+            if op in (PRODUCT,) + JOINS:
+                left_header = self.header(node.left)
+                right_header = self.header(node.right)
+                if left_header is None or right_header is None:
+                    return None
+                shared = [(i, i) for i in left_header if i in right_header]
+                if op == PRODUCT:
+                    shared = []
+                joined = stats.join(left, right, shared)
+                if op == LEFT_OUTER_JOIN:
+                    return joined.scale(max(joined.cardinality,
+                                            left.cardinality))
+                if op == RIGHT_OUTER_JOIN:
+                    return joined.scale(max(joined.cardinality,
+                                            right.cardinality))
+                if op == FULL_OUTER_JOIN:
+                    return joined.scale(max(joined.cardinality,
+                                            left.cardinality +
+                                            right.cardinality))
+                return joined
+            if op == UNION:
+                return left.scale(left.cardinality + right.cardinality)
+            if op == INTERSECT:
+                return left.scale(min(left.cardinality, right.cardinality))
+            return left
+        return None
+
+    def _selectivity(self, condition, estimation):
+        if isinstance(condition, BoolOp):
+            fraction = self._selectivity(condition.conditions[0], estimation)
+            for op, other in zip(condition.ops, condition.conditions[1:]):
+                other = self._selectivity(other, estimation)
+                if op == 'and':
+                    fraction *= other
+                else:
+                    fraction = fraction + other - fraction * other
+            return fraction
+        operator = condition.operator.value
+        op1, op2 = condition.op1, condition.op2
+        if isinstance(op1, Variable) and isinstance(op2, Variable):
+            if operator == '=':
+                return 1 / max(estimation.distinct_values(op1.value),
+                               estimation.distinct_values(op2.value))
+            return stats.DEFAULT_SELECTIVITY
+        if not isinstance(op1, Variable):
+            op1, op2 = op2, op1
+            operator = MIRROR.get(operator, operator)
+        if not isinstance(op1, Variable):
+            return stats.DEFAULT_SELECTIVITY
+        return stats.selectivity(estimation, op1.value, operator,
+                                 _constant(op2))
+
+    def reorder_joins(self, node):
+        """ Reorders the chains of natural joins and products of *node*
+        when the estimated cost (the sum of the sizes of the intermediate
+        results) is lower """
+
+        if isinstance(node, SelectExpr):
+            return SelectExpr(node.condition, self.reorder_joins(node.expr))
+        if isinstance(node, ProjectExpr):
+            return ProjectExpr(node.attrs, self.reorder_joins(node.expr))
+        if isinstance(node, EquiJoinExpr):
+            return EquiJoinExpr(self.reorder_joins(node.left),
+                                self.reorder_joins(node.right), node.pairs)
+        if not isinstance(node, BinaryOp):
+            return node
+        if self._is_chain(node):
+            leaves = [self.reorder_joins(leaf) for leaf in self._leaves(node)]
+            if len(leaves) > 2:
+                return self._order_chain(node, leaves)
+        return BinaryOp(self.reorder_joins(node.left), node.token,
+                        self.reorder_joins(node.right))
+
+    def _is_chain(self, node):
+        """ Returns True if *node* is a natural join or a valid product
+        (without duplicate field names) """
+
+        if not isinstance(node, BinaryOp):
+            return False
+        op = _operator(node)
+        if op == NJOIN:
+            return True
+        if op == PRODUCT:
+            left, right = self.header(node.left), self.header(node.right)
+            return (left is not None and right is not None and
+                    not set(left) & set(right))
+        return False
+
+    def _leaves(self, node):
+        if not self._is_chain(node):
+            return [node]
+        return self._leaves(node.left) + self._leaves(node.right)
+
+    def _replace_leaves(self, node, leaves):
+        """ Returns the chain *node* with the same order but the leaves
+        taken from the iterator *leaves* """
+
+        if not self._is_chain(node):
+            return next(leaves)
+        left = self._replace_leaves(node.left, leaves)
+        right = self._replace_leaves(node.right, leaves)
+        return BinaryOp(left, node.token, right)
+
+    def _join(self, left, right):
+        """ Returns the node that joins *left* and *right* (natural join,
+        or product if they don't have shared fields) """
+
+        left_header, right_header = self.header(left), self.header(right)
+        if set(left_header) & set(right_header):
+            return BinaryOp(left, Token(NJOIN, 'njoin'), right)
+        return BinaryOp(left, Token(PRODUCT, 'product'), right)
+
+    def _cost(self, node):
+        """ Sum of the estimated sizes of the joins of a chain """
+
+        if not self._is_chain(node):
+            return 0
+        return (self._cost(node.left) + self._cost(node.right) +
+                self.estimate(node).cardinality)
+
+    def _order_chain(self, node, leaves):
+        header = self.header(node)
+        if header is None or any(self.header(leaf) is None or
+                                 self.estimate(leaf) is None
+                                 for leaf in leaves):
+            return self._replace_leaves(node, iter(leaves))
+
+        # Greedy: starts with the smallest join of two relations and adds
+        # the relation that gives the smallest intermediate result
+        pending = list(range(len(leaves)))
+        best = None
+        for i in pending:
+            for j in pending:
+                if i < j:
+                    joined = self._join(leaves[i], leaves[j])
+                    size = self.estimate(joined).cardinality
+                    if best is None or size < best[0]:
+                        best = (size, i, j)
+        size, i, j = best
+        pending.remove(i)
+        pending.remove(j)
+        current = self._smaller_right(leaves[i], leaves[j])
+        while pending:
+            best = None
+            for k in pending:
+                size = self.estimate(
+                    self._join(current, leaves[k])).cardinality
+                if best is None or size < best[0]:
+                    best = (size, k)
+            pending.remove(best[1])
+            current = self._smaller_right(current, leaves[best[1]])
+
+        if self._cost(current) >= self._cost(node):
+            return self._replace_leaves(node, iter(leaves))
+        if self.header(current) != header:
+            # The fields are returned in the original order
+            current = ProjectExpr([_variable(i) for i in header], current)
+        return current
+
+    def _smaller_right(self, left, right):
+        """ Joins *left* and *right* with the smallest one at right, the
+        side used to build the hash table """
+
+        if (self.estimate(right).cardinality >
+                self.estimate(left).cardinality):
+            left, right = right, left
+        return self._join(left, right)
@@ -119,6 +119,17 @@ class BinaryOp(AST):
         self.right = right
 
 
+class EquiJoinExpr(AST):
+    """ Product of two expressions restricted to equal values in pairs of
+    fields (left field, right field). The Parser doesn't create it, it's
+    created by the optimizer """
+
+    def __init__(self, left, right, pairs):
+        self.left = left
+        self.right = right
+        self.pairs = pairs
+
+
 class Condition(AST):
 
     def __init__(self, op1, operator, op2):
@@ -171,8 +182,8 @@ class Parser(object):
                 "but '{1}' found, Line: {2}, Col: {3}".format(
                     token_type,
                     self.token.type,
-                    self.lexer.sc.lineno,
-                    self.lexer.sc.colno
+                    self.token.lineno,
+                    self.token.colno
                 ))
 
     def parse(self):
@@ -492,8 +503,23 @@ class Interpreter(NodeVisitor):
     # value: query
     SCOPE = OrderedDict()
 
-    def __init__(self, parser):
+    def __init__(self, parser, schemas=None, statistics=None):
+        """
+        :param parser: Parser object
+        :param schemas: Optional dictionary with the headers of the
+                        relations, if it's provided the queries are
+                        optimized before they are converted
+        :param statistics: Optional dictionary with the statistics of the
+                           relations (see src.core.stats), used to order
+                           the joins
+        """
+
         self.parser = parser
+        self.optimizer = None
+        if schemas is not None:
+            # The optimizer module imports the AST nodes of this module
+            from src.core.interpreter import optimizer
+            self.optimizer = optimizer.Optimizer(schemas, statistics)
 
     def to_python(self):
         tree = self.parser.parse()
@@ -506,8 +532,12 @@ class Interpreter(NodeVisitor):
     def visit_Assignment(self, node):
         rname = self.visit(node.rname)
         if rname in self.SCOPE:
-            raise DuplicateRelationNameError(self.parser.lexer.sc.lineno)
-        self.SCOPE[rname] = self.visit(node.query)
+            raise DuplicateRelationNameError(node.rname.token.lineno)
+        query = node.query
+        if self.optimizer is not None:
+            query = self.optimizer.optimize(query)
+            self.optimizer.assign(rname, query)
+        self.SCOPE[rname] = self.visit(query)
 
     def visit_BinaryOp(self, node):
         left = self.visit(node.left)
@@ -518,6 +548,16 @@ class Interpreter(NodeVisitor):
             right
         )
 
+    def visit_EquiJoinExpr(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        return '{0}.equijoin({1}, {2!r}, {3!r})'.format(
+            left,
+            right,
+            [a for a, b in node.pairs],
+            [b for a, b in node.pairs]
+        )
+
     def visit_Number(self, node):
         return node.num
 
@@ -539,7 +579,15 @@ class Interpreter(NodeVisitor):
         )
 
     def visit_BoolOp(self, node):
-        conditions = " \"{}\" ".join([self.visit(c) for c in node.conditions])
+        # The optimizer merges selections nesting BoolOps, the inner ones
+        # go between parentheses to keep their precedence
+        conditions = []
+        for condition in node.conditions:
+            if isinstance(condition, BoolOp):
+                conditions.append('({})'.format(self.visit(condition)))
+            else:
+                conditions.append(self.visit(condition))
+        conditions = " \"{}\" ".join(conditions)
         return conditions.format(*node.ops).replace("\"", '')
 
     def visit_Condition(self, node):
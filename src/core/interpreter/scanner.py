@@ -31,6 +31,10 @@ class Scanner(object):
         self.lineno = 1
         self.colno = 1
 
+    @property
+    def text(self):
+        return self._text
+
     @property
     def char(self):
         """ Returns a character in the current index """
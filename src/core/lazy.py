@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Relations that are read from the database file when their tuples are
+# used. When a database is opened only the index of its relations is
+# built (the name, the header, the number of tuples and the position in
+# the file of each one), the region of a relation is mapped and parsed
+# the first time that an operator or the Model reads its content.
+#
+# The index of a .pdbx file is stored in the file (see src.core.pdbx),
+# the index of a .pdb file is stored next to it (see src.core.pdb_index).
+# When that index is not valid the .pdb file is scanned without parsing
+# the values: the lines of each relation are counted, a line inside a
+# quoted value (odd number of quotes before it) is not a new tuple.
+
+import io
+import os
+import mmap
+import threading
+from collections import OrderedDict
+
+from src.core import (
+    file_manager,
+    pdbx,
+    pdb_index
+)
+from src.core.relation import Relation
+
+
+class LazyRelation(Relation):
+    """ Relation whose content is built by *loader* when it's read
+
+    :param header: The header of the relation
+    :param cardinality: The number of tuples, it's used until the content
+                        is read
+    :param loader: Function that returns a Relation with the content
+    """
+
+    def __init__(self, header, cardinality, loader, columnar=False):
+        self.__lock = threading.Lock()
+        self.__loader = None
+        Relation.__init__(self, columnar)
+        self.header = header
+        self.__cardinality = cardinality
+        self.__loader = loader
+
+    @property
+    def loaded(self):
+        """ True if the content was read """
+
+        return self.__loader is None
+
+    @property
+    def content(self):
+        if self.__loader is not None:
+            # The content can be read by the thread of the queries and
+            # by the interface at the same time
+            with self.__lock:
+                if self.__loader is not None:
+                    relation = self.__loader()
+                    # Los valores se castean una sola vez
+                    relation.infer_types()
+                    self.__content = relation.content
+                    self.__loader = None
+        return self.__content
+
+    @content.setter
+    def content(self, content):
+        self.__content = content
+        self.__loader = None
+
+    def cardinality(self):
+        if self.__loader is not None:
+            return self.__cardinality
+        return Relation.cardinality(self)
+
+
+def _check(filename, status):
+    """ Raises an exception if the file was modified after *status* """
+
+    current = os.stat(filename)
+    if (current.st_size, current.st_mtime_ns) != status:
+        raise Exception("The database file {} was modified".format(
+            filename))
+
+
+def _status(filename):
+    status = os.stat(filename)
+    return status.st_size, status.st_mtime_ns
+
+
+def scan_database(filename):
+    """ Builds the index of a .pdb file without parsing the values
+
+    :returns: A list of dictionaries with the name, the header, the
+              cardinality, the offset and the length (in bytes) of each
+              relation (see pdb_index)
+    """
+
+    sections = []
+    section = None
+    offset = 0
+    quoted = False
+    with open(filename, 'rb',
+              buffering=file_manager.READ_BUFFER_SIZE) as _file:
+        for line_count, line in enumerate(_file, 1):
+            if line.startswith(b'@'):
+                if section is not None:
+                    section['length'] = offset - section['offset']
+                name, header = file_manager.parse_header(
+                    line.decode(file_manager.ENCODING), line_count)
+                offset += len(line)
+                section = {'name': name, 'header': header,
+                           'cardinality': 0, 'offset': offset}
+                sections.append(section)
+                quoted = False
+                continue
+            offset += len(line)
+            if not quoted and line.rstrip(b'\r\n'):
+                if section is None:
+                    raise Exception("Invalid syntax at line {}".format(
+                        line_count))
+                section['cardinality'] += 1
+            if line.count(b'"') % 2:
+                quoted = not quoted
+    if section is not None:
+        section['length'] = offset - section['offset']
+    return sections
+
+
+def _pdb_loader(filename, status, section, columnar):
+
+    def load():
+        _check(filename, status)
+        relation = Relation(columnar)
+        relation.header = section['header']
+        if not section['length']:
+            return relation
+        start = section['offset']
+        with open(filename, 'rb') as _file:
+            with mmap.mmap(_file.fileno(), 0,
+                           access=mmap.ACCESS_READ) as mapped:
+                data = mapped[start:start + section['length']]
+        lines = io.StringIO(data.decode(file_manager.ENCODING), newline='')
+        file_manager.insert_tuples(relation, lines)
+        return relation
+    return load
+
+
+def _pdbx_loader(filename, status, item, columnar):
+
+    def load():
+        _check(filename, status)
+        with open(filename, 'rb') as _file:
+            with mmap.mmap(_file.fileno(), 0,
+                           access=mmap.ACCESS_READ) as mapped:
+                return pdbx.read_relation(mapped, item, columnar)
+    return load
+
+
+def open_database(filename, columnar=False):
+    """ Opens the database *filename* (.pdb or .pdbx), only the index of
+    the relations is read
+
+    :returns: An ordered dictionary (relation name: LazyRelation object)
+    """
+
+    status = _status(filename)
+    relations = OrderedDict()
+    if file_manager.get_extension(filename) == pdbx.EXTENSION:
+        with open(filename, 'rb') as _file:
+            with mmap.mmap(_file.fileno(), 0,
+                           access=mmap.ACCESS_READ) as mapped:
+                index = pdbx.read_index(mapped)
+        for item in index['relations']:
+            loader = _pdbx_loader(filename, status, item, columnar)
+            relations[item['name']] = LazyRelation(
+                item['header'], item['cardinality'], loader, columnar)
+        return relations
+    # The file is scanned only if its index is not valid. The index is
+    # only written when the database is saved (see file_manager)
+    sections = pdb_index.read_index(filename)
+    if sections is None:
+        sections = scan_database(filename)
+    for section in sections:
+        loader = _pdb_loader(filename, status, section, columnar)
+        relations[section['name']] = LazyRelation(
+            section['header'], section['cardinality'], loader, columnar)
+    return relations
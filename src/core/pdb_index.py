@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Index of the relations of a .pdb file, stored next to it (database.pdb
+# -> database.pdb.idx). It has the name, the header, the number of tuples
+# and the position in the file of each relation, so the file is not
+# scanned when it's opened (see src.core.lazy).
+#
+# The index is only written when the database is saved, opening a
+# database never writes files. It's valid while the size, the
+# modification time and the hash of the beginning and the end of the
+# .pdb file are the same, otherwise the file is scanned in memory.
+
+import os
+import json
+import hashlib
+
+INDEX_EXTENSION = '.idx'
+VERSION = 1
+
+# Bytes of the beginning and the end of the file used in the hash
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def index_filename(filename):
+    return filename + INDEX_EXTENSION
+
+
+def fingerprint(filename):
+    """ Returns a dictionary that identifies the content of *filename*
+    without reading the whole file """
+
+    status = os.stat(filename)
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as _file:
+        digest.update(_file.read(HASH_BLOCK_SIZE))
+        if status.st_size > HASH_BLOCK_SIZE:
+            _file.seek(max(HASH_BLOCK_SIZE,
+                           status.st_size - HASH_BLOCK_SIZE))
+            digest.update(_file.read())
+    return {'size': status.st_size, 'mtime_ns': status.st_mtime_ns,
+            'hash': digest.hexdigest()}
+
+
+def write_index(filename, sections):
+    """ Writes the index of the .pdb file *filename*
+
+    :param sections: List of dictionaries with the name, the header, the
+                     cardinality, the offset and the length (in bytes) of
+                     each relation
+    """
+
+    index = {'version': VERSION, 'file': fingerprint(filename),
+             'relations': sections}
+    path = index_filename(filename)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as _file:
+        json.dump(index, _file)
+    os.replace(temp_path, path)
+
+
+def read_index(filename):
+    """ Returns the sections of the index of *filename* (see
+    write_index), or None if the index doesn't exist or it's not valid """
+
+    try:
+        with open(index_filename(filename), encoding='utf-8') as _file:
+            index = json.load(_file)
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(index, dict) or
+            index.get('version') != VERSION or
+            index.get('file') != fingerprint(filename)):
+        return None
+    return index['relations']
+
+
+def remove_index(filename):
+    try:
+        os.remove(index_filename(filename))
+    except OSError:
+        pass
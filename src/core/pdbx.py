@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Binary database format (.pdbx). Each field of a relation is stored
+# dictionary encoded, like the columnar storage (see src.core.columnar):
+#
+#   MAGIC VERSION
+#   for each column: values block, typed block (optional), codes block
+#   index
+#   index offset, index length, MAGIC
+#
+# The values block is a JSON list with the distinct strings of the
+# column, the codes block is the array of codes and the typed block is
+# an array with the casted values when the field is int or float. The
+# index (JSON) has the name, the header, the cardinality and the offsets
+# of the blocks of each relation. The file is memory mapped when it's
+# read, the codes are copied to the arrays without parsing the values.
+#
+# The arrays are written in little endian with the standard sizes of
+# struct (4 bytes the codes, 8 bytes the ints and the floats), so the
+# file doesn't depend on the platform. They are converted with struct
+# only when the native arrays are different.
+
+import sys
+import json
+import mmap
+import struct
+from array import array
+from collections import OrderedDict
+
+from src.core import (
+    rtypes,
+    serialize
+)
+from src.core.columnar import CODE_TYPE
+
+EXTENSION = '.pdbx'
+
+MAGIC = b'PDBX'
+VERSION = 2
+
+_START = struct.Struct('<4sH')
+_END = struct.Struct('<QQ4s')
+
+# Type code of the typed blocks
+TYPED_ARRAYS = {
+    int: 'q',
+    float: 'd'
+}
+
+
+def type_name(type_):
+    """ Returns the name of a type returned by rtypes.infer_type """
+
+    if type_ is None:
+        return 'mixed'
+    return type_.__name__
+
+
+def _to_bytes(values):
+    """ Returns the bytes of the array *values* in the format of the
+    file """
+
+    typecode = values.typecode
+    if (sys.byteorder == 'little' and
+            values.itemsize == struct.calcsize('<' + typecode)):
+        return values.tobytes()
+    return struct.pack('<{0}{1}'.format(len(values), typecode), *values)
+
+
+def _from_bytes(typecode, data):
+    """ Inverse of _to_bytes, returns an array of *typecode* """
+
+    size = struct.calcsize('<' + typecode)
+    values = array(typecode)
+    if sys.byteorder == 'little' and values.itemsize == size:
+        values.frombytes(data)
+        return values
+    return array(typecode, struct.unpack(
+        '<{0}{1}'.format(len(data) // size, typecode), data))
+
+
+def _typed_block(values):
+    """ Returns (type name, array) of the casted *values*, the array is
+    None if the type doesn't have a typed block """
+
+    typed = list(map(rtypes.cast, values))
+    type_ = rtypes.infer_type(typed)
+    typecode = TYPED_ARRAYS.get(type_)
+    # The ints of a float field are not converted
+    if typecode is None or len(set(map(type, typed))) != 1:
+        return type_name(type_), None
+    try:
+        return type_name(type_), array(typecode, typed)
+    except OverflowError:
+        return type_name(type_), None
+
+
+def write_relations(stream, relations):
+    """ Writes the *relations* in the binary *stream*
+
+    :param relations: Dictionary with relations (Relation Object)
+    """
+
+    stream.write(_START.pack(MAGIC, VERSION))
+    position = _START.size
+
+    def block(data):
+        nonlocal position
+        stream.write(data)
+        offset = position
+        position += len(data)
+        return [offset, len(data)]
+
+    index = {'relations': []}
+    for relation_name, relation in relations.items():
+        header, columnar, cardinality, packed = serialize.pack(relation)
+        columns = []
+        for values, data in packed:
+            name, typed = _typed_block(values)
+            codes = array(CODE_TYPE)
+            codes.frombytes(data)
+            columns.append({
+                'type': name,
+                'values': block(json.dumps(values).encode('utf-8')),
+                'typed': None if typed is None else [
+                    typed.typecode, block(_to_bytes(typed))],
+                'codes': block(_to_bytes(codes))
+            })
+        index['relations'].append({
+            'name': relation_name,
+            'header': header,
+            'cardinality': cardinality,
+            'columns': columns
+        })
+    data = json.dumps(index).encode('utf-8')
+    stream.write(data)
+    stream.write(_END.pack(position, len(data), MAGIC))
+
+
+def read_index(mapped):
+    """ Returns the index of the file mapped in *mapped* """
+
+    if len(mapped) < _START.size + _END.size:
+        raise Exception("Invalid database file")
+    magic, version = _START.unpack_from(mapped, 0)
+    offset, length, end_magic = _END.unpack_from(
+        mapped, len(mapped) - _END.size)
+    if magic != MAGIC or end_magic != MAGIC:
+        raise Exception("Invalid database file")
+    if version != VERSION:
+        raise Exception("Unsupported database version: {}".format(version))
+    return json.loads(mapped[offset:offset + length].decode('utf-8'))
+
+
+def read_relation(mapped, item, columnar=False):
+    """ Builds the relation described by *item*, an element of the
+    relations of the index """
+
+    packed = []
+    typed = []
+    for column in item['columns']:
+        offset, length = column['values']
+        values = json.loads(mapped[offset:offset + length].decode('utf-8'))
+        offset, length = column['codes']
+        codes = _from_bytes(CODE_TYPE, mapped[offset:offset + length])
+        packed.append((values, codes.tobytes()))
+        if column['typed'] is None:
+            typed.append(None)
+        else:
+            typecode, (offset, length) = column['typed']
+            typed.append(list(_from_bytes(
+                typecode, mapped[offset:offset + length])))
+    relation = serialize.unpack(
+        (item['header'], columnar, item['cardinality'], packed))
+    if columnar:
+        # The values are not casted again
+        for column, values in zip(relation.content.columns, typed):
+            if values is not None:
+                column.dictionary.set_typed(values)
+    return relation
+
+
+def read_database(filename, columnar=False):
+    """ Reads a .pdbx file
+
+    :param filename: Filename path
+    :param columnar: Storage of the relations (see Relation)
+    :returns: An ordered dictionary (relation name: Relation object)
+    """
+
+    relations = OrderedDict()
+    with open(filename, 'rb') as _file:
+        with mmap.mmap(_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            index = read_index(mapped)
+            for item in index['relations']:
+                relations[item['name']] = read_relation(mapped, item,
+                                                        columnar)
+    return relations
@@ -17,26 +17,20 @@
 # You should have received a copy of the GNU General Public License
 # along with Pireal; If not, see <http://www.gnu.org/licenses/>.
 
+# The files of the databases and the queries. It only uses the files of
+# Python (there is no PyQt5 here), so it can be used without the
+# interface.
+
 import os
 
-from PyQt5.QtCore import (
-    QObject,
-    pyqtSignal,
-    QFile,
-    QTextStream,
-    QTextCodec,
-    QIODevice
-)
+from src.core.file_manager import ENCODING
 
 
-class File(QObject):
+class File(object):
 
     """ This class represents an object file"""
 
-    fileSaved = pyqtSignal('QString')
-
     def __init__(self, filename=''):
-        QObject.__init__(self)
         self.is_new = True
         if filename:
             self.is_new = False
@@ -53,27 +47,13 @@ class File(QObject):
             self.filename = path
             self.is_new = False
 
-        _file = QFile(self.filename)
-        if not _file.open(QIODevice.WriteOnly | QIODevice.Truncate):
-            raise Exception(_file.errorString())
-
-        stream = QTextStream(_file)
-        stream.setCodec(QTextCodec.codecForLocale())
-        stream << data
-        stream.flush()
-        _file.close()
-        # Emit the signal
-        self.fileSaved.emit(self.filename)
+        # The new lines are not translated
+        with open(self.filename, 'w', encoding=ENCODING,
+                  newline='') as _file:
+            _file.write(data)
 
     def read(self):
         """ Reads the file and returns the content """
 
-        _file = QFile(self.filename)
-        if not _file.open(QIODevice.ReadOnly | QIODevice.Text):
-            raise Exception(_file.errorString())
-
-        # Codec
-        codec = QTextCodec.codecForLocale()
-        stream = QTextStream(_file)
-        stream.setCodec(codec)
-        return stream.readAll()
+        with open(self.filename, encoding=ENCODING) as _file:
+            return _file.read()
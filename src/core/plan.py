@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# This module implements a lazy plan for the queries (iterator model).
+# The nodes have the same operators than Relation but they don't compute
+# anything when they are created, the tuples are produced one at a time
+# when the plan is iterated. A plan is converted to a Relation with
+# Node.materialize(), so the intermediate results of a query are not
+# stored in memory, for example in:
+#
+#   project a (select b = 1 (r product s))
+#
+# the tuples of the product are filtered and projected one at a time.
+
+import time
+
+from src.core import rtypes
+from src.core.relation import (
+    Relation,
+    compile_predicate,
+    join_indexes,
+    key_function,
+    cast_key_function,
+    build_hash_table,
+    use_partitioned_join,
+    partitioned_join
+)
+
+
+class Node(object):
+    """ Base class for the nodes of a plan """
+
+    header = []
+    columnar = False
+
+    def __iter__(self):
+        raise NotImplementedError
+
+    def rows(self):
+        """ Returns the tuples in a sequence that can be iterated
+        several times """
+
+        return list(self)
+
+    def materialize(self):
+        """ Runs the plan and returns a new Relation """
+
+        new_relation = Relation(self.columnar)
+        new_relation.header = list(self.header)
+        for row in self:
+            new_relation.insert(row)
+        return new_relation
+
+    def select(self, expression):
+        return Select(self, expression)
+
+    def project(self, *args):
+        return Project(self, args)
+
+    def product(self, other):
+        return Product(self, other)
+
+    def equijoin(self, other, fields, other_fields):
+        return EquiJoin(self, other, fields, other_fields)
+
+    def njoin(self, other):
+        return NJoin(self, other)
+
+    def louter(self, other):
+        return LOuter(self, other)
+
+    def router(self, other):
+        left = LOuter(other, self)
+        sharedf = [i for i in other.header if i not in self.header]
+        return Project(left, self.header + sharedf)
+
+    def fouter(self, other):
+        return Union(self.router(other), self.louter(other))
+
+    def intersect(self, other):
+        return Intersect(self, other)
+
+    def difference(self, other):
+        return Difference(self, other)
+
+    def union(self, other):
+        return Union(self, other)
+
+
+class Scan(Node):
+    """ Reads the tuples of a Relation """
+
+    def __init__(self, relation):
+        self.relation = relation
+        self.header = relation.header
+        self.columnar = relation.columnar
+
+    def __iter__(self):
+        return iter(self.relation.content)
+
+    def rows(self):
+        return self.relation.content
+
+    def materialize(self):
+        return self.relation
+
+
+class Select(Node):
+
+    def __init__(self, child, expression):
+        self.child = child
+        self.expression = expression
+        self.header = child.header
+        self.columnar = child.columnar
+
+    def __iter__(self):
+        if isinstance(self.child, Scan):
+            # The relation uses the typed values (and NumPy) of its content
+            return iter(self.materialize().content)
+        return self.__filter()
+
+    def __filter(self):
+        function, indexes = compile_predicate(self.expression, self.header)
+        cast = rtypes.cast
+        for row in self.child:
+            if function(*[cast(row[i]) for i in indexes]):
+                yield row
+
+    def materialize(self):
+        if isinstance(self.child, Scan):
+            return self.child.relation.select(self.expression)
+        return Node.materialize(self)
+
+
+class Project(Node):
+
+    def __init__(self, child, args):
+        self.child = child
+        self.columnar = child.columnar
+        self.indexes = []
+        for arg in args:
+            try:
+                self.indexes.append(child.header.index(arg))
+            except ValueError:
+                raise Exception("Invalid field name: {}".format(arg))
+        self.header = [child.header[i] for i in self.indexes]
+
+    def __iter__(self):
+        indexes = self.indexes
+        for row in self.child:
+            yield [row[i] for i in indexes]
+
+    def materialize(self):
+        if isinstance(self.child, Scan):
+            return self.child.relation.project(*self.header)
+        return Node.materialize(self)
+
+
+class Product(Node):
+
+    def __init__(self, left, right):
+        for i in left.header:
+            if i in right.header:
+                raise Exception("Duplicate field name '{}'"
+                                " in product operation".format(i))
+        self.left = left
+        self.right = right
+        self.header = left.header + right.header
+        self.columnar = left.columnar
+
+    def __iter__(self):
+        right_rows = self.right.rows()
+        for i in self.left:
+            for j in right_rows:
+                yield i + j
+
+
+class EquiJoin(Product):
+    """ Product restricted to equal values in some fields, see
+    Relation.equijoin """
+
+    def __init__(self, left, right, fields, other_fields):
+        Product.__init__(self, left, right)
+        self.indexes_left = [left.header.index(i) for i in fields]
+        self.indexes_right = [right.header.index(i) for i in other_fields]
+
+    def __iter__(self):
+        table = build_hash_table(self.right.rows(),
+                                 cast_key_function(self.indexes_right))
+        key = cast_key_function(self.indexes_left)
+        for i in self.left:
+            for j in table.get(key(i), ()):
+                yield i + j
+
+
+class NJoin(Node):
+    """ Natural join, the hash table is built on the right side and the
+    left side is streamed """
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.indexes_left, self.indexes_right, self.not_shared = \
+            join_indexes(left.header, right.header)
+        self.header = left.header + [
+            right.header[i] for i in self.not_shared]
+        self.columnar = left.columnar
+
+    outer = False
+
+    def _partitioned(self):
+        """ Returns the result of the partitioned join if the left side
+        is a relation and the join is big enough, otherwise None. The
+        left side of other nodes is streamed """
+
+        if not isinstance(self.left, Scan):
+            return None
+        left_rows = self.left.rows()
+        right_rows = self.right.rows()
+        if not use_partitioned_join(left_rows, right_rows,
+                                    self.indexes_left):
+            return None
+        return partitioned_join(left_rows, right_rows, self.indexes_left,
+                                self.indexes_right, self.not_shared,
+                                outer=self.outer)
+
+    def __iter__(self):
+        rows = self._partitioned()
+        if rows is not None:
+            return iter(rows)
+        return self._join()
+
+    def _matches(self):
+        """ Yields each tuple of the left side with its matches """
+
+        table = build_hash_table(self.right.rows(),
+                                 key_function(self.indexes_right))
+        key = key_function(self.indexes_left)
+        rest = key_function(self.not_shared)
+        for i in self.left:
+            yield i, [list(rest(j)) for j in table.get(key(i), ())]
+
+    def _join(self):
+        for i, matches in self._matches():
+            for tail in matches:
+                yield i + tail
+
+
+class LOuter(NJoin):
+
+    outer = True
+
+    def _join(self):
+        nulls = ['null' for i in self.not_shared]
+        for i, matches in self._matches():
+            if not matches:
+                yield i + nulls
+            for tail in matches:
+                yield i + tail
+
+
+class Union(Node):
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.header = left.header
+        self.columnar = left.columnar
+
+    def __iter__(self):
+        seen = set()
+        for row in self.left:
+            seen.add(tuple(row))
+            yield row
+        for row in self.right:
+            if tuple(row) not in seen:
+                yield row
+
+
+class Intersect(Node):
+
+    def __init__(self, left, right):
+        if left.header != right.header:
+            raise Exception("Not union compatible for intersection")
+        self.left = left
+        self.right = right
+        self.header = left.header
+        self.columnar = left.columnar
+
+    def __iter__(self):
+        left = set(map(tuple, self.left))
+        for row in self.right:
+            if tuple(row) in left:
+                yield row
+
+
+class Difference(Node):
+
+    def __init__(self, left, right):
+        if left.header != right.header:
+            raise Exception("Not union compatible for difference")
+        self.left = left
+        self.right = right
+        self.header = left.header
+        self.columnar = left.columnar
+
+    def __iter__(self):
+        right = set(map(tuple, self.right))
+        for row in self.left:
+            if tuple(row) not in right:
+                yield row
+
+
+class Profile(Node):
+    """ Counts the tuples produced by *child* and the time spent on it
+    (including its children). When the child finishes *callback* is
+    called with the number of tuples and the seconds """
+
+    def __init__(self, child, callback):
+        self.child = child
+        self.callback = callback
+        self.header = child.header
+        self.columnar = child.columnar
+
+    def __iter__(self):
+        clock = time.perf_counter
+        start = clock()
+        iterator = iter(self.child)
+        elapsed = clock() - start
+        rows = 0
+        while True:
+            start = clock()
+            try:
+                row = next(iterator)
+            except StopIteration:
+                elapsed += clock() - start
+                break
+            elapsed += clock() - start
+            rows += 1
+            yield row
+        self.callback(rows, elapsed)
+
+    def materialize(self):
+        start = time.perf_counter()
+        new_relation = self.child.materialize()
+        self.callback(new_relation.cardinality(),
+                      time.perf_counter() - start)
+        return new_relation
+
+
+class Checkpoint(Node):
+    """ Calls *callback* with the number of tuples produced by *child*
+    every *interval* tuples and when it finishes. The callback can stop
+    the execution raising an exception """
+
+    def __init__(self, child, callback, interval=1000):
+        self.child = child
+        self.callback = callback
+        self.interval = interval
+        self.header = child.header
+        self.columnar = child.columnar
+
+    def __iter__(self):
+        callback = self.callback
+        interval = self.interval
+        rows = 0
+        callback(rows)
+        for row in self.child:
+            rows += 1
+            if not rows % interval:
+                callback(rows)
+            yield row
+        callback(rows)
+
+    def materialize(self):
+        child = self.child
+        if (isinstance(child, (Select, Project)) and
+                isinstance(child.child, Scan)):
+            # The operators of the relation are used
+            self.callback(0)
+            new_relation = child.materialize()
+            self.callback(new_relation.cardinality())
+            return new_relation
+        return Node.materialize(self)
+
+
+class Namespace(dict):
+    """ Dictionary of relations used to evaluate the queries generated by
+    the Interpreter, the relations are returned as Scan nodes """
+
+    def __getitem__(self, name):
+        return Scan(dict.__getitem__(self, name))
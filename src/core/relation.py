@@ -17,9 +17,21 @@
 # You should have received a copy of the GNU General Public License
 # along with Pireal; If not, see <http://www.gnu.org/licenses/>.
 
+import os
 import re
-
-from src.core.rtypes import RelationStr
+from concurrent.futures import ProcessPoolExecutor
+from itertools import (
+    chain,
+    count,
+    repeat
+)
+from operator import itemgetter
+
+from src.core import (
+    rtypes,
+    vectorized
+)
+from src.core.columnar import ColumnarContent
 
 IS_VALID_FIELD_NAME = re.compile("^[_á-úa-zA-Z][_á-úa-zA-Z0-9]*$")
 
@@ -27,6 +39,16 @@ datetime_dict = {
     'datetime': __import__('datetime')
 }
 
+# The natural and outer joins with more tuples (adding both relations) are
+# partitioned and solved in a pool of processes, see partitioned_join
+PARTITIONED_JOIN_ROWS = 1000000
+# Processes used by the partitioned joins, None is the number of CPUs
+JOIN_WORKERS = None
+
+# The versions are unique between all the relations, so a (relation name,
+# version) pair identifies the data of a relation
+_versions = count(1)
+
 
 class Relation(object):
     """
@@ -73,11 +95,32 @@ class Relation(object):
 
     - Ejemplo de Seleción:
     personas.select("nombre == 'Gabriel'")
+
+    Si se crea con columnar=True el contenido se guarda por columnas
+    (ver src.core.columnar), cada campo es un array de códigos de un
+    diccionario con los valores distintos del campo. La interfaz es la
+    misma, y las relaciones que devuelven las operaciones también son
+    columnares.
+
+    El atributo version cambia con Relation.touch(), que se llama cada vez
+    que se modifica la relación desde la interfaz (ver src.gui.model). Se
+    usa para saber si un resultado guardado en la caché sigue siendo
+    válido (ver src.core.cache).
     """
 
-    def __init__(self):
-        self.content = Content()
+    def __init__(self, columnar=False):
+        self.columnar = columnar
+        if columnar:
+            self.content = ColumnarContent()
+        else:
+            self.content = Content()
         self.__header = list()
+        self.version = next(_versions)
+
+    def touch(self):
+        """ Marks the relation as modified """
+
+        self.version = next(_versions)
 
     def insert(self, record):
         """ Inserts a register
@@ -97,8 +140,7 @@ class Relation(object):
         """ Agrega una columna al final de la tabla con valores 'null' """
 
         self.__header.append('null')
-        for t in self.content:
-            t.append('null')
+        self.content.append_column('null')
 
     def remove_column(self, column):
         """ Elimina la columna @column """
@@ -106,8 +148,7 @@ class Relation(object):
         # Primero elimino el campo
         del self.__header[column]
         # Ahora elimino las tuplas en ese campo
-        for t in self.content:
-            del t[column]
+        self.content.remove_column(column)
 
     def __set_header(self, header):
         """ Set header to the relation """
@@ -118,6 +159,9 @@ class Relation(object):
                     f=field))
 
         self.__header = header
+        if self.columnar:
+            # The columns are created with the header
+            self.content.set_degree(len(header))
 
     def __get_header(self):
         """ Get the header """
@@ -132,7 +176,7 @@ class Relation(object):
         pass
 
     def update(self, row, column, value):
-        self.content[row][column] = value
+        self.content.update(row, column, value)
 
     def cardinality(self):
         """ Devuelve la cantidad de filas o tuplas de la relación """
@@ -144,6 +188,14 @@ class Relation(object):
 
         return len(self.header)
 
+    def infer_types(self):
+        """ Casts every field once and returns the type of each one
+        (int, float, date, time, str or None if the field has mixed
+        types). The casted values are kept until the content changes """
+
+        return [rtypes.infer_type(self.content.typed_column(i))
+                for i in range(self.degree())]
+
     def select(self, expression):
         """
         The select operator returns a new relation with the tuples that
@@ -153,24 +205,38 @@ class Relation(object):
         :returns: A new relation with the tuples that satisfy an *expression*
         """
 
-        new_relation = Relation()
+        new_relation = Relation(self.columnar)
         new_relation.header = self.__header
 
-        # Filtering
-        d = {}
-        for register in self.content:
-            for e, attr in enumerate(self.__header):
-                d[attr] = RelationStr(register[e]).cast()
-            # The expression is evaluated
-            try:
-                if eval(expression, datetime_dict, d):
-                    new_relation.insert(register)
-            except SyntaxError:
-                raise Exception("Couldn't be evaluate the expression: "
-                                "'{}'".format(expression))
+        # Whole columns are evaluated at once when it's possible
+        indexes = vectorized.select_indexes(expression, self.__header,
+                                            self.content)
+        if indexes is None:
+            indexes = self.__select_indexes(expression)
+
+        if self.columnar:
+            new_relation.content = self.content.take(indexes)
+        else:
+            content = self.content
+            for i in indexes:
+                new_relation.insert(content[i])
 
         return new_relation
 
+    def __select_indexes(self, expression):
+        """ Returns the positions of the tuples that satisfy *expression*
+        evaluating it tuple by tuple """
+
+        # The expression is compiled only once
+        function, indexes = compile_predicate(expression, self.__header)
+        # Only the typed values of the used fields are passed
+        columns = [self.content.typed_column(i) for i in indexes]
+        if columns:
+            values = zip(*columns)
+        else:
+            values = repeat((), len(self.content))
+        return [i for i, args in enumerate(values) if function(*args)]
+
     def project(self, *args):
         """ The project operator returns a new relation.
         Extract columns (attributes) resulting in a vertical subset of
@@ -191,11 +257,15 @@ class Relation(object):
         header = [self.__header[i] for i in indexes]
 
         # New relation
-        new_relation = Relation()
+        new_relation = Relation(self.columnar)
         new_relation.header = header
 
-        for rec in self.content:
-            new_relation.insert([rec[index] for index in indexes])
+        if self.columnar:
+            # The columns are shared, not copied
+            new_relation.content = self.content.project(indexes)
+        else:
+            for rec in self.content:
+                new_relation.insert([rec[index] for index in indexes])
 
         return new_relation
 
@@ -217,7 +287,7 @@ class Relation(object):
                 raise Exception("Duplicate field name '{}'"
                                 " in product operation".format(i))
 
-        new_relation = Relation()
+        new_relation = Relation(self.columnar)
         new_relation.header = self.__header + other_relation.header
 
         for i in self.content:
@@ -226,61 +296,137 @@ class Relation(object):
 
         return new_relation
 
-    def njoin(self, other_relation):
-        """  """
+    def equijoin(self, other_relation, fields, other_fields):
+        """ The equi-join is a product that only combines the tuples where
+        each field of *fields* is equal to the corresponding field of
+        *other_fields*. It's the same that:
 
-        # Combination of the headers
-        header = self.__header + other_relation.header
+        select a = b (R product S)
 
-        new_relation = Relation()
-        new_relation.header = header
+        but it's solved with a hash table built on the other relation.
+        The values are compared casted, like in the select operator.
 
-        # Shared field names
-        sharedf = set(self.__header).intersection(set(other_relation.header))
-        ss = self.__header + [i for i in other_relation.header
-                              if i not in sharedf]
+        :param other_relation: Relation
+        :param fields: Field names of this relation
+        :param other_fields: Field names of the other relation
+        :returns: A new relation
+        """
+
+        # Check if there are duplicate fields
+        for i in self.__header:
+            if i in other_relation.header:
+                raise Exception("Duplicate field name '{}'"
+                                " in product operation".format(i))
 
-        # Relation indexes field names
-        indexes_rela = [self.__header.index(i) for i in sharedf]
-        # Other relation indexes field names
-        indexes_other_rela = [other_relation.header.index(i) for i in sharedf]
+        indexes = [self.__header.index(i) for i in fields]
+        indexes_other = [other_relation.header.index(i)
+                         for i in other_fields]
 
+        new_relation = Relation(self.columnar)
+        new_relation.header = self.__header + other_relation.header
+
+        table = build_hash_table(other_relation.content,
+                                 cast_key_function(indexes_other))
+        key = cast_key_function(indexes)
         for i in self.content:
+            for j in table.get(key(i), ()):
+                new_relation.insert(i + j)
+
+        return new_relation
+
+    def njoin(self, other_relation):
+        """ The natural join is defined as: R ⋈ S. Combines the tuples of
+        R with the tuples of S that have the same values in all the
+        shared attributes. The shared attributes appear only once.
+
+        The join is solved with a hash table built on the smaller
+        relation and probed with the larger one.
+
+        :param other_relation: Relation object
+        :returns: A new relation
+        """
+
+        indexes_rela, indexes_other, not_shared = join_indexes(
+            self.__header, other_relation.header)
+
+        new_relation = Relation(self.columnar)
+        new_relation.header = self.__header + [
+            other_relation.header[i] for i in not_shared]
+
+        if use_partitioned_join(self.content, other_relation.content,
+                                indexes_rela):
+            for row in partitioned_join(self.content, other_relation.content,
+                                        indexes_rela, indexes_other,
+                                        not_shared):
+                new_relation.insert(row)
+            return new_relation
+
+        rest = key_function(not_shared)
+        if len(self.content) > len(other_relation.content):
+            # Build on the other relation, probe with this one
+            table = build_hash_table(other_relation.content,
+                                     key_function(indexes_other))
+            key = key_function(indexes_rela)
+            for i in self.content:
+                for j in table.get(key(i), ()):
+                    new_relation.insert(i + list(rest(j)))
+        else:
+            # Build on this relation, probe with the other one. The tuples
+            # are sorted by their position in this relation to keep the
+            # same order in both cases
+            key = key_function(indexes_rela)
+            table = build_hash_table(enumerate(self.content),
+                                     lambda item: key(item[1]))
+            key = key_function(indexes_other)
+            result = []
             for j in other_relation.content:
-                for k in indexes_rela:
-                    for l in indexes_other_rela:
-                        if i[k] == j[l]:
-                            new_relation.insert(i + j)
+                matches = table.get(key(j))
+                if matches is not None:
+                    tail = list(rest(j))
+                    for position, i in matches:
+                        result.append((position, i + tail))
+            result.sort(key=itemgetter(0))
+            for position, row in result:
+                new_relation.insert(row)
 
-        return new_relation.project(*ss)
+        return new_relation
 
     def louter(self, other):
-        header = self.__header + other.header
+        """ The left outer join is defined as: R ⟕ S. It is a natural join
+        that also keeps the tuples of R without matches in S, padded
+        with 'null' values.
 
-        new_relation = Relation()
-        new_relation.header = header
+        :param other: Relation object
+        :returns: A new relation
+        """
+
+        indexes_rela, indexes_other, not_shared = join_indexes(
+            self.__header, other.header)
 
-        sharedf = set(self.__header).intersection(set(other.header))
-        ss = self.__header + [i for i in other.header if i not in sharedf]
+        new_relation = Relation(self.columnar)
+        new_relation.header = self.__header + [
+            other.header[i] for i in not_shared]
 
-        indexes_rela = [self.__header.index(i) for i in sharedf]
-        indexes_other = [other.header.index(i) for i in sharedf]
+        if use_partitioned_join(self.content, other.content, indexes_rela):
+            for row in partitioned_join(self.content, other.content,
+                                        indexes_rela, indexes_other,
+                                        not_shared, outer=True):
+                new_relation.insert(row)
+            return new_relation
 
+        rest = key_function(not_shared)
+        key = key_function(indexes_rela)
+        table = build_hash_table(other.content, key_function(indexes_other))
+        nulls = ['null' for i in not_shared]
         for i in self.content:
-            added = False
-            for j in other.content:
-                for k in indexes_rela:
-                    for l in indexes_other:
-                        if i[k] == j[l]:
-                            # Esto es un producto cartesiano con la
-                            # condición equi-join
-                            new_relation.insert(i + j)
-                            added = True
-            if not added:
-                nulls = ['null' for i in range(len(other.header))]
+            matches = table.get(key(i))
+            if matches is None:
                 new_relation.insert(i + nulls)
+                continue
+            for j in matches:
+                new_relation.insert(i + list(rest(j)))
 
-        return new_relation.project(*ss)
+        return new_relation
 
     def router(self, other):
         r = other.louter(self)
@@ -303,7 +449,7 @@ class Relation(object):
         if self.__header != other_relation.header:
             raise Exception("Not union compatible for intersection")
 
-        new_relation = Relation()
+        new_relation = Relation(self.columnar)
         new_relation.header = self.__header
         content = self.content.intersection(other_relation.content)
 
@@ -326,7 +472,7 @@ class Relation(object):
         if self.header != other_relation.header:
             raise Exception("Not union compatible for difference")
 
-        new_relation = Relation()
+        new_relation = Relation(self.columnar)
         new_relation.header = self.header
         content = self.content.difference(other_relation.content)
 
@@ -346,7 +492,7 @@ class Relation(object):
         # if self.header != other_relation.header:
         #    raise Exception("Not union compatible")
 
-        new_relation = Relation()
+        new_relation = Relation(self.columnar)
         new_relation.header = self.header
         content = self.content.union(other_relation.content)
 
@@ -380,6 +526,148 @@ class Relation(object):
         return header + content
 
 
+def compile_predicate(expression, header):
+    """ Compiles a python expression in a function whose parameters are
+    the field names used in the expression.
+
+    The field names are resolved to positions of *header* once, so only
+    the values of those fields have to be passed for each tuple.
+
+    :param expression: A python valid expression
+    :param header: The field names of the relation
+    :returns: A tuple with the function and the positions of its
+              parameters in the header
+    """
+
+    try:
+        code = compile(expression, '<select>', 'eval')
+    except SyntaxError:
+        raise Exception("Couldn't be evaluate the expression: "
+                        "'{}'".format(expression))
+    fields = [name for name in code.co_names if name in header]
+    indexes = [header.index(field) for field in fields]
+    function = eval('lambda {0}: {1}'.format(', '.join(fields), expression),
+                    datetime_dict)
+    return function, indexes
+
+
+def join_indexes(header, other_header):
+    """ Returns the positions of the shared field names in both headers
+    and the positions of the fields of *other_header* that are not
+    shared """
+
+    sharedf = [i for i in header if i in other_header]
+    indexes = [header.index(i) for i in sharedf]
+    indexes_other = [other_header.index(i) for i in sharedf]
+    not_shared = [e for e, i in enumerate(other_header)
+                  if i not in sharedf]
+    return indexes, indexes_other, not_shared
+
+
+def key_function(indexes):
+    """ Returns a function that extracts the values at *indexes* of a
+    tuple as a python tuple, used as key in the hash tables """
+
+    if not indexes:
+        return lambda row: ()
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda row: (row[index],)
+    return itemgetter(*indexes)
+
+
+def cast_key_function(indexes):
+    """ Like key_function, but the values are casted (see rtypes.cast) so
+    they are compared as in the select operator """
+
+    cast = rtypes.cast
+    return lambda row: tuple([cast(row[i]) for i in indexes])
+
+
+def build_hash_table(rows, key):
+    """ Groups the items of *rows* by the value returned by the function
+    *key* for each item """
+
+    table = {}
+    for row in rows:
+        k = key(row)
+        bucket = table.get(k)
+        if bucket is None:
+            table[k] = [row]
+        else:
+            bucket.append(row)
+    return table
+
+
+def use_partitioned_join(rows, other_rows, indexes):
+    """ Returns True if the join of *rows* and *other_rows* on the fields
+    at *indexes* must be partitioned """
+
+    return bool(indexes) and (
+        len(rows) + len(other_rows) >= PARTITIONED_JOIN_ROWS)
+
+
+def partitioned_join(rows, other_rows, indexes, indexes_other, not_shared,
+                     outer=False, workers=None):
+    """ Hash join solved in a pool of processes. Both inputs are split in
+    partitions by the hash of the shared fields, so the tuples that match
+    are in the same partition, and each pair of partitions is joined in a
+    process. The result has the same order as the join of a single
+    process: by position in *rows*, then by position in *other_rows*
+
+    :param rows: Tuples of the left relation
+    :param other_rows: Tuples of the right relation
+    :param indexes: Positions of the shared fields in rows
+    :param indexes_other: Positions of the shared fields in other_rows
+    :param not_shared: Positions of the fields of other_rows added to the
+                       result
+    :param outer: If it's True the tuples of rows without matches are
+                  padded with 'null' (left outer join)
+    :param workers: Number of processes, JOIN_WORKERS by default
+    :returns: A list with the tuples of the result
+    """
+
+    if workers is None:
+        workers = JOIN_WORKERS or os.cpu_count() or 1
+    key = key_function(indexes)
+    key_other = key_function(indexes_other)
+    partitions = [[] for i in range(workers)]
+    other_partitions = [[] for i in range(workers)]
+    for position, row in enumerate(rows):
+        partitions[hash(key(row)) % workers].append((position, row))
+    for row in other_rows:
+        other_partitions[hash(key_other(row)) % workers].append(row)
+
+    with ProcessPoolExecutor(workers) as pool:
+        results = pool.map(_join_partition, partitions, other_partitions,
+                           repeat(indexes), repeat(indexes_other),
+                           repeat(not_shared), repeat(outer))
+        result = list(chain.from_iterable(results))
+    # The sort is stable, the matches of a tuple keep their order
+    result.sort(key=itemgetter(0))
+    return [row for position, row in result]
+
+
+def _join_partition(rows, other_rows, indexes, indexes_other, not_shared,
+                    outer):
+    """ Joins a partition, see partitioned_join """
+
+    table = build_hash_table(other_rows, key_function(indexes_other))
+    key = key_function(indexes)
+    rest = key_function(not_shared)
+    nulls = ['null' for i in not_shared]
+    result = []
+    for position, row in rows:
+        matches = table.get(key(row))
+        if matches is None:
+            if outer:
+                result.append((position, row + nulls))
+            continue
+        for match in matches:
+            result.append((position, row + list(rest(match))))
+    return result
+
+
 class Content(object):
     """ Esta clase representa un objeto list pero que se comporta como un
     set (conjunto).
@@ -388,36 +676,105 @@ class Content(object):
     no permite eso), además el órden me importa (el órden es un concepto sin
     sentido para los conjuntos y las matemáticas) pero esto es un problema
     del mundo real ;)
+
+    Para las operaciones de conjuntos se usa un índice (un set de tuplas)
+    que se construye la primera vez que se necesita y se descarta cuando
+    el contenido se modifica.
     """
 
     def __init__(self):
         self.content = []
-        self.__index = 0
+        self.__index = None
+        # Casted values of each field, by position
+        self.__typed = {}
+        # Arrays built from the casted values, by position
+        self.__arrays = {}
+
+    def __get_index(self):
+        """ Returns the set of tuples of the content, building it if it was
+        discarded """
+
+        if self.__index is None:
+            self.__index = set(map(tuple, self.content))
+        return self.__index
+
+    def __invalidate(self):
+        """ Discards the index and the casted values, must be called when
+        the content changes """
+
+        self.__index = None
+        self.__typed.clear()
+        self.__arrays.clear()
+
+    def typed_column(self, column):
+        """ Returns a list with the casted values of *column* """
+
+        typed = self.__typed.get(column)
+        if typed is None:
+            typed = [rtypes.cast(t[column]) for t in self.content]
+            self.__typed[column] = typed
+        return typed
+
+    def typed_array(self, column, factory):
+        """ Returns an array built by *factory* from the casted values of
+        *column*, cached until the content changes """
+
+        array = self.__arrays.get(column)
+        if array is None:
+            array = factory(self.typed_column(column))
+            self.__arrays[column] = array
+        return array
 
     def add(self, item):
         # if item not in self.content:
         self.content.append(item)
+        if self.__index is not None:
+            self.__index.add(tuple(item))
+        for column, typed in self.__typed.items():
+            typed.append(rtypes.cast(item[column]))
+        if self.__arrays:
+            self.__arrays.clear()
+
+    # The tuples can be shared with other relations (the results of the
+    # operators, the results in the cache), they are copied before they
+    # are modified
+
+    def update(self, row, column, value):
+        record = list(self.content[row])
+        record[column] = value
+        self.content[row] = record
+        self.__index = None
+        typed = self.__typed.get(column)
+        if typed is not None:
+            typed[row] = rtypes.cast(value)
+        self.__arrays.pop(column, None)
+
+    def append_column(self, value):
+        self.content = [t + [value] for t in self.content]
+        self.__invalidate()
+
+    def remove_column(self, column):
+        self.content = [t[:column] + t[column + 1:] for t in self.content]
+        self.__invalidate()
+
+    def clear(self):
+        del self.content[:]
+        self.__invalidate()
 
     def difference(self, other):
-        return list(filter(lambda x: x not in other, self))
+        return [x for x in self.content if x not in other]
 
     def intersection(self, other):
-        return list(filter(lambda x: x in self, other))
+        return [x for x in other if x in self]
 
     def union(self, other):
-        return list(self) + list(filter(lambda x: x not in self, other))
+        return self.content + [x for x in other if x not in self]
 
-    def __iter__(self):
-        return self
+    def __contains__(self, item):
+        return tuple(item) in self.__get_index()
 
-    def __next__(self):
-        try:
-            item = self.content[self.__index]
-            self.__index += 1
-            return item
-        except IndexError:
-            self.__index = 0
-            raise StopIteration
+    def __iter__(self):
+        return iter(self.content)
 
     def __str__(self):
         return str([x for x in self])
@@ -430,9 +787,11 @@ class Content(object):
 
     def __setitem__(self, index, value):
         self.content[index] = value
+        self.__invalidate()
 
     def __delitem__(self, index):
         del self.content[index]
+        self.__invalidate()
 
 
 if __name__ == "__main__":
@@ -19,6 +19,7 @@
 
 import re
 import datetime
+from functools import lru_cache
 
 # Positive or negative integers
 IS_INT = re.compile(r'^[\-]?\d+$')
@@ -31,6 +32,45 @@ IS_DATE = re.compile(
 IS_HOUR = re.compile(r'^[\d+]{2}:[\d+]{2}$')
 
 
+@lru_cache(maxsize=2 ** 16)
+def cast(value):
+    """ Casts the string *value* to int, float, date or time, if the
+    string doesn't represent any of them it's returned without changes.
+
+    The results are cached, the same string is never parsed twice
+    while it remains in the cache.
+    """
+
+    if IS_INT.match(value):
+        return int(value)
+    elif IS_FLOAT.match(value):
+        return float(value)
+    elif IS_DATE.match(value):
+        try:
+            date = datetime.datetime.strptime(value, "%Y/%m/%d")
+        except:
+            date = datetime.datetime.strptime(value, "%d/%m/%Y")
+        return date.date()
+    elif IS_HOUR.match(value):
+        return datetime.time(*list(map(int, value.split(':'))))
+    return value
+
+
+def infer_type(values):
+    """ Returns the type of the casted *values* (int, float, date, time or
+    str). If the values are ints and floats the type is float, if there
+    are other combinations returns None (mixed type) """
+
+    types = set(map(type, values))
+    if len(types) == 1:
+        return types.pop()
+    if types == {int, float}:
+        return float
+    if not types:
+        return str
+    return None
+
+
 class RelationStr(str):
 
     """ Clase que representa un tipo de dato en el álgebra relacional
@@ -45,18 +85,4 @@ class RelationStr(str):
     def cast(self):
         """ Este método castea el string a otro tipo de dato o no """
 
-        if IS_INT.match(self.value):
-            return int(self.value)
-        elif IS_FLOAT.match(self.value):
-            return float(self.value)
-        elif IS_DATE.match(self.value):
-            try:
-                date = datetime.datetime.strptime(
-                    self.value, "%Y/%m/%d")
-            except:
-                date = datetime.datetime.strptime(
-                    self.value, "%d/%m/%Y")
-            return date.date()
-        elif IS_HOUR.match(self.value):
-            return datetime.time(*list(map(int, self.value.split(':'))))
-        return self.value
+        return cast(self.value)
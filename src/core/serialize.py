@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Compact form of a relation to send it to other processes. Each field is
+# dictionary encoded: the distinct strings and the array of codes as
+# bytes, so a repeated value is sent once and there are no lists of lists
+# to pickle.
+
+from array import array
+
+from src.core.relation import Relation
+from src.core.columnar import (
+    CODE_TYPE,
+    Column,
+    ColumnarContent,
+    Dictionary
+)
+
+
+def pack(relation):
+    """ Returns a tuple (header, columnar, cardinality, columns) that can
+    be pickled, where columns is a list of (values, codes) """
+
+    if relation.columnar:
+        columns = relation.content.columns
+    else:
+        columns = [Column() for field in relation.header]
+        for row in relation.content:
+            for column, value in zip(columns, row):
+                column.append(value)
+    packed = [(column.dictionary.values, column.codes.tobytes())
+              for column in columns]
+    return (list(relation.header), relation.columnar,
+            relation.cardinality(), packed)
+
+
+def unpack(packed):
+    """ Inverse of pack """
+
+    header, columnar, cardinality, packed_columns = packed
+    columns = []
+    for values, data in packed_columns:
+        codes = array(CODE_TYPE)
+        codes.frombytes(data)
+        columns.append(Column(Dictionary(values), codes))
+    new_relation = Relation(columnar)
+    new_relation.header = header
+    if columnar:
+        content = ColumnarContent(columns)
+        if not columns:
+            # A relation without fields only has its cardinality
+            content = ColumnarContent().take(range(cardinality))
+        new_relation.content = content
+    else:
+        decoded = [column.decode() for column in columns]
+        if decoded:
+            rows = map(list, zip(*decoded))
+        else:
+            rows = ([] for i in range(cardinality))
+        for row in rows:
+            new_relation.insert(row)
+    return new_relation
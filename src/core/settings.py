@@ -19,12 +19,15 @@
 
 """
 Pireal Settings
+
+This module doesn't import PyQt5, the settings are loaded from the INI
+file by src.gui.settings_loader
 """
 
 import sys
 import os
-from PyQt5.QtGui import QFont
-from PyQt5.QtCore import QSettings
+
+from src.core import relation
 
 
 # Detecting Operating System
@@ -66,9 +69,13 @@ EXAMPLES = os.path.join(ROOT_DIR, 'samples')
 
 
 # Supported files
-SUPPORTED_FILES = ("Pireal Database File (*.pdb);;"
+SUPPORTED_FILES = ("Pireal Database File (*.pdb *.pdbx);;"
                    "Pireal Query File (*.pqf);;"
                    "Pireal Relation File (*.prf)")
+# Formats of Save Database As, the database is converted to the format
+# of the extension (see file_manager.write_database)
+DATABASE_FORMATS = ("Pireal Database File (*.pdb);;"
+                    "Pireal Binary Database File (*.pdbx)")
 
 
 class PSetting(object):
@@ -77,25 +84,13 @@ class PSetting(object):
     MATCHING_PARENTHESIS = True
     RECENT_DBS = []
     LAST_OPEN_FOLDER = None
-    # FIXME: for Mac Os
-    if LINUX:
-        FONT = QFont("Monospace", 12)
-    else:
-        FONT = QFont("Courier", 10)
-
-
-def load_settings():
-    """ Load settings from INI file """
-
-    qs = QSettings(SETTINGS_PATH, QSettings.IniFormat)
-    PSetting.LANGUAGE = qs.value('language', "", type='QString')
-    PSetting.RECENT_DBS = qs.value('recent_databases', [], type='QStringList')
-    PSetting.LAST_OPEN_FOLDER = qs.value('last_open_folder',
-                                         None, type='QString')
-    PSetting.HIGHLIGHT_CURRENT_LINE = qs.value('highlight_current_line',
-                                               False, type=bool)
-    PSetting.MATCHING_PARENTHESIS = qs.value('matching_parenthesis',
-                                             True, type=bool)
-    font = qs.value('font', None)
-    if font is not None:
-        PSetting.FONT = font
+    # Store the relations by columns (see src.core.columnar)
+    COLUMNAR_STORAGE = False
+    # Budget in bytes of the cache of results (see src.core.cache)
+    RESULT_CACHE_SIZE = 64 * 1024 * 1024
+    # Execute the independent assignments in a pool of processes
+    PARALLEL_EXECUTION = False
+    # Tuples from which the joins are partitioned in a pool of processes
+    PARTITIONED_JOIN_ROWS = relation.PARTITIONED_JOIN_ROWS
+    # QFont of the editor, it's created by src.gui.settings_loader
+    FONT = None
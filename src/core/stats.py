@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Statistics of the relations, used by the optimizer to estimate the size
+# of the intermediate results of a query. The estimations follow the
+# classic formulas (System R):
+#
+# - select a = c (R): |R| / V(R, a)
+# - select a < c (R): |R| * (c - min(a)) / (max(a) - min(a)) for numbers,
+#   |R| / 3 otherwise
+# - R njoin S: |R| * |S| / max(V(R, a), V(S, a)) for each shared field a
+#
+# where V(R, a) is the number of distinct values of the field a in R.
+
+from src.core import rtypes
+
+# Selectivity of a condition that can't be estimated
+DEFAULT_SELECTIVITY = 1 / 3
+
+
+class Statistics(object):
+    """ Statistics of a relation (or an estimation of them)
+
+    :param cardinality: Number of tuples
+    :param distinct: Dictionary with the number of distinct values of
+                     each field
+    :param minimum: Dictionary with the minimum value of each field, the
+                    fields with mixed types are not included
+    :param maximum: Like minimum
+    """
+
+    def __init__(self, cardinality, distinct, minimum=None, maximum=None):
+        self.cardinality = cardinality
+        self.distinct = distinct
+        if minimum is None:
+            minimum = {}
+        if maximum is None:
+            maximum = {}
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def distinct_values(self, field):
+        """ Returns V(R, field), at least 1 """
+
+        return max(1, min(self.distinct.get(field, self.cardinality),
+                          self.cardinality))
+
+    def scale(self, cardinality, fields=None):
+        """ Returns the statistics of a result with *cardinality* tuples
+        taken from this relation, with the *fields* (all by default) """
+
+        if fields is None:
+            fields = list(self.distinct)
+        distinct = {f: min(self.distinct_values(f), max(1, cardinality))
+                    for f in fields}
+        return Statistics(cardinality, distinct,
+                          {f: v for f, v in self.minimum.items()
+                           if f in distinct},
+                          {f: v for f, v in self.maximum.items()
+                           if f in distinct})
+
+    def __repr__(self):
+        return "Statistics({0}, {1})".format(self.cardinality, self.distinct)
+
+
+def collect(relation):
+    """ Returns the Statistics of *relation* """
+
+    distinct, minimum, maximum = {}, {}, {}
+    for column, field in enumerate(relation.header):
+        values = relation.content.typed_column(column)
+        distinct[field] = len(set(values))
+        if values and rtypes.infer_type(values) is not None:
+            minimum[field] = min(values)
+            maximum[field] = max(values)
+    return Statistics(relation.cardinality(), distinct, minimum, maximum)
+
+
+def estimate(relation):
+    """ Returns the Statistics of *relation* without reading its tuples,
+    only the cardinality is known (see src.core.lazy) """
+
+    cardinality = relation.cardinality()
+    return Statistics(cardinality,
+                      {field: cardinality for field in relation.header})
+
+
+def join(left, right, shared):
+    """ Estimates the statistics of the natural join of two relations
+
+    :param left: Statistics of the left relation
+    :param right: Statistics of the right relation
+    :param shared: Pairs of fields (left field, right field) compared for
+                   equality, empty for a product
+    """
+
+    cardinality = left.cardinality * right.cardinality
+    for a, b in shared:
+        cardinality /= max(left.distinct_values(a),
+                           right.distinct_values(b))
+    distinct = dict(right.distinct)
+    distinct.update(left.distinct)
+    for a, b in shared:
+        distinct[a] = min(left.distinct_values(a), right.distinct_values(b))
+    minimum = dict(right.minimum)
+    minimum.update(left.minimum)
+    maximum = dict(right.maximum)
+    maximum.update(left.maximum)
+    result = Statistics(cardinality, distinct, minimum, maximum)
+    return result.scale(cardinality)
+
+
+def selectivity(stats, field, operator, value):
+    """ Estimates the fraction of tuples that satisfy *field* *operator*
+    *value*, where operator is one of '=', '<>', '<', '>', '<=', '>=' """
+
+    if operator == '=':
+        return 1 / stats.distinct_values(field)
+    if operator == '<>':
+        return 1 - 1 / stats.distinct_values(field)
+    low, high = stats.minimum.get(field), stats.maximum.get(field)
+    numbers = (int, float)
+    if (isinstance(low, numbers) and isinstance(high, numbers) and
+            isinstance(value, numbers) and high > low):
+        fraction = (value - low) / (high - low)
+        if operator in ('>', '>='):
+            fraction = 1 - fraction
+        return min(1, max(0, fraction))
+    return DEFAULT_SELECTIVITY
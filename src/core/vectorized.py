@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# This module evaluates the expressions of the select operator over whole
+# columns with NumPy. Each comparison is a boolean mask and the masks are
+# combined with & (and) and | (or). NumPy is optional, if it's not
+# installed or the expression can't be vectorized (for example a field
+# with mixed types) the select operator uses the row by row evaluation.
+
+import ast
+import sys
+import datetime
+import operator
+import importlib.util
+
+from src.core import rtypes
+
+# Vectorized execution is used when NumPy is available. NumPy is imported
+# the first time that an expression is evaluated, so the modules that use
+# the relations start faster (see src.cli)
+ENABLED = importlib.util.find_spec('numpy') is not None
+numpy = None
+
+COMPARATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.Gt: operator.gt,
+    ast.LtE: operator.le,
+    ast.GtE: operator.ge
+}
+
+# Constructors allowed in the expressions, see Interpreter.visit_Date
+CONSTRUCTORS = {
+    'date': datetime.date,
+    'time': datetime.time
+}
+
+NUMBER, DATE, TIME, STRING = 'number', 'date', 'time', 'string'
+
+
+class NotVectorizable(Exception):
+    """ The expression must be evaluated row by row """
+
+
+def _constant(node):
+    """ Returns the value of *node* if it's a number or a string, before
+    Python 3.8 they are ast.Num and ast.Str nodes """
+
+    if sys.version_info >= (3, 8):
+        if isinstance(node, ast.Constant):
+            return node.value
+    elif isinstance(node, ast.Num):
+        return node.n
+    elif isinstance(node, ast.Str):
+        return node.s
+    raise NotVectorizable
+
+
+def _kind(value_type):
+    """ Returns the kind of comparable values of *value_type* """
+
+    if value_type in (int, float):
+        return NUMBER
+    if value_type is datetime.date:
+        return DATE
+    if value_type is datetime.time:
+        return TIME
+    if value_type is str:
+        return STRING
+    raise NotVectorizable
+
+
+def _seconds(time):
+    return time.hour * 3600 + time.minute * 60 + time.second
+
+
+def _column_array(values):
+    """ Converts the casted values of a field to a NumPy array. Returns
+    the kind of the values and the array, or None if the field can't be
+    vectorized """
+
+    value_type = rtypes.infer_type(values)
+    if value_type is int:
+        return NUMBER, numpy.array(values, dtype=numpy.int64)
+    if value_type is float:
+        return NUMBER, numpy.array(values, dtype=numpy.float64)
+    if value_type is datetime.date:
+        return DATE, numpy.array(values, dtype='datetime64[D]')
+    if value_type is datetime.time:
+        return TIME, numpy.array(list(map(_seconds, values)),
+                                 dtype=numpy.int64)
+    if value_type is str:
+        return STRING, numpy.array(values, dtype=object)
+    return None
+
+
+def _scalar(value, kind):
+    """ Converts a constant to be compared with an array of *kind* """
+
+    if kind == DATE:
+        return numpy.datetime64(value, 'D')
+    if kind == TIME:
+        return _seconds(value)
+    return value
+
+
+class _MaskBuilder(object):
+    """ Walks the python AST of the expression and builds the mask """
+
+    def __init__(self, header, content):
+        self.header = header
+        self.content = content
+
+    def build(self, node):
+        if isinstance(node, ast.Expression):
+            return self.build(node.body)
+        if isinstance(node, ast.BoolOp):
+            masks = [self.build(value) for value in node.values]
+            mask = masks[0]
+            for other in masks[1:]:
+                if isinstance(node.op, ast.And):
+                    mask = mask & other
+                else:
+                    mask = mask | other
+            return mask
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return ~self.build(node.operand)
+        if isinstance(node, ast.Compare) and len(node.ops) == 1:
+            return self.compare(node.left, node.ops[0], node.comparators[0])
+        raise NotVectorizable
+
+    def compare(self, left, op, right):
+        function = COMPARATORS.get(type(op))
+        if function is None:
+            raise NotVectorizable
+        left_kind, left_value = self.operand(left)
+        right_kind, right_value = self.operand(right)
+        if left_kind != right_kind:
+            raise NotVectorizable
+        left_is_column = isinstance(left, ast.Name)
+        right_is_column = isinstance(right, ast.Name)
+        if not left_is_column and not right_is_column:
+            raise NotVectorizable
+        if not left_is_column:
+            left_value = _scalar(left_value, left_kind)
+        if not right_is_column:
+            right_value = _scalar(right_value, right_kind)
+        return numpy.asarray(function(left_value, right_value), dtype=bool)
+
+    def operand(self, node):
+        """ Returns the kind and the value (NumPy array for fields) """
+
+        if isinstance(node, ast.Name):
+            if node.id not in self.header:
+                raise NotVectorizable
+            column = self.header.index(node.id)
+            try:
+                # The array is cached until the content changes
+                column_array = self.content.typed_array(column,
+                                                        _column_array)
+            except (OverflowError, TypeError, ValueError):
+                raise NotVectorizable
+            if column_array is None:
+                raise NotVectorizable
+            return column_array
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            kind, value = self.operand(node.operand)
+            if kind != NUMBER or isinstance(node.operand, ast.Name):
+                raise NotVectorizable
+            return kind, -value
+        if isinstance(node, ast.Call):
+            return self.constructor(node)
+        value = _constant(node)
+        if isinstance(value, bool):
+            raise NotVectorizable
+        return _kind(type(value)), value
+
+    def constructor(self, node):
+        """ datetime.date(...) and datetime.time(...) constants """
+
+        func = node.func
+        if (not isinstance(func, ast.Attribute) or
+                not isinstance(func.value, ast.Name) or
+                func.value.id != 'datetime' or
+                func.attr not in CONSTRUCTORS or node.keywords):
+            raise NotVectorizable
+        args = []
+        for arg in node.args:
+            args.append(_constant(arg))
+        value = CONSTRUCTORS[func.attr](*args)
+        return _kind(type(value)), value
+
+
+def select_indexes(expression, header, content):
+    """ Evaluates *expression* over the columns of *content*
+
+    :param expression: A python valid expression
+    :param header: The field names of the relation
+    :param content: Content or ColumnarContent object
+    :returns: A list with the positions of the tuples that satisfy the
+              expression, or None if the expression can't be vectorized
+    """
+
+    if not ENABLED:
+        return None
+    global numpy
+    if numpy is None:
+        import numpy
+    try:
+        tree = ast.parse(expression, mode='eval')
+        mask = _MaskBuilder(header, content).build(tree)
+    except (NotVectorizable, SyntaxError, TypeError, OverflowError):
+        return None
+    if mask.shape != (len(content),):
+        return None
+    return numpy.flatnonzero(mask).tolist()
@@ -18,7 +18,6 @@
 # along with Pireal; If not, see <http://www.gnu.org/licenses/>.
 
 import os
-import csv
 
 from PyQt5.QtWidgets import (
     QWidget,
@@ -33,6 +32,8 @@ from src.core import (
     settings,
     file_manager,
     pfile,
+    pdbx,
+    lazy
 )
 from src.core.logger import Logger
 from src.gui.main_window import Pireal
@@ -155,11 +156,11 @@ class CentralWidget(QWidget):
         # If filename provide
         try:
             logger.debug("Intentando abrir el archivo {}".format(filename))
-            # Read pdb file
+            # Only the index of the relations is read, the tuples are
+            # read when they are used (see src.core.lazy)
             pfile_object = pfile.File(filename)
-            db_data = pfile_object.read()
-            # Create a dict to manipulate data more easy
-            db_data = self.__sanitize_data(db_data)
+            relations = lazy.open_database(
+                filename, settings.PSetting.COLUMNAR_STORAGE)
         except Exception as reason:
             QMessageBox.information(self,
                                     self.tr("The file couldn't be open"),
@@ -172,7 +173,7 @@ class CentralWidget(QWidget):
         db_container = database_container.DatabaseContainer()
 
         try:
-            db_container.create_database(db_data)
+            db_container.create_database(relations)
         except Exception as reason:
             QMessageBox.information(self,
                                     self.tr("Error"),
@@ -228,44 +229,6 @@ class CentralWidget(QWidget):
     def save_query_as(self):
         pass
 
-    def __sanitize_data(self, data):
-        """
-        Este método convierte el contenido de la base de datos a un
-        diccionario para un mejor manejo despues
-        """
-
-        # FIXME: controlar cuando al final de la línea hay una coma
-        data_dict = {'tables': []}
-
-        for line_count, line in enumerate(data.splitlines()):
-            # Ignore blank lines
-            if not line:
-                continue
-            if line.startswith('@'):
-                # Esta línea es el header de una relación
-                tpoint = line.find(':')
-                if tpoint == -1:
-                    raise Exception("Invalid syntax at line {}".format(
-                        line_count + 1))
-
-                table_name, line = line.split(':')
-                table_name = table_name[1:].strip()
-                table_dict = {}
-                table_dict['name'] = table_name
-                table_dict['header'] = list(map(str.strip, line.split(',')))
-
-                table_dict['tuples'] = []
-
-            else:
-                for l in csv.reader([line]):
-                    # Remove spaces
-                    tupla = list(map(str.strip, l))
-                    table_dict['tuples'].append(tupla)
-            if not table_dict['tuples']:
-                data_dict['tables'].append(table_dict)
-
-        return data_dict
-
     def remove_last_widget(self):
         """ Remove last widget from stacked """
 
@@ -359,6 +322,14 @@ class CentralWidget(QWidget):
         db_container = self.get_active_db()
         db_container.execute_queries()
 
+    def explain_queries(self):
+        db_container = self.get_active_db()
+        db_container.explain_queries()
+
+    def cancel_queries(self):
+        db_container = self.get_active_db()
+        db_container.cancel_queries()
+
     def execute_selection(self):
         db_container = self.get_active_db()
         db_container.execute_selection()
@@ -371,10 +342,9 @@ class CentralWidget(QWidget):
 
         # Get relations dict
         relations = db.table_widget.relations
-        # Generate content
-        content = file_manager.generate_database(relations)
-        db.pfile.save(data=content)
+        # The relations are written directly in the file
         filename = db.pfile.filename
+        file_manager.write_database(filename, relations)
         # Emit signal
         self.databaseSaved.emit(
             self.tr("Database saved: {}".format(filename)))
@@ -382,22 +352,23 @@ class CentralWidget(QWidget):
         db.modified = False
 
     def save_database_as(self):
-        filter = settings.SUPPORTED_FILES.split(';;')[0]
-        filename, _ = QFileDialog.getSaveFileName(self,
-                                                  self.tr("Save Database As"),
-                                                  settings.PIREAL_DATABASES,
-                                                  filter)
+        filename, selected = QFileDialog.getSaveFileName(
+            self, self.tr("Save Database As"), settings.PIREAL_DATABASES,
+            settings.DATABASE_FORMATS)
         if not filename:
             return
         db = self.get_active_db()
         # Get relations
         relations = db.table_widget.relations
-        # Content
-        content = file_manager.generate_database(relations)
-        # Si no se provee la extensión, le agrego
+        # Si no se provee la extensión, le agrego la del formato elegido
         if not os.path.splitext(filename)[1]:
-            filename += '.pdb'
-        db.pfile.save(content, filename)
+            if pdbx.EXTENSION in selected:
+                filename += pdbx.EXTENSION
+            else:
+                filename += '.pdb'
+        file_manager.write_database(filename, relations)
+        db.pfile.filename = filename
+        db.pfile.is_new = False
         self.databaseSaved.emit(
             self.tr("Database saved: {}".format(db.pfile.filename)))
 
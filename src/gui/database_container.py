@@ -47,7 +47,8 @@ from src.core import (
     relation,
     pfile,
     file_manager,
-    settings
+    settings,
+    lazy
 )
 from src.core.logger import Logger
 
@@ -97,19 +98,18 @@ class DatabaseContainer(QSplitter):
     def is_new(self):
         return self.pfile.is_new
 
-    def create_database(self, data):
-        for table in data.get('tables'):
-            # Get data
-            table_name = table.get('name')
-            header = table.get('header')
-            tuples = table.get('tuples')
+    def create_database(self, relations):
+        """ Se agregan las relaciones leídas del archivo
 
-            # Creo el objeto Relation
-            rela = relation.Relation()
-            rela.header = header
-            # Relleno el objeto con las tuplas
-            for _tuple in tuples:
-                rela.insert(_tuple)
+        :param relations: Ordered dictionary (relation name: Relation),
+                          see lazy.open_database
+        """
+
+        for table_name, rela in relations.items():
+            # Los valores se castean una sola vez, no en cada consulta.
+            # Las relaciones de src.core.lazy se castean cuando se leen
+            if not isinstance(rela, lazy.LazyRelation):
+                rela.infer_types()
 
             # Se usa el patrón Modelo/Vista/Delegado
             # Para entender más, leer el código de cáda módulo
@@ -157,10 +157,12 @@ class DatabaseContainer(QSplitter):
             with open(filename) as f:
                 csv_reader = csv.reader(f)
                 header = next(csv_reader)
-                rel = relation.Relation()
+                rel = relation.Relation(
+                    columnar=settings.PSetting.COLUMNAR_STORAGE)
                 rel.header = header
                 for i in csv_reader:
                     rel.insert(i)
+                rel.infer_types()
                 relation_name = file_manager.get_basename(filename)
                 if not self.table_widget.add_relation(relation_name, rel):
                     QMessageBox.information(self, self.tr("Information"),
@@ -228,8 +230,10 @@ class DatabaseContainer(QSplitter):
                     reg.append(model.item(i, j).text())
             # Insert new content
             rela.insert(reg)
+        rela.touch()
         # Update relation
         self.table_widget.relations[current_relation] = rela
+        self.table_widget.update_statistics(current_relation)
 
     def new_query(self, filename):
         editor_tab_at = self.query_container.is_open(filename)
@@ -282,6 +286,12 @@ class DatabaseContainer(QSplitter):
     def execute_queries(self):
         self.query_container.execute_queries()
 
+    def explain_queries(self):
+        self.query_container.explain_queries()
+
+    def cancel_queries(self):
+        self.query_container.cancel_queries()
+
     def execute_selection(self):
         editor = self.query_container.currentWidget().get_editor()
         text_cursor = editor.textCursor()
@@ -184,6 +184,8 @@ class Pireal(QMainWindow):
         self.set_enabled_relation_actions(False)
         self.set_enabled_query_actions(False)
         self.set_enabled_editor_actions(False)
+        # Enabled while the queries are running
+        Pireal.get_action("cancel_queries").setEnabled(False)
 
     def __install_toolbar(self, toolbar_items):
         for action in Pireal.TOOLBAR_ITEMS:
@@ -265,6 +267,7 @@ class Pireal(QMainWindow):
 
         actions = [
             'execute_queries',
+            'explain_queries',
             'save_query'
         ]
 
@@ -125,7 +125,13 @@ MENU['relation'] = {
         'slot': "central:delete_column"
     }, "-", {
         'name': translate("Pireal", "Execute Queries"),
-        'slot': "central:execute_queries"}]}
+        'slot': "central:execute_queries"
+    }, {
+        'name': translate("Pireal", "Explain Queries"),
+        'slot': "central:explain_queries"
+    }, {
+        'name': translate("Pireal", "Cancel Queries"),
+        'slot': "central:cancel_queries"}]}
 
 
 # Menu Help
@@ -76,12 +76,15 @@ class Model(QAbstractTableModel):
     def setData(self, index, value, role):
         """ Método reimplementado.
         Este método actualiza el modelo """
+        if not self.editable:
+            return False
         if index.isValid() and role == Qt.EditRole:
             modified = False
             old_value = self.__data.content[index.row()][index.column()]
             if value != old_value:
                 # Si son distintos los datos, actualizo
                 self.__data.update(index.row(), index.column(), value)
+                self.__data.touch()
                 modified = True
             # Emito la señal
             self.dataChanged.emit(index, index)
@@ -100,12 +103,15 @@ class Model(QAbstractTableModel):
         """ Método reimplementado.
         Actualiza el nombre de una columna """
 
+        if not self.editable:
+            return False
         if role == Qt.DisplayRole:
             modified = False
             old_value = self.__data.header[section]
             if value != old_value:
                 # Actualizo el nuevo dato
                 self.__data.header[section] = value
+                self.__data.touch()
                 modified = True
             # Emito la señal
             self.headerDataChanged.emit(orientation, section, section)
@@ -128,6 +134,7 @@ class Model(QAbstractTableModel):
 
         self.beginInsertRows(QModelIndex(), position, position)
         self.__data.append_row()
+        self.__data.touch()
         self.cardinalityChanged.emit(self.__data.cardinality())
         self.set_modified(True)
         self.endInsertRows()
@@ -138,6 +145,7 @@ class Model(QAbstractTableModel):
 
         self.beginInsertColumns(QModelIndex(), position, position)
         self.__data.append_column()
+        self.__data.touch()
         self.set_modified(True)
         self.endInsertColumns()
 
@@ -148,6 +156,7 @@ class Model(QAbstractTableModel):
 
         self.beginRemoveRows(QModelIndex(), row, row)
         del self.__data.content[row]
+        self.__data.touch()
         self.cardinalityChanged.emit(self.__data.cardinality())
         self.set_modified(True)
         self.endRemoveRows()
@@ -158,6 +167,7 @@ class Model(QAbstractTableModel):
 
         self.beginRemoveColumns(QModelIndex(), col, col)
         self.__data.remove_column(col)
+        self.__data.touch()
         self.set_modified(True)
         self.endRemoveColumns()
 
@@ -167,3 +177,4 @@ class Model(QAbstractTableModel):
 
     def clear(self):
         self.__data.content.clear()
+        self.__data.touch()
@@ -29,19 +29,27 @@ from PyQt5.QtWidgets import (
     QDialog,
     QPushButton,
     QAction,
-    QToolBar
+    QToolBar,
+    QTabWidget,
+    QTreeWidget,
+    QTreeWidgetItem
 )
 from PyQt5.QtCore import (
     Qt,
     pyqtSignal,
+    pyqtSlot,
     QSettings,
-    QSize
+    QSize,
+    QThread
 )
 
 from src.core.interpreter import (
     scanner,
     lexer,
-    parser
+    parser,
+    optimizer,
+    executor,
+    explain
 )
 from src.core.interpreter.exceptions import (
     InvalidSyntaxError,
@@ -53,9 +61,13 @@ from src.gui import lateral_widget
 from src.gui.main_window import Pireal
 from src.gui.query_container import (
     editor,
-    tab_widget
+    tab_widget,
+    worker
+)
+from src.core import (
+    settings,
+    cache
 )
-from src.core import settings
 
 
 class QueryContainer(QWidget):
@@ -77,6 +89,14 @@ class QueryContainer(QWidget):
         box.addWidget(self._tabs)
 
         self.relations = {}
+        # Results of the previous executions
+        self.__cache = cache.ResultCache(settings.PSetting.RESULT_CACHE_SIZE)
+        # The queries are executed in a thread, see execute_queries
+        self._thread = None
+        self._worker = None
+        self.__execution = None
+        # Query widget of the plans of Explain Queries
+        self.__explained = None
 
         self.__hide()
 
@@ -154,8 +174,12 @@ class QueryContainer(QWidget):
     def __on_save_editor(self, editor):
         self.saveEditor.emit(editor)
 
-    def execute_queries(self, query=''):
-        """ This function executes queries """
+    def __compile(self, query=''):
+        """ Parses and optimizes the queries of the current editor
+
+        :returns: A tuple (query widget, relations, executor, queries), or
+                  None if the queries have errors
+        """
 
         # If text is selected, then this text is the query,
         # otherwise the query is all text that has the editor
@@ -165,22 +189,29 @@ class QueryContainer(QWidget):
         else:
             query = editor_widget.toPlainText()
 
-        relations = self.currentWidget().relations
+        widget = self.currentWidget()
         central = Pireal.get_service("central")
         table_widget = central.get_active_db().table_widget
 
-        # Restore
-        relations.clear()
-        self.currentWidget().clear_results()
+        # The results of the previous execution are kept, only the
+        # assignments that changed are executed again (see
+        # Executor.signatures)
+        relations = dict(table_widget.relations)
 
         # Parse query
         sc = scanner.Scanner(query)
         lex = lexer.Lexer(sc)
         try:
             par = parser.Parser(lex)
-            interpreter = parser.Interpreter(par)
-            interpreter.clear()
-            interpreter.to_python()
+            # The headers of the relations are used to optimize the queries
+            schemas = {name: rela.header
+                       for name, rela in table_widget.relations.items()}
+            query_executor = executor.Executor(
+                relations,
+                optimizer.Optimizer(schemas,
+                                    table_widget.current_statistics()),
+                self.__cache)
+            queries = query_executor.compile(par.parse())
         except MissingQuoteError as reason:
             pireal = Pireal.get_service("pireal")
             pireal.show_error_message(
@@ -206,19 +237,152 @@ class QueryContainer(QWidget):
             pireal = Pireal.get_service("pireal")
             pireal.show_error_message(self.parse_error(reason.__str__()))
             return
-        relations.update(table_widget.relations)
-        for relation_name, expression in list(interpreter.SCOPE.items()):
-            try:
-                new_relation = eval(expression, {}, relations)
+        return widget, relations, query_executor, queries
+
+    def execute_queries(self, query=''):
+        """ This function executes queries """
 
-            except Exception as reason:
-                pireal = Pireal.get_service("pireal")
-                pireal.show_error_message(self.parse_error(reason.__str__()),
-                                          syntax_error=False)
-                return
+        if self._thread is not None:
+            # The previous queries are running
+            return
+        compiled = self.__compile(query)
+        if compiled is None:
+            return
+        widget, relations, query_executor, queries = compiled
+
+        signatures = query_executor.signatures(queries)
+        previous = widget.signatures
+        widget.signatures = {}
+        # Remove the results of the assignments that are not in the query
+        for relation_name in list(previous):
+            if relation_name not in queries:
+                widget.remove_table(relation_name)
+        reused = {}
+        for relation_name in queries:
+            signature = signatures[relation_name]
+            if (signature is not None and
+                    previous.get(relation_name) == signature and
+                    relation_name in widget.relations):
+                # Not changed, the table is not drawn again
+                reused[relation_name] = widget.relations[relation_name]
+                widget.signatures[relation_name] = signature
+        # The assignments are executed in a thread, the results are
+        # added when each assignment finishes
+        self.__execution = (widget, relations, queries, signatures,
+                            set(reused))
+        self.__start(worker.QueryWorker(
+            query_executor, queries, reused,
+            settings.PSetting.PARALLEL_EXECUTION))
+
+    def explain_queries(self):
+        """ Executes the queries with EXPLAIN ANALYZE, the plans are shown
+        in the Explain tab of the results. The results are not stored """
+
+        if self._thread is not None:
+            return
+        compiled = self.__compile()
+        if compiled is None:
+            return
+        widget, relations, query_executor, queries = compiled
+        self.__explained = widget
+        self.__start(worker.QueryWorker(query_executor, queries, {},
+                                        explain=True))
+
+    def __start(self, query_worker):
+        """ Runs *query_worker* in a thread """
+
+        self._thread = QThread()
+        self._worker = query_worker
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._worker.relationReady['QString', 'PyQt_PyObject'].connect(
+            self.__on_relation_ready)
+        self._worker.explained['PyQt_PyObject'].connect(self.__on_explained)
+        self._worker.progress['QString', int].connect(self.__on_progress)
+        self._worker.failed['QString'].connect(self.__on_execution_failed)
+        self._worker.cancelled.connect(self.__on_execution_cancelled)
+        self._worker.finished.connect(self.__on_execution_finished)
+        self.__set_running(True)
+        self._thread.start()
+
+    def cancel_queries(self):
+        """ Stops the execution of the queries, the operator that is
+        running finishes with the next tuple """
+
+        if self._worker is not None:
+            self._worker.cancel()
+
+    def __set_running(self, value):
+        Pireal.get_action("execute_queries").setEnabled(not value)
+        Pireal.get_action("explain_queries").setEnabled(not value)
+        Pireal.get_action("cancel_queries").setEnabled(value)
+        # The relations of the database are read by the thread of the
+        # queries, they can't be modified until it finishes
+        Pireal.get_action("close_database").setEnabled(not value)
+        pireal = Pireal.get_service("pireal")
+        pireal.set_enabled_relation_actions(not value)
+        central = Pireal.get_service("central")
+        db = central.get_active_db()
+        if db is not None:
+            db.table_widget.set_editable(not value)
+
+    @pyqtSlot('QString', 'PyQt_PyObject')
+    def __on_relation_ready(self, relation_name, new_relation):
+        widget, relations, queries, signatures, executed = self.__execution
+        executed.add(relation_name)
+        widget.set_table(new_relation, relation_name)
+        widget.signatures[relation_name] = signatures[relation_name]
+
+    @pyqtSlot('PyQt_PyObject')
+    def __on_explained(self, plans):
+        self.__explained.set_plans(plans)
+
+    @pyqtSlot('QString', int)
+    def __on_progress(self, relation_name, rows):
+        status = Pireal.get_service("status")
+        status.show_message(self.tr("Executing {0}: {1} tuples").format(
+            relation_name, rows))
+
+    def __remove_not_executed(self):
+        """ The results from the assignment that failed are not valid """
+
+        widget, relations, queries, signatures, executed = self.__execution
+        names = list(queries)
+        failed = next((name for name in names if name not in executed), None)
+        if failed is None:
+            return
+        for name in names[names.index(failed):]:
+            widget.remove_table(name)
 
-            relations[relation_name] = new_relation
-            self.__add_table(new_relation, relation_name)
+    @pyqtSlot('QString')
+    def __on_execution_failed(self, message):
+        if self.__execution is not None:
+            self.__remove_not_executed()
+        pireal = Pireal.get_service("pireal")
+        pireal.show_error_message(self.parse_error(message),
+                                  syntax_error=False)
+
+    @pyqtSlot()
+    def __on_execution_cancelled(self):
+        if self.__execution is not None:
+            self.__remove_not_executed()
+        status = Pireal.get_service("status")
+        status.show_message(self.tr("Execution cancelled"))
+
+    @pyqtSlot()
+    def __on_execution_finished(self):
+        if self.__execution is not None:
+            widget, relations = self.__execution[:2]
+            widget.relations = relations
+        self._thread.quit()
+        self._thread.wait()
+        self._thread.deleteLater()
+        self._worker.deleteLater()
+        self._thread = None
+        self._worker = None
+        self.__execution = None
+        self.__explained = None
+        self.__set_running(False)
 
     @staticmethod
     def parse_error(text):
@@ -226,9 +390,6 @@ class QueryContainer(QWidget):
 
         return re.sub(r"\'(.*?)\'", r"<b>\1</b>", text)
 
-    def __add_table(self, rela, rname):
-        self.currentWidget().add_table(rela, rname)
-
     def undo(self):
         weditor = self.currentWidget().get_editor()
         if weditor.hasFocus():
@@ -294,13 +455,24 @@ class QueryWidget(QWidget):
         self._hsplitter.addWidget(self._stack_tables)
 
         self.relations = {}
+        # Signatures of the results of the last execution
+        self.signatures = {}
         # Editor widget
         self._editor_widget = EditorWidget(self)
         self._editor_widget.editorModified[bool].connect(
             lambda modified: self.editorModified.emit(modified))
         self._vsplitter.addWidget(self._editor_widget)
 
-        self._vsplitter.addWidget(self._hsplitter)
+        # The tables of the results and the plans of Explain Queries
+        self._results_tabs = QTabWidget()
+        self._results_tabs.setTabPosition(QTabWidget.South)
+        self._results_tabs.addTab(self._hsplitter, self.tr("Results"))
+        self._explain_tree = QTreeWidget()
+        self._explain_tree.setHeaderLabels([
+            self.tr("Operator"), self.tr("Tuples In"), self.tr("Tuples"),
+            self.tr("Time (ms)"), self.tr("Memory")])
+        self._results_tabs.addTab(self._explain_tree, self.tr("Explain"))
+        self._vsplitter.addWidget(self._results_tabs)
         box.addWidget(self._vsplitter)
 
         # Connections
@@ -347,6 +519,7 @@ class QueryWidget(QWidget):
 
     def clear_results(self):
         self._result_list.clear_items()
+        self.signatures.clear()
         i = self._stack_tables.count()
         while i >= 0:
             widget = self._stack_tables.widget(i)
@@ -355,6 +528,74 @@ class QueryWidget(QWidget):
                 widget.deleteLater()
             i -= 1
 
+    def __result_index(self, rname):
+        """ Returns the position of the table of *rname*, or -1 """
+
+        for index in range(self._result_list.topLevelItemCount()):
+            if self._result_list.topLevelItem(index).name == rname:
+                return index
+        return -1
+
+    def remove_table(self, rname):
+        index = self.__result_index(rname)
+        self.signatures.pop(rname, None)
+        if index == -1:
+            return
+        self._result_list.takeTopLevelItem(index)
+        widget = self._stack_tables.widget(index)
+        self._stack_tables.removeWidget(widget)
+        widget.deleteLater()
+
+    def set_table(self, rela, rname):
+        """ Replaces the table of *rname*, or adds it if it doesn't
+        exist """
+
+        index = self.__result_index(rname)
+        if index == -1:
+            self.add_table(rela, rname)
+            return
+        central_widget = Pireal.get_service("central")
+        db = central_widget.get_active_db()
+        _view = db.create_table(rela, rname, editable=False)
+        old_view = self._stack_tables.widget(index)
+        self._stack_tables.removeWidget(old_view)
+        old_view.deleteLater()
+        self._stack_tables.insertWidget(index, _view)
+        self._stack_tables.setCurrentIndex(index)
+        self._results_tabs.setCurrentWidget(self._hsplitter)
+        item = self._result_list.topLevelItem(index)
+        item.ntuples = str(rela.cardinality())
+        item.setText(0, item.display_name)
+
+    def set_plans(self, plans):
+        """ Shows the *plans* (see Executor.explain) in the Explain tab """
+
+        self._explain_tree.clear()
+        for rname, operation in plans.items():
+            item = QTreeWidgetItem(self._explain_tree, [rname])
+            self.__add_operation(item, operation)
+        self._explain_tree.expandAll()
+        for column in range(self._explain_tree.columnCount()):
+            self._explain_tree.resizeColumnToContents(column)
+        self._results_tabs.setCurrentWidget(self._explain_tree)
+
+    def __add_operation(self, parent, operation):
+        values = [operation.label]
+        for value in (operation.rows_in, operation.rows):
+            values.append('' if value is None else str(value))
+        if operation.seconds is None:
+            values.append('')
+        else:
+            values.append("{0:.3f}".format(operation.seconds * 1000))
+        if operation.memory is None:
+            values.append('')
+        else:
+            values.append(explain.format_memory(operation.memory))
+        item = QTreeWidgetItem(parent, values)
+        item.setToolTip(0, ', '.join(operation.header))
+        for child in operation.children:
+            self.__add_operation(item, child)
+
     def add_table(self, rela, rname):
         central_widget = Pireal.get_service("central")
         db = central_widget.get_active_db()
@@ -362,6 +603,7 @@ class QueryWidget(QWidget):
         index = self._stack_tables.addWidget(_view)
         self._stack_tables.setCurrentIndex(index)
         self._result_list.add_item(rname, rela.cardinality())
+        self._results_tabs.setCurrentWidget(self._hsplitter)
 
 
 class EditorWidget(QWidget):
@@ -374,7 +616,9 @@ class EditorWidget(QWidget):
         'cut_action',
         'paste_action',
         '',
-        'execute_queries'
+        'execute_queries',
+        'explain_queries',
+        'cancel_queries'
     ]
 
     editorModified = pyqtSignal(bool)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# The queries are executed in a QThread, so the interface is not blocked.
+# Each result is sent to the main thread with a signal when its
+# assignment finishes, and the execution is stopped with
+# QueryWorker.cancel (see Executor.cancel). With explain the queries are
+# executed with EXPLAIN ANALYZE and the plans are sent when all the
+# assignments finish (see Executor.explain).
+
+from PyQt5.QtCore import (
+    QObject,
+    pyqtSignal
+)
+
+from src.core.interpreter.exceptions import CancelledError
+
+
+class QueryWorker(QObject):
+    """ Executes the compiled *queries* with *query_executor*
+
+    :param results: Known results of some assignments (see
+                    Executor.execute_all)
+    :param parallel: If it's True the assignments are executed in a pool
+                     of processes
+    :param explain: If it's True the plans of the queries are sent
+                    instead of the results
+    """
+
+    # Relation name, relation
+    relationReady = pyqtSignal('QString', 'PyQt_PyObject')
+    # Relation name, number of tuples
+    progress = pyqtSignal('QString', int)
+    # Ordered dictionary (relation name: Operation)
+    explained = pyqtSignal('PyQt_PyObject')
+    # Message
+    failed = pyqtSignal('QString')
+    cancelled = pyqtSignal()
+    finished = pyqtSignal()
+
+    def __init__(self, query_executor, queries, results, parallel=False,
+                 explain=False):
+        QObject.__init__(self)
+        self.query_executor = query_executor
+        self.queries = queries
+        self.results = results
+        self.parallel = parallel
+        self.explain = explain
+        query_executor.interruptible = True
+        query_executor.add_progress_hook(self.progress.emit)
+
+    def run(self):
+        try:
+            if self.explain:
+                self.explained.emit(
+                    self.query_executor.explain(self.queries, analyze=True))
+            else:
+                self.__execute()
+        except CancelledError:
+            self.cancelled.emit()
+        except Exception as reason:
+            self.failed.emit(reason.__str__())
+        self.finished.emit()
+
+    def __execute(self):
+        if self.parallel:
+            results = self.query_executor.run_parallel(self.queries,
+                                                       self.results)
+        else:
+            results = self.query_executor.execute_all(self.queries,
+                                                      self.results)
+        # The queries are executed as lazy plans, only the result of each
+        # assignment is stored
+        for relation_name, new_relation in results:
+            self.relationReady.emit(relation_name, new_relation)
+
+    def cancel(self):
+        """ Called from the main thread """
+
+        self.query_executor.cancel()
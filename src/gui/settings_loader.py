@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015-2016 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+# Loads the settings of the interface with QSettings. The values are
+# stored in src.core.settings.PSetting, which doesn't import PyQt5, so the
+# core (and pireal-run) can be used without Qt.
+
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import QSettings
+
+from src.core import (
+    relation,
+    settings
+)
+from src.core.settings import PSetting
+
+
+def default_font():
+    # FIXME: for Mac Os
+    if settings.LINUX:
+        return QFont("Monospace", 12)
+    return QFont("Courier", 10)
+
+
+def load_settings():
+    """ Load settings from INI file """
+
+    qs = QSettings(settings.SETTINGS_PATH, QSettings.IniFormat)
+    PSetting.LANGUAGE = qs.value('language', "", type='QString')
+    PSetting.RECENT_DBS = qs.value('recent_databases', [], type='QStringList')
+    PSetting.LAST_OPEN_FOLDER = qs.value('last_open_folder',
+                                         None, type='QString')
+    PSetting.HIGHLIGHT_CURRENT_LINE = qs.value('highlight_current_line',
+                                               False, type=bool)
+    PSetting.MATCHING_PARENTHESIS = qs.value('matching_parenthesis',
+                                             True, type=bool)
+    PSetting.COLUMNAR_STORAGE = qs.value('columnar_storage',
+                                         False, type=bool)
+    PSetting.RESULT_CACHE_SIZE = qs.value('result_cache_size',
+                                          PSetting.RESULT_CACHE_SIZE,
+                                          type=int)
+    PSetting.PARALLEL_EXECUTION = qs.value('parallel_execution',
+                                           False, type=bool)
+    PSetting.PARTITIONED_JOIN_ROWS = qs.value('partitioned_join_rows',
+                                              PSetting.PARTITIONED_JOIN_ROWS,
+                                              type=int)
+    relation.PARTITIONED_JOIN_ROWS = PSetting.PARTITIONED_JOIN_ROWS
+    PSetting.FONT = qs.value('font', None)
+    if PSetting.FONT is None:
+        PSetting.FONT = default_font()
@@ -22,6 +22,10 @@ from PyQt5.QtWidgets import (
     QVBoxLayout,
     QStackedWidget
 )
+from src.core import (
+    stats,
+    lazy
+)
 from src.gui import (
     view,
     model,
@@ -38,6 +42,11 @@ class TableWidget(QWidget):
         vbox.setContentsMargins(0, 0, 0, 0)
 
         self.relations = {}
+        # Statistics of the relations, used to optimize the queries
+        self.statistics = {}
+        # Version of each relation (and if its tuples were read) when its
+        # statistics were collected
+        self.__versions = {}
 
         # Stack
         self.stacked = QStackedWidget()
@@ -56,13 +65,39 @@ class TableWidget(QWidget):
 
     def remove_relation(self, name):
         del self.relations[name]
+        self.statistics.pop(name, None)
+        self.__versions.pop(name, None)
 
     def add_relation(self, name, rela):
         if self.relations.get(name, None) is None:
             self.relations[name] = rela
+            self.update_statistics(name)
             return True
         return False
 
+    def update_statistics(self, name):
+        """ Collects the statistics of the relation *name* """
+
+        rela = self.relations[name]
+        loaded = not isinstance(rela, lazy.LazyRelation) or rela.loaded
+        if loaded:
+            self.statistics[name] = stats.collect(rela)
+        else:
+            # The tuples are not read until a query uses them
+            self.statistics[name] = stats.estimate(rela)
+        self.__versions[name] = (rela.version, loaded)
+
+    def current_statistics(self):
+        """ Returns the statistics of the relations. The statistics of the
+        relations that were edited (see Relation.touch) or read since they
+        were collected are collected again """
+
+        for name, rela in self.relations.items():
+            loaded = not isinstance(rela, lazy.LazyRelation) or rela.loaded
+            if self.__versions.get(name) != (rela.version, loaded):
+                self.update_statistics(name)
+        return self.statistics
+
     def add_table(self, rela, name, table):
         """ Add new table from New Relation Dialog """
 
@@ -118,6 +153,16 @@ class TableWidget(QWidget):
                         model.removeColumn(current)
                     i -= 1
 
+    def set_editable(self, value):
+        """ Enables or disables the edition of the tables. The relations
+        are not edited while the queries are running, the thread of the
+        queries reads them (and their casted values) """
+
+        for index in range(self.count()):
+            table = self.stacked.widget(index)
+            table.model().editable = value
+            table.horizontalHeader().editable = value
+
     def create_table(self, rela, editable=True):
         """ Se crea la vista y el modelo """
 
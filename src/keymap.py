@@ -49,5 +49,7 @@ KEYMAP = {
     'remove_relation': QKeySequence(Qt.CTRL + Qt.ALT + Qt.Key_W),
     'load_relation': QKeySequence(Qt.CTRL + Qt.ALT + Qt.Key_O),
     'execute_queries': QKeySequence(Qt.CTRL + Qt.Key_R),
+    'cancel_queries': QKeySequence(Qt.CTRL + Qt.SHIFT + Qt.Key_R),
+    'explain_queries': QKeySequence(Qt.CTRL + Qt.Key_E),
     'execute_selection': QKeySequence(Qt.CTRL + Qt.Key_F6)
 }
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import json
+import random
+import shutil
+import datetime
+import tempfile
+import unittest
+from collections import Counter
+from contextlib import redirect_stdout
+from benchmarks import (
+    generator,
+    run
+)
+from src.core.interpreter import (
+    scanner,
+    lexer,
+    parser
+)
+
+
+class GeneratorTestCase(unittest.TestCase):
+
+    def test_reproducible(self):
+        r1 = generator.generate_relation(50, key_range=10, seed=7)
+        r2 = generator.generate_relation(50, key_range=10, seed=7)
+        r3 = generator.generate_relation(50, key_range=10, seed=8)
+        self.assertEqual(list(r1.content), list(r2.content))
+        self.assertNotEqual(list(r1.content), list(r3.content))
+
+    def test_types(self):
+        relation = generator.generate_relation(50)
+        self.assertEqual(['id', 'a1', 'a2', 'a3', 'a4', 'a5'],
+                         relation.header)
+        self.assertEqual([int, int, float, str, datetime.date,
+                          datetime.time], relation.infer_types())
+        self.assertEqual(list(range(1, 51)),
+                         relation.content.typed_column(0))
+
+    def test_skew(self):
+        uniform = Counter(generator.zipf_keys(random.Random(0), 1000, 100, 0))
+        skewed = Counter(generator.zipf_keys(random.Random(0), 1000, 100, 2))
+        self.assertTrue(set(skewed) <= set(range(1, 101)))
+        self.assertEqual(1, skewed.most_common(1)[0][0])
+        self.assertGreater(skewed[1], 3 * uniform[1])
+
+    def test_database(self):
+        relations = generator.generate_database(1000)
+        r, s, t = relations['r'], relations['s'], relations['t']
+        self.assertEqual(1000, r.cardinality())
+        self.assertEqual(50, s.cardinality())
+        self.assertEqual(500, r.intersect(t).cardinality())
+        product = relations['p'].product(relations['u'])
+        self.assertEqual(1000, product.cardinality())
+        self.assertLess(r.njoin(s).cardinality(), r.cardinality())
+
+    def test_queries(self):
+        text = generator.generate_queries(len(generator.QUERIES))
+        tree = parser.Parser(lexer.Lexer(scanner.Scanner(text))).parse()
+        self.assertEqual(len(generator.QUERIES), len(tree.children))
+
+
+class RunTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.output = os.path.join(self.path, 'results.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def main(self, *args):
+        with redirect_stdout(io.StringIO()):
+            return run.main(['-s', '20', '40', '-r', '2', '-b', 'njoin',
+                             '-b', 'load_pdb'] + list(args))
+
+    def test_results(self):
+        self.assertEqual(0, self.main('-o', self.output))
+        with open(self.output) as _file:
+            results = json.load(_file)
+        self.assertEqual(run.FORMAT_VERSION, results['version'])
+        self.assertEqual(
+            [('njoin', 20), ('load_pdb', 20), ('njoin', 40),
+             ('load_pdb', 40)],
+            [(item['name'], item['size']) for item in results['results']])
+        for item in results['results']:
+            self.assertEqual(2, len(item['times']))
+            self.assertEqual(min(item['times']), item['seconds'])
+
+    def test_compare(self):
+        self.main('-o', self.output)
+        with open(self.output) as _file:
+            results = json.load(_file)
+        self.assertEqual(0, self.main('--compare', self.output,
+                                      '--threshold', '1000'))
+        for item in results['results']:
+            item['seconds'] /= 100
+        with open(self.output, 'w') as _file:
+            json.dump(results, _file)
+        self.assertEqual(1, self.main('--compare', self.output))
+
+
+if __name__ == "__main__":
+    unittest.main()
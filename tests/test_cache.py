@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from src.core import (
+    relation,
+    cache
+)
+from src.core.interpreter import (
+    parser,
+    scanner,
+    lexer,
+    executor
+)
+
+
+class CacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.p = relation.Relation()
+        self.p.header = ['id', 'name', 'age']
+        for t in [['1', 'Gabriel', '26'], ['2', 'Rodrigo', '30'],
+                  ['3', 'Mariano', '21']]:
+            self.p.insert(t)
+        self.cache = cache.ResultCache()
+
+    def run_query(self, query):
+        tree = parser.Parser(lexer.Lexer(scanner.Scanner(query))).parse()
+        query_executor = executor.Executor({'p': self.p}, cache=self.cache)
+        return query_executor.run(tree)
+
+    def test_same_query(self):
+        first = self.run_query("q1 := select age > 25 (p);")
+        second = self.run_query("q1 := select   age > 25 (p);")
+        self.assertIs(first['q1'], second['q1'])
+        self.assertEqual(1, self.cache.hits)
+
+    def test_subexpression(self):
+        self.run_query("q1 := select age > 25 (p);")
+        results = self.run_query("q2 := project name (select age > 25 (p));")
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual([['Gabriel'], ['Rodrigo']],
+                         results['q2'].content.content)
+
+    def test_dependent_assignments(self):
+        query = "q1 := select age > 25 (p); q2 := project name (q1);"
+        first = self.run_query(query)
+        second = self.run_query(query)
+        self.assertIs(first['q2'], second['q2'])
+
+    def test_modified_relation(self):
+        first = self.run_query("q1 := select age > 25 (p);")
+        self.p.update(2, 2, '40')
+        self.p.touch()
+        second = self.run_query("q1 := select age > 25 (p);")
+        self.assertIsNot(first['q1'], second['q1'])
+        self.assertEqual(3, second['q1'].cardinality())
+
+    def test_modified_result(self):
+        first = self.run_query("q1 := select age > 25 (p);")
+        # The result is edited in the interface
+        first['q1'].update(0, 1, 'Gabo')
+        first['q1'].touch()
+        second = self.run_query("q1 := select age > 25 (p);")
+        self.assertIsNot(first['q1'], second['q1'])
+        self.assertEqual(0, self.cache.hits)
+        self.assertEqual([['1', 'Gabriel', '26'], ['2', 'Rodrigo', '30']],
+                         second['q1'].content.content)
+
+    def test_lru(self):
+        size = cache.relation_size(self.p)
+        lru = cache.ResultCache(size * 2)
+        lru.put('a', self.p)
+        lru.put('b', self.p)
+        lru.get('a')
+        lru.put('c', self.p)
+        self.assertIn('a', lru)
+        self.assertNotIn('b', lru)
+        self.assertIn('c', lru)
+        self.assertEqual(size * 2, lru.size)
+
+    def test_bigger_than_budget(self):
+        lru = cache.ResultCache(1)
+        lru.put('a', self.p)
+        self.assertEqual(0, len(lru))
+
+    def test_relation_size(self):
+        empty = relation.Relation()
+        empty.header = ['id', 'name', 'age']
+        self.assertGreater(cache.relation_size(self.p),
+                           cache.relation_size(empty))
+
+
+if __name__ == "__main__":
+    unittest.main()
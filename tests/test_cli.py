@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import os
+import sys
+import csv
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+from contextlib import redirect_stdout, redirect_stderr
+from src import cli
+from src.core import file_manager
+
+
+class CliTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.database = os.path.join(self.folder, 'database.pdb')
+        with open(self.database, 'w') as f:
+            f.write('@people:id, name, age\n1, Gabriel, 26\n2, Rodrigo, 30\n'
+                    '\n@skills:id, skill\n1, Python\n2, Go\n')
+        self.queries = os.path.join(self.folder, 'queries.pqf')
+        with open(self.queries, 'w') as f:
+            f.write("% Comment\nq1 := select age > 27 (people);\n"
+                    "q2 := project name, skill (q1 njoin skills);\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def run_cli(self, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            code = cli.main([self.database, self.queries] + list(args))
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_stdout(self):
+        code, stdout, stderr = self.run_cli('-r', 'q2')
+        self.assertEqual(0, code)
+        self.assertEqual('@q2:name,skill\nRodrigo,Go\n', stdout)
+        self.assertIn('q1: 1 tuples in', stderr)
+        self.assertIn('q2: 1 tuples in', stderr)
+
+    def test_database(self):
+        output = os.path.join(self.folder, 'results.pdbx')
+        code, stdout, stderr = self.run_cli('-o', output, '--quiet')
+        self.assertEqual(0, code)
+        self.assertEqual('', stderr)
+        results = file_manager.read_database(output)
+        self.assertEqual(['q1', 'q2'], list(results))
+        self.assertEqual([['2', 'Rodrigo', '30']],
+                         results['q1'].content.content)
+
+    def test_csv(self):
+        output = os.path.join(self.folder, 'results')
+        self.assertEqual(0, self.run_cli('-o', output, '-r', 'q1')[0])
+        self.assertEqual(['q1.csv'], os.listdir(output))
+        with open(os.path.join(output, 'q1.csv'), newline='') as f:
+            self.assertEqual([['id', 'name', 'age'], ['2', 'Rodrigo', '30']],
+                             list(csv.reader(f)))
+
+    def test_errors(self):
+        code, stdout, stderr = self.run_cli('-r', 'q3')
+        self.assertEqual(1, code)
+        self.assertIn("'q3' is not an assignment", stderr)
+        with open(self.queries, 'w') as f:
+            f.write("q1 := people njoin x;")
+        code, stdout, stderr = self.run_cli()
+        self.assertEqual(1, code)
+        self.assertIn("name 'x' is not defined", stderr)
+
+    def test_convert(self):
+        output = os.path.join(self.folder, 'database.pdbx')
+        self.assertEqual(0, cli.main([self.database, '--convert', output]))
+        expected = file_manager.read_database(self.database)
+        converted = file_manager.read_database(output)
+        self.assertEqual(list(expected), list(converted))
+        self.assertEqual(expected['skills'].content.content,
+                         converted['skills'].content.content)
+
+    def test_statistics(self):
+        relations = file_manager.read_database(self.database)
+        query_executor, queries = cli.compile_queries(
+            "q1 := select age > 27 (people);", relations)
+        statistics = query_executor.optimizer.statistics
+        self.assertEqual(2, statistics['people'].cardinality)
+        self.assertEqual(30, statistics['people'].maximum['age'])
+        self.assertNotIn('skills', statistics)
+
+    def test_explain(self):
+        code, stdout, stderr = self.run_cli('-r', 'q2', '--explain')
+        self.assertEqual(0, code)
+        self.assertEqual('q2:', stdout.splitlines()[0])
+        self.assertIn('-> scan skills  (rows=2, fields=id, skill)', stdout)
+        code, stdout, stderr = self.run_cli('--analyze', '--json')
+        self.assertEqual(0, code)
+        plans = json.loads(stdout)
+        self.assertEqual(['q1', 'q2'], list(plans))
+        self.assertEqual((2, 1), (plans['q1']['rows_in'],
+                                  plans['q1']['rows']))
+
+    def test_pipe(self):
+        # The standard output is not seekable
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.check_output(
+            [sys.executable, os.path.join(root, 'pireal-run'),
+             self.database, self.queries, '-r', 'q2', '-q'])
+        self.assertEqual(b'@q2:name,skill\nRodrigo,Go\n', output)
+
+    def test_without_qt(self):
+        code = ("import sys; import src.cli; "
+                "sys.exit('PyQt5' in sys.modules)")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(0, subprocess.call([sys.executable, '-c', code],
+                                            cwd=root))
+
+
+if __name__ == "__main__":
+    unittest.main()
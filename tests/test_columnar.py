@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from src.core import relation
+from src.core import columnar
+
+
+def make_relation(header, data, columnar_storage=True):
+    rela = relation.Relation(columnar=columnar_storage)
+    rela.header = header
+    for t in data:
+        rela.insert(t)
+    return rela
+
+
+class ColumnarTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.r1 = make_relation(
+            ['id', 'name', 'city'],
+            [['1', 'Gabriel', 'Belén'], ['23', 'Rodrigo', 'Belén']])
+        self.r2 = make_relation(
+            ['id', 'skill'],
+            [['3', 'Ruby'], ['1', 'Python']])
+
+    def test_content(self):
+        self.assertIsInstance(self.r1.content, columnar.ColumnarContent)
+        self.assertEqual(self.r1.content[1][0], '23')
+        self.assertEqual(self.r1.cardinality(), 2)
+        self.assertEqual(self.r1.content.content,
+                         [['1', 'Gabriel', 'Belén'],
+                          ['23', 'Rodrigo', 'Belén']])
+
+    def test_dictionary_encoding(self):
+        city = self.r1.content.columns[2]
+        self.assertEqual(city.dictionary.values, ['Belén'])
+        self.assertEqual(list(city.codes), [0, 0])
+
+    def test_selection(self):
+        rselect = self.r1.select("id == 23")
+        self.assertTrue(rselect.columnar)
+        self.assertEqual([['23', 'Rodrigo', 'Belén']],
+                         rselect.content.content)
+
+    def test_projection_shares_columns(self):
+        rproject = self.r1.project('name')
+        self.assertIs(rproject.content.columns[0],
+                      self.r1.content.columns[1])
+        self.assertEqual([['Gabriel'], ['Rodrigo']],
+                         rproject.content.content)
+
+    def test_copy_on_write(self):
+        rproject = self.r1.project('name')
+        rproject.update(0, 0, 'Gabo')
+        self.assertEqual('Gabo', rproject.content[0][0])
+        self.assertEqual('Gabriel', self.r1.content[0][1])
+
+    def test_same_results_as_rows(self):
+        rows1 = make_relation(self.r1.header, self.r1.content.content, False)
+        rows2 = make_relation(self.r2.header, self.r2.content.content, False)
+        for operation in ('njoin', 'louter', 'router', 'fouter'):
+            expected = getattr(rows1, operation)(rows2)
+            result = getattr(self.r1, operation)(self.r2)
+            self.assertEqual(expected.content.content,
+                             result.content.content)
+
+    def test_remove_row_and_column(self):
+        del self.r1.content[0]
+        self.r1.remove_column(1)
+        self.assertEqual([['23', 'Belén']], self.r1.content.content)
+        self.r1.append_row()
+        self.assertEqual(['null', 'null'], self.r1.content[1])
+
+    def test_empty_relation(self):
+        empty = make_relation(['id', 'name'], [])
+        self.assertEqual(2, len(empty.content.columns))
+        self.assertEqual([], empty.select("id > 1").content.content)
+        rselect = self.r1.select("id > 100").select("id != 3")
+        self.assertEqual(0, rselect.cardinality())
+        self.assertEqual([], rselect.njoin(self.r2).select(
+            "skill == 'Ruby'").content.content)
+
+    def test_append_column_to_empty_relation(self):
+        empty = make_relation(['id', 'name'], [])
+        empty.append_column()
+        empty.insert(['1', '2', 'null'])
+        self.assertEqual([['1', '2', 'null']], empty.content.content)
+
+    def test_remove_column_of_empty_relation(self):
+        empty = make_relation(['id', 'name'], [])
+        empty.remove_column(0)
+        self.assertEqual(['name'], empty.header)
+        empty.insert(['Gabriel'])
+        self.assertEqual([['Gabriel']], empty.content.content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import threading
+import unittest
+import multiprocessing
+from collections import OrderedDict
+
+from src.core import relation
+from src.core.interpreter import (
+    parser,
+    scanner,
+    lexer,
+    optimizer,
+    executor
+)
+from src.core.interpreter.exceptions import (
+    DuplicateRelationNameError,
+    CancelledError
+)
+
+
+class ExecutorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.p = relation.Relation()
+        self.p.header = ['id', 'name', 'age']
+        for t in [['1', 'Gabriel', '26'], ['2', 'Rodrigo', '30'],
+                  ['3', 'O"Neil', '21']]:
+            self.p.insert(t)
+        self.s = relation.Relation()
+        self.s.header = ['id', 'skill']
+        for t in [['1', 'Python'], ['3', 'Go'], ['1', 'C']]:
+            self.s.insert(t)
+        self.relations = {'p': self.p, 's': self.s}
+
+    def parse(self, query):
+        return parser.Parser(lexer.Lexer(scanner.Scanner(query))).parse()
+
+    def run_query(self, query, query_executor=None):
+        if query_executor is None:
+            query_executor = executor.Executor(dict(self.relations))
+        return query_executor.run(self.parse(query))
+
+    def test_run(self):
+        results = self.run_query(
+            "q1 := project name (select age > 25 (p));"
+            "q2 := q1 njoin (project id, name (p)) njoin s;")
+        self.assertEqual(['q1', 'q2'], list(results))
+        self.assertEqual([['Gabriel'], ['Rodrigo']],
+                         results['q1'].content.content)
+        self.assertEqual(['name', 'id', 'skill'], results['q2'].header)
+        self.assertEqual([['Gabriel', '1', 'Python'],
+                          ['Gabriel', '1', 'C']],
+                         results['q2'].content.content)
+
+    def test_quotes(self):
+        # The string generation breaks with a double quote
+        results = self.run_query("q := select name = 'O\"Neil' (p);")
+        self.assertEqual([['3', 'O"Neil', '21']],
+                         results['q'].content.content)
+
+    def test_optimizer(self):
+        schemas = {name: rela.header for name, rela in self.relations.items()}
+        query_executor = executor.Executor(dict(self.relations),
+                                           optimizer.Optimizer(schemas))
+        query = "q := project name, skill (select age < 30 (p njoin s));"
+        expected = self.run_query(query)
+        results = self.run_query(query, query_executor)
+        self.assertEqual(expected['q'].content.content,
+                         results['q'].content.content)
+
+    def test_duplicate_name(self):
+        self.assertRaises(DuplicateRelationNameError, self.run_query,
+                          "q := p; q := s;")
+
+    def test_undefined_relation(self):
+        self.assertRaises(NameError, self.run_query, "q := p njoin x;")
+
+    def test_hooks(self):
+        nodes = []
+        query_executor = executor.Executor(dict(self.relations))
+        query_executor.add_hook(
+            lambda node, rows, seconds: nodes.append(
+                (node.__class__.__name__, rows)))
+        self.run_query("q := project name (select age > 25 (p njoin s));",
+                       query_executor)
+        self.assertEqual([('BinaryOp', 3), ('SelectExpr', 2),
+                          ('ProjectExpr', 2)], nodes)
+
+    def test_progress(self):
+        progress = []
+        query_executor = executor.Executor(dict(self.relations))
+        query_executor.add_progress_hook(
+            lambda rname, rows: progress.append((rname, rows)))
+        self.run_query("q1 := p njoin s; q2 := select age > 25 (p);",
+                       query_executor)
+        self.assertEqual([('q1', 0), ('q1', 3), ('q2', 0), ('q2', 2)],
+                         progress)
+
+    def test_cancel(self):
+        query_executor = executor.Executor(dict(self.relations))
+        query_executor.interruptible = True
+
+        def cancel(node, rows, seconds):
+            query_executor.cancel()
+        query_executor.add_hook(cancel)
+        queries = query_executor.compile(self.parse(
+            "q1 := p njoin s; q2 := p product s;"))
+        results = query_executor.execute_all(queries)
+        # The njoin finishes, the cancellation is seen by the next tuple
+        self.assertRaises(CancelledError, next, results)
+
+    def test_cancel_parallel_terminates(self):
+        for name in ('a', 'b'):
+            big = relation.Relation()
+            big.header = [name]
+            for i in range(3000):
+                big.insert([str(i)])
+            self.relations[name] = big
+        query_executor = executor.Executor(dict(self.relations))
+        queries = query_executor.compile(self.parse("q1 := a product b;"))
+        timer = threading.Timer(0.5, query_executor.cancel)
+        timer.start()
+        with self.assertRaises(CancelledError):
+            list(query_executor.run_parallel(queries, max_workers=1))
+        timer.join()
+        # The process that was executing q1 doesn't finish it
+        deadline = time.monotonic() + 5
+        while multiprocessing.active_children():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        self.assertNotIn('q1', query_executor.relations)
+
+    def test_cancel_operator(self):
+        query_executor = executor.Executor(dict(self.relations))
+        query_executor.interruptible = True
+        query_executor.add_progress_hook(
+            lambda rname, rows: rows and query_executor.cancel())
+        self.assertRaises(CancelledError, self.run_query,
+                          "q := p product (project skill (s));",
+                          query_executor)
+
+    def test_cancel_parallel(self):
+        query_executor = executor.Executor(dict(self.relations))
+        queries = query_executor.compile(self.parse("q1 := p; q2 := s;"))
+        results = query_executor.run_parallel(queries, max_workers=1)
+        self.assertEqual('q1', next(results)[0])
+        query_executor.cancel()
+        self.assertRaises(CancelledError, next, results)
+
+    def signatures(self, query):
+        query_executor = executor.Executor(dict(self.relations))
+        return query_executor.signatures(
+            query_executor.compile(self.parse(query)))
+
+    def test_signatures(self):
+        query = "q1 := select age > 25 (p); q2 := q1 njoin s; q3 := s;"
+        first = self.signatures(query)
+        self.assertEqual(first, self.signatures(
+            "q1 := select age>25 (p);\nq2 := q1 njoin s; q3 := s;"))
+        # q1 changes, and q2 uses it
+        second = self.signatures(
+            "q1 := select age > 20 (p); q2 := q1 njoin s; q3 := s;")
+        self.assertNotEqual(first['q1'], second['q1'])
+        self.assertNotEqual(first['q2'], second['q2'])
+        self.assertEqual(first['q3'], second['q3'])
+
+    def test_signatures_modified_relation(self):
+        query = "q1 := select age > 25 (p); q2 := project skill (s);"
+        first = self.signatures(query)
+        self.s.touch()
+        second = self.signatures(query)
+        self.assertEqual(first['q1'], second['q1'])
+        self.assertNotEqual(first['q2'], second['q2'])
+
+    def test_signatures_undefined_relation(self):
+        signatures = self.signatures("q1 := x; q2 := q1 njoin p;")
+        self.assertIsNone(signatures['q1'])
+        self.assertIsNone(signatures['q2'])
+
+    def test_references(self):
+        tree = self.parse("q := project name (select age > 1 (p njoin s));")
+        self.assertEqual({'p', 's'},
+                         executor.references(tree.children[0].query))
+
+    def test_run_parallel(self):
+        query = ("q1 := select age > 25 (p); q2 := project skill (s);"
+                 "q3 := q1 njoin s; q4 := q3 union (q2 product p);")
+        query_executor = executor.Executor(dict(self.relations))
+        queries = query_executor.compile(self.parse(query))
+        expected = OrderedDict(query_executor.execute_all(queries))
+        query_executor = executor.Executor(dict(self.relations))
+        results = list(query_executor.run_parallel(queries, max_workers=2))
+        self.assertEqual(['q1', 'q2', 'q3', 'q4'],
+                         [rname for rname, rela in results])
+        for rname, rela in results:
+            self.assertEqual(expected[rname].header, rela.header)
+            self.assertEqual(expected[rname].content.content,
+                             rela.content.content)
+
+    def test_run_parallel_known_results(self):
+        query = "q1 := select age > 25 (p); q2 := q1 njoin s;"
+        query_executor = executor.Executor(dict(self.relations))
+        queries = query_executor.compile(self.parse(query))
+        q1 = relation.Relation()
+        q1.header = ['id', 'name', 'age']
+        q1.insert(['3', 'O"Neil', '21'])
+        results = list(query_executor.run_parallel(queries, {'q1': q1}))
+        self.assertEqual(['q2'], [rname for rname, rela in results])
+        self.assertEqual([['3', 'O"Neil', '21', 'Go']],
+                         results[0][1].content.content)
+
+    def test_run_parallel_error(self):
+        query = "q1 := project name (p); q2 := p njoin x; q3 := q2;"
+        query_executor = executor.Executor(dict(self.relations))
+        queries = query_executor.compile(self.parse(query))
+        results = query_executor.run_parallel(queries, max_workers=2)
+        self.assertEqual('q1', next(results)[0])
+        self.assertRaises(NameError, next, results)
+
+    def test_pool_joins_in_process(self):
+        # The processes of the pool don't start another pool
+        rows = relation.PARTITIONED_JOIN_ROWS
+        try:
+            executor._initialize({})
+            self.assertEqual(float('inf'), relation.PARTITIONED_JOIN_ROWS)
+        finally:
+            relation.PARTITIONED_JOIN_ROWS = rows
+
+
+if __name__ == "__main__":
+    unittest.main()
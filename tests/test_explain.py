@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import unittest
+import tracemalloc
+
+from src.core import relation
+from src.core.interpreter import (
+    parser,
+    scanner,
+    lexer,
+    executor,
+    explain
+)
+from src.core.interpreter.exceptions import CancelledError
+
+
+class ExplainTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.p = relation.Relation()
+        self.p.header = ['id', 'name', 'age']
+        for t in [['1', 'Gabriel', '26'], ['2', 'Rodrigo', '30'],
+                  ['3', 'O"Neil', '21']]:
+            self.p.insert(t)
+        self.s = relation.Relation()
+        self.s.header = ['id', 'skill']
+        for t in [['1', 'Python'], ['3', 'Go'], ['1', 'C']]:
+            self.s.insert(t)
+        self.relations = {'p': self.p, 's': self.s}
+
+    def explain(self, query, analyze=False, query_executor=None):
+        if query_executor is None:
+            query_executor = executor.Executor(dict(self.relations))
+        tree = parser.Parser(lexer.Lexer(scanner.Scanner(query))).parse()
+        return query_executor.explain(query_executor.compile(tree), analyze)
+
+    def test_explain(self):
+        plans = self.explain("q1 := project name (select age > 25 (p));"
+                             "q2 := q1 njoin s;")
+        self.assertEqual(['q1', 'q2'], list(plans))
+        project = plans['q1']
+        self.assertEqual('project name', project.label)
+        self.assertEqual(['name'], project.header)
+        select = project.children[0]
+        self.assertEqual('select age > 25', select.label)
+        self.assertEqual(['id', 'name', 'age'], select.header)
+        scan = select.children[0]
+        self.assertEqual('scan p', scan.label)
+        self.assertEqual(3, scan.rows)
+        self.assertEqual(3, select.rows_in)
+        # Nothing is executed
+        self.assertIsNone(select.rows)
+        self.assertIsNone(select.seconds)
+        self.assertIsNone(project.rows_in)
+        njoin = plans['q2']
+        self.assertEqual(['name', 'id', 'skill'], njoin.header)
+        self.assertIsNone(njoin.children[0].rows)
+
+    def test_analyze(self):
+        plans = self.explain("q1 := project name (select age > 25 (p));"
+                             "q2 := q1 product s;", analyze=True)
+        project = plans['q1']
+        select = project.children[0]
+        self.assertEqual((3, 2), (select.rows_in, select.rows))
+        self.assertEqual((2, 2), (project.rows_in, project.rows))
+        product = plans['q2']
+        self.assertEqual((5, 6), (product.rows_in, product.rows))
+        for operation in (project, select, product):
+            self.assertGreaterEqual(operation.seconds, 0)
+            self.assertGreater(operation.memory, 0)
+        # The relations of the executor are not modified
+        self.assertEqual({'p', 's'}, set(self.relations))
+
+    def test_analyze_tracing(self):
+        query = "q := (project name (p)) product s;"
+        # The tracing started by the caller is kept
+        tracemalloc.start()
+        try:
+            plans = self.explain(query, analyze=True)
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        if hasattr(tracemalloc, 'reset_peak'):
+            self.assertGreater(plans['q'].memory, 0)
+        else:
+            self.assertIsNone(plans['q'].memory)
+        self.explain(query, analyze=True)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_not_defined(self):
+        self.assertRaises(NameError, self.explain, "q := p njoin x;")
+
+    def test_cancel(self):
+        query_executor = executor.Executor(dict(self.relations))
+        query_executor.interruptible = True
+        query_executor.cancel()
+        self.assertRaises(CancelledError, self.explain,
+                          "q := p njoin s;", True, query_executor)
+
+    def test_text(self):
+        plans = self.explain("q := select age > 25 (p);", analyze=True)
+        lines = explain.format_text(plans).splitlines()
+        self.assertEqual('q:', lines[0])
+        self.assertTrue(lines[1].startswith(
+            '  select age > 25  (in=3, rows=2, time='))
+        self.assertTrue(lines[2].startswith('    -> scan p  (rows=3, '))
+
+    def test_json(self):
+        plans = self.explain("q := p njoin s;")
+        data = json.loads(json.dumps(explain.as_dict(plans)))
+        self.assertEqual('njoin', data['q']['operator'])
+        self.assertEqual(['scan', 'scan'],
+                         [child['operator']
+                          for child in data['q']['children']])
+        self.assertEqual(3, data['q']['children'][1]['rows'])
+
+    def test_format_memory(self):
+        self.assertEqual('512 B', explain.format_memory(512))
+        self.assertEqual('1.5 KB', explain.format_memory(1536))
+        self.assertEqual('2.0 GB', explain.format_memory(2 * 1024 ** 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -17,6 +17,9 @@
 # You should have received a copy of the GNU General Public License
 # along with Pireal; If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import shutil
+import tempfile
 import unittest
 from src.core import file_manager
 
@@ -28,3 +31,76 @@ class FileManagerTestCase(unittest.TestCase):
         expected = ".pdb"
         extension = file_manager.get_extension(filename)
         self.assertEqual(expected, extension)
+
+
+class ReadDatabaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'database.pdb')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def write(self, content):
+        with open(self.filename, 'w', newline='') as f:
+            f.write(content)
+
+    def test_read(self):
+        self.write('@people:id, name\r\n1, Gabriel\r\n2, "Acosta, G"\r\n'
+                   '\r\n@skills: id,skill\n1,Python\n\n@empty:id\n')
+        relations = file_manager.read_database(self.filename)
+        self.assertEqual(['people', 'skills', 'empty'], list(relations))
+        self.assertEqual(['id', 'name'], relations['people'].header)
+        self.assertEqual([['1', 'Gabriel'], ['2', 'Acosta, G']],
+                         relations['people'].content.content)
+        self.assertEqual([['1', 'Python']],
+                         relations['skills'].content.content)
+        self.assertEqual(0, relations['empty'].cardinality())
+
+    def test_columnar(self):
+        self.write('@r:a,b\n1,x\n2,y\n')
+        rela = file_manager.read_database(self.filename, columnar=True)['r']
+        self.assertTrue(rela.columnar)
+        self.assertEqual(2, rela.cardinality())
+
+    def test_invalid_header(self):
+        self.write('@r:a\n1\n@s\n')
+        self.assertRaises(Exception, file_manager.read_database,
+                          self.filename)
+
+    def test_write(self):
+        self.write('@people:id, name\n1, Gabriel\n2, "Acosta, G"\n'
+                   '3, "a ""quoted"" name"\n\n@skills:id\n')
+        relations = file_manager.read_database(self.filename)
+        file_manager.write_database(self.filename, relations)
+        written = file_manager.read_database(self.filename)
+        self.assertEqual(list(relations), list(written))
+        for name, rela in relations.items():
+            self.assertEqual(rela.header, written[name].header)
+            self.assertEqual(rela.content.content,
+                             written[name].content.content)
+        self.assertEqual(['database.pdb', 'database.pdb.idx'],
+                         sorted(os.listdir(self.folder)))
+
+    def test_write_error(self):
+        self.write('@r:a\n1\n')
+        relations = file_manager.read_database(self.filename)
+        relations['s'] = None
+        self.assertRaises(Exception, file_manager.write_database,
+                          self.filename, relations)
+        # The previous file is kept
+        with open(self.filename) as f:
+            self.assertEqual('@r:a\n1\n', f.read())
+        self.assertEqual(['database.pdb'], os.listdir(self.folder))
+
+    def test_generate_database(self):
+        self.write('@r:a, b\n1, "x, y"\n@s:c\n2\n')
+        relations = file_manager.read_database(self.filename)
+        self.assertEqual('@r:a,b\n1,"x, y"\n\n@s:c\n2\n',
+                         file_manager.generate_database(relations))
+
+    def test_tuples_without_relation(self):
+        self.write('\n1,2\n@r:a\n')
+        self.assertRaises(Exception, file_manager.read_database,
+                          self.filename)
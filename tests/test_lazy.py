@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import tempfile
+import unittest
+from src.core import (
+    file_manager,
+    lazy
+)
+from src.core.interpreter import (
+    parser,
+    scanner,
+    lexer,
+    executor
+)
+
+DATABASE = ('@people:id, name\n1, Gabriel\n2, "Acosta,\nG"\n\n'
+            '@skills:id, skill\n1, Python\n3, Go\n1, C\n\n@empty:id\n')
+
+
+class LazyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'database.pdb')
+        with open(self.filename, 'w', newline='') as f:
+            f.write(DATABASE)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_scan(self):
+        sections = lazy.scan_database(self.filename)
+        self.assertEqual(['people', 'skills', 'empty'],
+                         [s['name'] for s in sections])
+        self.assertEqual([2, 3, 0], [s['cardinality'] for s in sections])
+        self.assertEqual(['id', 'skill'], sections[1]['header'])
+
+    def test_lazy(self):
+        relations = lazy.open_database(self.filename)
+        skills = relations['skills']
+        self.assertFalse(skills.loaded)
+        self.assertEqual(3, skills.cardinality())
+        self.assertEqual(['id', 'skill'], skills.header)
+        self.assertFalse(skills.loaded)
+        expected = file_manager.read_database(self.filename)
+        for name, rela in relations.items():
+            self.assertEqual(expected[name].content.content,
+                             rela.content.content)
+            self.assertTrue(rela.loaded)
+            self.assertEqual(expected[name].cardinality(), rela.cardinality())
+
+    def test_pdbx(self):
+        pdbx_filename = os.path.join(self.folder, 'database.pdbx')
+        file_manager.convert_database(self.filename, pdbx_filename)
+        for columnar in (False, True):
+            relations = lazy.open_database(pdbx_filename, columnar)
+            people = relations['people']
+            self.assertEqual(2, people.cardinality())
+            self.assertFalse(people.loaded)
+            self.assertEqual([['1', 'Gabriel'], ['2', 'Acosta,\nG']],
+                             people.content.content)
+
+    def test_query(self):
+        relations = lazy.open_database(self.filename)
+        tree = parser.Parser(lexer.Lexer(scanner.Scanner(
+            "q := project skill (select id = 1 (skills));"))).parse()
+        results = executor.Executor(dict(relations)).run(tree)
+        self.assertEqual([['Python'], ['C']], results['q'].content.content)
+        self.assertFalse(relations['people'].loaded)
+
+    def test_modified_file(self):
+        relations = lazy.open_database(self.filename)
+        with open(self.filename, 'a') as f:
+            f.write('4\n')
+        self.assertRaises(Exception, lambda: relations['empty'].content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -230,6 +230,81 @@ class LexerTestCase(unittest.TestCase):
         self.assertEqual(EOF, tkn.type)
         self.assertEqual(None, tkn.value)
 
+    def test_line_and_column(self):
+        lex = self.make_lexer("q1 := r;\n  % comment\n  q2:=s njoin  t;")
+        tokens = (
+            ('q1', 1, 1),
+            (':=', 1, 4),
+            ('r', 1, 7),
+            (';', 1, 8),
+            ('q2', 3, 3),
+            (':=', 3, 5),
+            ('s', 3, 7),
+            ('njoin', 3, 9),
+            ('t', 3, 16),
+            (';', 3, 17),
+            (None, 3, 18)
+        )
+        for value, lineno, colno in tokens:
+            token = lex.next_token()
+            self.assertEqual(token.value, value)
+            self.assertEqual((token.lineno, token.colno), (lineno, colno))
+
+    def test_multiline_string(self):
+        lex = self.make_lexer("a = 'uno\ndos' and\n b")
+        lex.next_token()
+        lex.next_token()
+        token = lex.next_token()
+        self.assertEqual(token.type, STRING)
+        self.assertEqual(token.value, "uno\ndos")
+        token = lex.next_token()
+        self.assertEqual(token.value, 'and')
+        self.assertEqual((token.lineno, token.colno), (2, 6))
+        token = lex.next_token()
+        self.assertEqual(token.value, 'b')
+        self.assertEqual((token.lineno, token.colno), (3, 2))
+
+    def test_invalid_syntax_position(self):
+        lex = self.make_lexer("q1 := r;\nq2 : s;")
+        for i in range(5):
+            lex.next_token()
+        with self.assertRaises(InvalidSyntaxError) as context:
+            lex.next_token()
+        self.assertEqual(context.exception.lineno, 2)
+        self.assertEqual(context.exception.column, 4)
+
+    def test_peek(self):
+        lex = self.make_lexer("q1 := r")
+        self.assertEqual(lex.peek().value, 'q1')
+        self.assertEqual(lex.peek(3).value, 'r')
+        self.assertEqual(lex.next_token().value, 'q1')
+        self.assertEqual(lex.peek().value, ':=')
+        self.assertEqual(lex.next_token().value, ':=')
+        self.assertEqual(lex.next_token().value, 'r')
+
+    def test_trailing_whitespace(self):
+        for text in ("q := alumno; ", "q := alumno;\t\nr := curso;",
+                     "q := alumno;\n\n   \n\t\nr := curso;  \n"):
+            lex = self.make_lexer(text)
+            values = []
+            token = lex.next_token()
+            while token.type != EOF:
+                values.append(token.value)
+                token = lex.next_token()
+            self.assertEqual(values[:4], ['q', ':=', 'alumno', ';'])
+            self.assertIn(len(values), (4, 8))
+
+    def test_blank_text(self):
+        for text in ("", "   ", " \t\n\n  \r\n"):
+            lex = self.make_lexer(text)
+            self.assertEqual(lex.next_token().type, EOF)
+
+    def test_eof(self):
+        lex = self.make_lexer("r  % comment")
+        lex.next_token()
+        self.assertEqual(lex.next_token().type, EOF)
+        self.assertEqual(lex.next_token().type, EOF)
+
 
 if __name__ == '__main__':
     unittest.main()
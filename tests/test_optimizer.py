@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from src.core import (
+    relation,
+    plan,
+    stats
+)
+from src.core.interpreter import (
+    parser,
+    scanner,
+    lexer
+)
+
+
+class OptimizerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.p = relation.Relation()
+        self.p.header = ['id', 'name', 'age']
+        for t in [['1', 'Gabriel', '26'], ['2', 'Rodrigo', '30'],
+                  ['3', 'Mariano', '21']]:
+            self.p.insert(t)
+        self.s = relation.Relation()
+        self.s.header = ['pid', 'skill']
+        for t in [['1', 'Python'], ['3', 'Go'], ['1', 'C'], ['4', 'Ruby']]:
+            self.s.insert(t)
+        self.relations = {'p': self.p, 's': self.s}
+        self.schemas = {'p': self.p.header, 's': self.s.header}
+
+    def compile(self, query, schemas=None):
+        lex = lexer.Lexer(scanner.Scanner(query))
+        interpreter = parser.Interpreter(parser.Parser(lex), schemas)
+        interpreter.clear()
+        interpreter.to_python()
+        scope = dict(interpreter.SCOPE)
+        interpreter.clear()
+        return scope
+
+    def execute(self, query, schemas=None):
+        relations = dict(self.relations)
+        for name, expression in self.compile(query, schemas).items():
+            node = eval(expression, {}, plan.Namespace(relations))
+            relations[name] = node.materialize()
+        return relations
+
+    def assertSameResult(self, query):
+        expected = self.execute(query)
+        result = self.execute(query, self.schemas)
+        for name in expected:
+            self.assertEqual(expected[name].header, result[name].header)
+            self.assertEqual(expected[name].content.content,
+                             result[name].content.content)
+
+    def test_without_schemas(self):
+        scope = self.compile("q := select age > 25 (p product s);")
+        self.assertEqual("p.product(s).select(\"age > 25\")", scope['q'])
+
+    def test_push_selection(self):
+        scope = self.compile("q := select age > 25 (p product s);",
+                             self.schemas)
+        self.assertEqual("p.select(\"age > 25\").product(s)", scope['q'])
+
+    def test_equijoin(self):
+        scope = self.compile(
+            "q := select id = pid and skill <> 'C' (p product s);",
+            self.schemas)
+        self.assertEqual(
+            "p.equijoin(s.select(\"skill != 'C'\"), ['id'], ['pid'])",
+            scope['q'])
+
+    def test_push_projection(self):
+        scope = self.compile(
+            "q := project name, skill (select id = pid (p product s));",
+            self.schemas)
+        self.assertEqual(
+            "p.project('id', 'name').equijoin(s, ['id'], ['pid'])"
+            ".project('name', 'skill')", scope['q'])
+
+    def test_assignments(self):
+        # The header of q1 is known when q2 is optimized
+        scope = self.compile(
+            "q1 := project id, name (p);"
+            "q2 := select name = 'Gabriel' (q1 njoin p);", self.schemas)
+        self.assertEqual(
+            "q1.select(\"name == 'Gabriel'\").njoin("
+            "p.select(\"name == 'Gabriel'\"))", scope['q2'])
+
+    def test_unknown_relation(self):
+        scope = self.compile("q := select age > 25 (x product s);",
+                             self.schemas)
+        self.assertEqual("x.product(s).select(\"age > 25\")", scope['q'])
+
+    def test_or_is_not_splitted(self):
+        scope = self.compile(
+            "q := select age > 25 or skill = 'Go' (p product s);",
+            self.schemas)
+        self.assertEqual(
+            "p.product(s).select(\"age > 25 or skill == 'Go'\")",
+            scope['q'])
+
+    def test_same_results(self):
+        queries = [
+            "q := select id = pid (p product s);",
+            "q := project name, skill (select id = pid and age < 30 "
+            "(p product s));",
+            "q := select age > 21 or skill = 'Go' (p product s);",
+            "q := project name (select skill = 'C' (select id = pid "
+            "(p product s)));",
+            "q1 := project id, name (p); q2 := select id > 1 (q1 union "
+            "project id, name (p));",
+            "q1 := project pid, skill (s); q2 := select skill <> 'Go' "
+            "(p louter (project id, skill (select id = pid (p product s))));",
+        ]
+        for query in queries:
+            self.assertSameResult(query)
+
+    def test_or_in_merged_selections(self):
+        scope = self.compile(
+            "q := select id = 1 or id = 2 (select age > 26 (p));",
+            self.schemas)
+        self.assertEqual(
+            "p.select(\"(id == 1 or id == 2) and age > 26\")", scope['q'])
+        self.assertSameResult(
+            "q := select id = 1 or id = 2 (select age > 26 (p));")
+        self.assertSameResult(
+            "q := select age > 26 (select id = 1 or id = 3 (p));")
+
+    def test_not_pushed(self):
+        # The 'null' is removed by the difference, the selection can't
+        # compare it
+        v = relation.Relation()
+        v.header = ['id', 'f']
+        for t in [['1', '3.5'], ['2', 'null'], ['3', '1.5']]:
+            v.insert(t)
+        w = relation.Relation()
+        w.header = ['id', 'f']
+        w.insert(['2', 'null'])
+        self.relations.update(v=v, w=w)
+        self.schemas.update(v=v.header, w=w.header)
+        self.assertSameResult("q := select f >= 2.5 ((v) difference (w));")
+        for op in ('difference', 'intersect', 'louter', 'router'):
+            scope = self.compile(
+                "q := select f >= 2.5 ((v) {} (w));".format(op),
+                self.schemas)
+            self.assertEqual(
+                "v.{}(w).select(\"f >= 2.5\")".format(op), scope['q'])
+
+
+class JoinOrderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.relations = {}
+        data = {
+            'a': (['x', 'y'], [['1', '10'], ['2', '20'], ['3', '30']]),
+            'b': (['x', 'p'], [['1', 'p1'], ['2', 'p2'], ['4', 'p4']]),
+            'c': (['y', 'q'], [['10', 'q1'], ['30', 'q3'], ['40', 'q4']])
+        }
+        for name, (header, tuples) in data.items():
+            rela = relation.Relation()
+            rela.header = header
+            for t in tuples:
+                rela.insert(t)
+            self.relations[name] = rela
+        self.schemas = {name: rela.header
+                        for name, rela in self.relations.items()}
+        self.statistics = {name: stats.collect(rela)
+                           for name, rela in self.relations.items()}
+
+    def compile(self, query, statistics):
+        lex = lexer.Lexer(scanner.Scanner(query))
+        interpreter = parser.Interpreter(parser.Parser(lex), self.schemas,
+                                         statistics)
+        interpreter.clear()
+        interpreter.to_python()
+        scope = dict(interpreter.SCOPE)
+        interpreter.clear()
+        return scope
+
+    def execute(self, expression):
+        node = eval(expression, {}, plan.Namespace(self.relations))
+        return node.materialize()
+
+    def test_reorder(self):
+        # b njoin c is a product (9 tuples), a njoin b only has 2 tuples
+        query = "q := a njoin (b njoin c);"
+        expected = self.compile(query, None)['q']
+        self.assertEqual("a.njoin(b.njoin(c))", expected)
+        result = self.compile(query, self.statistics)['q']
+        self.assertNotIn("b.njoin(c)", result)
+        expected = self.execute(expected)
+        result = self.execute(result)
+        self.assertEqual(expected.header, result.header)
+        self.assertEqual(sorted(expected.content.content),
+                         sorted(result.content.content))
+
+    def test_keep_order(self):
+        query = "q := (a njoin b) njoin c;"
+        self.assertEqual("a.njoin(b).njoin(c)",
+                         self.compile(query, self.statistics)['q'])
+
+    def test_estimated_assignment(self):
+        # The statistics of q1 are estimated, so q2 is reordered too
+        scope = self.compile("q1 := project x, p (b); q2 := a njoin "
+                             "(q1 njoin c);", self.statistics)
+        self.assertNotIn("q1.njoin(c)", scope['q2'])
+
+
+if __name__ == "__main__":
+    unittest.main()
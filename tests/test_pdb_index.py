@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from src.core import (
+    file_manager,
+    pdb_index,
+    lazy
+)
+
+
+class PdbIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'database.pdb')
+        with open(self.filename, 'w', newline='') as f:
+            f.write('@people:id, name\n1, Gabriel\n2, "Acosta,\nG"\n\n'
+                    '@skills:id, skill\n1, Python\n3, Go\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_written_on_save(self):
+        relations = file_manager.read_database(self.filename)
+        file_manager.write_database(self.filename, relations)
+        sections = pdb_index.read_index(self.filename)
+        self.assertEqual(['people', 'skills'],
+                         [s['name'] for s in sections])
+        self.assertEqual([2, 2], [s['cardinality'] for s in sections])
+        self.assertEqual(['id', 'skill'], sections[1]['header'])
+        # The relations start where the scan finds them
+        scanned = lazy.scan_database(self.filename)
+        self.assertEqual([s['offset'] for s in scanned],
+                         [s['offset'] for s in sections])
+        relations = lazy.open_database(self.filename)
+        self.assertEqual([['1', 'Gabriel'], ['2', 'Acosta,\nG']],
+                         relations['people'].content.content)
+
+    def test_not_written_on_open(self):
+        relations = lazy.open_database(self.filename)
+        self.assertEqual(2, relations['skills'].cardinality())
+        self.assertEqual(['database.pdb'], os.listdir(self.folder))
+
+    def test_used_on_open(self):
+        self.assertIsNone(pdb_index.read_index(self.filename))
+        file_manager.write_database(
+            self.filename, file_manager.read_database(self.filename))
+        path = pdb_index.index_filename(self.filename)
+        with open(path) as f:
+            index = json.load(f)
+        index['relations'][1]['cardinality'] = 10
+        with open(path, 'w') as f:
+            json.dump(index, f)
+        relations = lazy.open_database(self.filename)
+        self.assertEqual(10, relations['skills'].cardinality())
+
+    def test_stale(self):
+        file_manager.write_database(
+            self.filename, file_manager.read_database(self.filename))
+        self.assertIsNotNone(pdb_index.read_index(self.filename))
+        with open(self.filename, 'a') as f:
+            f.write('4, C\n')
+        self.assertIsNone(pdb_index.read_index(self.filename))
+        relations = lazy.open_database(self.filename)
+        self.assertEqual(3, relations['skills'].cardinality())
+        # The scan is not written
+        self.assertIsNone(pdb_index.read_index(self.filename))
+
+    def test_invalid_index(self):
+        with open(pdb_index.index_filename(self.filename), 'w') as f:
+            f.write('[1, 2')
+        self.assertIsNone(pdb_index.read_index(self.filename))
+        relations = lazy.open_database(self.filename)
+        self.assertEqual(2, relations['people'].cardinality())
+
+
+if __name__ == "__main__":
+    unittest.main()
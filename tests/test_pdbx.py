@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import mmap
+import shutil
+import struct
+import tempfile
+import unittest
+from collections import OrderedDict
+from src.core import (
+    relation,
+    file_manager,
+    pdbx
+)
+
+
+class PdbxTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.filename = os.path.join(self.folder, 'database.pdbx')
+        self.p = relation.Relation()
+        self.p.header = ['id', 'name', 'price']
+        for t in [['01', 'Gabriel', '2.5'], ['2', 'Acosta, "G"', '1.0'],
+                  ['3', 'Gabriel', '4.25']]:
+            self.p.insert(t)
+        self.empty = relation.Relation()
+        self.empty.header = ['id']
+        self.relations = OrderedDict([('p', self.p), ('empty', self.empty)])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_round_trip(self):
+        file_manager.write_database(self.filename, self.relations)
+        for columnar in (False, True):
+            relations = file_manager.read_database(self.filename, columnar)
+            self.assertEqual(['p', 'empty'], list(relations))
+            self.assertEqual(columnar, relations['p'].columnar)
+            self.assertEqual(self.p.header, relations['p'].header)
+            self.assertEqual(self.p.content.content,
+                             relations['p'].content.content)
+            self.assertEqual(0, relations['empty'].cardinality())
+
+    def test_typed_columns(self):
+        file_manager.write_database(self.filename, self.relations)
+        rela = pdbx.read_database(self.filename, columnar=True)['p']
+        self.assertEqual([1, 2, 3], rela.content.typed_column(0))
+        self.assertEqual([2.5, 1.0, 4.25], rela.content.typed_column(2))
+        self.assertEqual([int, str, float], rela.infer_types())
+
+    def test_fixed_width(self):
+        file_manager.write_database(self.filename, self.relations)
+        with open(self.filename, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                index = pdbx.read_index(mapped)
+                name, price = index['relations'][0]['columns'][1:]
+                offset, length = name['codes']
+                codes = mapped[offset:offset + length]
+                typecode, (offset, length) = price['typed']
+                typed = mapped[offset:offset + length]
+        # The codes are 4 bytes and the floats 8 bytes, little endian
+        self.assertEqual(struct.pack('<3I', 0, 1, 0), codes)
+        self.assertEqual(struct.pack('<3d', 2.5, 1.0, 4.25), typed)
+
+    def test_convert(self):
+        pdb = os.path.join(self.folder, 'database.pdb')
+        file_manager.write_database(pdb, self.relations)
+        file_manager.convert_database(pdb, self.filename)
+        converted = os.path.join(self.folder, 'converted.pdb')
+        file_manager.convert_database(self.filename, converted)
+        with open(pdb) as expected, open(converted) as result:
+            self.assertEqual(expected.read(), result.read())
+
+    def test_invalid_file(self):
+        with open(self.filename, 'wb') as f:
+            f.write(b'@p:id\n1\n' * 10)
+        self.assertRaises(Exception, pdbx.read_database, self.filename)
+
+
+if __name__ == "__main__":
+    unittest.main()
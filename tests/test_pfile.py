@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import unittest
+from src.core import pfile
+
+
+class FileTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_new(self):
+        self.assertTrue(pfile.File().is_new)
+        self.assertFalse(pfile.File('db.pdb').is_new)
+
+    def test_save_and_read(self):
+        filename = os.path.join(self.path, 'queries.pqf')
+        _file = pfile.File()
+        _file.save("q1 := select año='2016' (películas);\n", filename)
+        self.assertFalse(_file.is_new)
+        self.assertEqual('queries.pqf', _file.display_name)
+        self.assertEqual("q1 := select año='2016' (películas);\n",
+                         pfile.File(filename).read())
+
+    def test_read_new_lines(self):
+        filename = os.path.join(self.path, 'queries.pqf')
+        with open(filename, 'wb') as _file:
+            _file.write(b'q1 := p;\r\nq2 := q;\r\n')
+        self.assertEqual('q1 := p;\nq2 := q;\n',
+                         pfile.File(filename).read())
+
+    def test_read_error(self):
+        _file = pfile.File(os.path.join(self.path, 'nothing.pdb'))
+        self.assertRaises(Exception, _file.read)
+
+    def test_core_without_qt(self):
+        code = ("import sys, pkgutil, importlib, src.core; "
+                "[importlib.import_module(name) for _, name, _ in "
+                "pkgutil.walk_packages(src.core.__path__, 'src.core.')]; "
+                "sys.exit('PyQt5' in sys.modules)")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(0, subprocess.call([sys.executable, '-c', code],
+                                            cwd=root))
+
+
+if __name__ == "__main__":
+    unittest.main()
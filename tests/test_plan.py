@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from src.core import (
+    relation,
+    plan
+)
+
+
+class PlanTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.r1 = relation.Relation()
+        self.r1.header = ['id', 'name', 'city']
+        for t in [['1', 'Gabriel', 'Belén'], ['23', 'Rodrigo', 'Belén']]:
+            self.r1.insert(t)
+        self.r2 = relation.Relation()
+        self.r2.header = ['id', 'skill']
+        for t in [['3', 'Ruby'], ['1', 'Python']]:
+            self.r2.insert(t)
+        self.r3 = relation.Relation()
+        self.r3.header = ['id', 'skill']
+        for t in [['1', 'Python'], ['43', 'Go']]:
+            self.r3.insert(t)
+        self.relations = plan.Namespace(r1=self.r1, r2=self.r2, r3=self.r3)
+
+    def test_namespace(self):
+        self.assertIsInstance(self.relations['r1'], plan.Scan)
+
+    def test_lazy(self):
+        node = plan.Scan(self.r1).project('name')
+        self.assertIsInstance(node, plan.Node)
+        self.assertEqual(['name'], node.header)
+        self.assertEqual([['Gabriel'], ['Rodrigo']],
+                         node.materialize().content.content)
+
+    def test_same_results_as_relation(self):
+        for operation in ('njoin', 'louter', 'router', 'fouter'):
+            expected = getattr(self.r1, operation)(self.r2)
+            node = getattr(plan.Scan(self.r1), operation)(plan.Scan(self.r2))
+            result = node.materialize()
+            self.assertEqual(expected.header, result.header)
+            self.assertEqual(expected.content.content,
+                             result.content.content)
+        for operation in ('union', 'intersect', 'difference'):
+            expected = getattr(self.r2, operation)(self.r3)
+            node = getattr(plan.Scan(self.r2), operation)(plan.Scan(self.r3))
+            self.assertEqual(expected.content.content,
+                             node.materialize().content.content)
+
+    def test_chain(self):
+        expression = ("r1.project('name', 'city').product("
+                      "r2.project('skill')).select(\"skill == 'Ruby'\")")
+        node = eval(expression, {}, self.relations)
+        expected = [['Gabriel', 'Belén', 'Ruby'],
+                    ['Rodrigo', 'Belén', 'Ruby']]
+        self.assertEqual(expected, node.materialize().content.content)
+
+    def test_partitioned_join(self):
+        threshold = relation.PARTITIONED_JOIN_ROWS
+        relation.PARTITIONED_JOIN_ROWS = 0
+        try:
+            for operation in ('njoin', 'louter', 'router', 'fouter'):
+                expected = getattr(self.r1, operation)(self.r2)
+                node = getattr(plan.Scan(self.r1), operation)(
+                    plan.Scan(self.r2))
+                self.assertEqual(expected.content.content,
+                                 node.materialize().content.content)
+        finally:
+            relation.PARTITIONED_JOIN_ROWS = threshold
+
+    def test_checkpoint(self):
+        calls = []
+        node = plan.Checkpoint(plan.Scan(self.r1).njoin(plan.Scan(self.r2)),
+                               calls.append, interval=1)
+        self.assertEqual(1, node.materialize().cardinality())
+        self.assertEqual([0, 1, 1], calls)
+
+    def test_invalid_field(self):
+        self.assertRaises(Exception, plan.Scan(self.r1).project, 'foo')
+
+
+if __name__ == "__main__":
+    unittest.main()
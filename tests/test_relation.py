@@ -74,6 +74,24 @@ class RelationTestCase(unittest.TestCase):
         select = rselect.content.content
         self.assertEqual(expected, select)
 
+    def test_selection_bool_operation(self):
+        expected = [['1', 'Gabriel', 'Belén']]
+        rselect = self.r1.select("id < 10 and city == 'Belén'")
+        self.assertEqual(expected, rselect.content.content)
+
+    def test_selection_only_casts_used_fields(self):
+        rela = relation.Relation()
+        rela.header = ['id', 'date']
+        # An invalid date in a field that is not used in the expression
+        rela.insert(['1', '99/99/9999'])
+        rselect = rela.select("id == 1")
+        self.assertEqual(1, rselect.cardinality())
+
+    def test_infer_types(self):
+        self.assertEqual([int, str, str], self.r1.infer_types())
+        self.r1.update(0, 0, 'x')
+        self.assertEqual([None, str, str], self.r1.infer_types())
+
     def test_cardinality(self):
         expected = 3
         self.assertEqual(self.r3.cardinality(), expected)
@@ -116,6 +134,27 @@ class RelationTestCase(unittest.TestCase):
         njoin = rjoin.content.content
         self.assertEqual(expected, njoin)
 
+    def test_natural_join_all_shared_fields(self):
+        # Only the tuples that match in every shared field are combined
+        rela1 = relation.Relation()
+        rela1.header = ['id', 'city', 'name']
+        for t in [['1', 'Belén', 'Gabriel'], ['1', 'Lima', 'Diego']]:
+            rela1.insert(t)
+        rela2 = relation.Relation()
+        rela2.header = ['city', 'id', 'skill']
+        for t in [['Belén', '1', 'Python'], ['Belén', '2', 'Go']]:
+            rela2.insert(t)
+        expected = [['1', 'Belén', 'Gabriel', 'Python']]
+        rjoin = rela1.njoin(rela2)
+        self.assertEqual(['id', 'city', 'name', 'skill'], rjoin.header)
+        self.assertEqual(expected, rjoin.content.content)
+
+    def test_natural_join_without_shared_fields(self):
+        # Without shared fields the natural join is a cartesian product
+        njoin = self.r2.njoin(self.r3)
+        product = self.r2.product(self.r3)
+        self.assertEqual(product.content.content, njoin.content.content)
+
     def test_louter(self):
         expected = [
             ['1', 'Gabriel', 'Belén', 'Python'],
@@ -233,5 +272,71 @@ class RelationTestCase(unittest.TestCase):
         self.assertEqual(expected_content, rela.content.content)
 
 
+class ContentTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.content = relation.Content()
+        for t in [['1', 'Gabriel'], ['2', 'Rodrigo']]:
+            self.content.add(t)
+
+    def test_contains(self):
+        self.assertIn(['1', 'Gabriel'], self.content)
+        self.assertNotIn(['3', 'Diego'], self.content)
+        self.content.add(['3', 'Diego'])
+        self.assertIn(['3', 'Diego'], self.content)
+
+    def test_contains_after_update(self):
+        self.assertIn(['2', 'Rodrigo'], self.content)
+        self.content.update(1, 1, 'Mercedes')
+        self.assertNotIn(['2', 'Rodrigo'], self.content)
+        self.assertIn(['2', 'Mercedes'], self.content)
+        del self.content[0]
+        self.assertNotIn(['1', 'Gabriel'], self.content)
+
+    def test_nested_iteration(self):
+        pairs = [(i[0], j[0]) for i in self.content for j in self.content]
+        self.assertEqual(4, len(pairs))
+
+
+class PartitionedJoinTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.r1 = relation.Relation()
+        self.r1.header = ['id', 'name']
+        for i in range(50):
+            self.r1.insert([str(i % 20), 'name{}'.format(i)])
+        self.r2 = relation.Relation()
+        self.r2.header = ['id', 'skill']
+        for i in range(30):
+            self.r2.insert([str(i % 25), 'skill{}'.format(i)])
+        self.threshold = relation.PARTITIONED_JOIN_ROWS
+        self.workers = relation.JOIN_WORKERS
+
+    def tearDown(self):
+        relation.PARTITIONED_JOIN_ROWS = self.threshold
+        relation.JOIN_WORKERS = self.workers
+
+    def test_same_result(self):
+        for operation in ('njoin', 'louter', 'router', 'fouter'):
+            relation.PARTITIONED_JOIN_ROWS = self.threshold
+            expected = getattr(self.r1, operation)(self.r2)
+            relation.PARTITIONED_JOIN_ROWS = 0
+            relation.JOIN_WORKERS = 3
+            result = getattr(self.r1, operation)(self.r2)
+            self.assertEqual(expected.header, result.header)
+            self.assertEqual(expected.content.content,
+                             result.content.content)
+
+    def test_threshold(self):
+        relation.PARTITIONED_JOIN_ROWS = 100
+        self.assertFalse(relation.use_partitioned_join(
+            range(50), range(49), [0]))
+        self.assertTrue(relation.use_partitioned_join(
+            range(50), range(50), [0]))
+        # Without shared fields the join is a product
+        self.assertFalse(relation.use_partitioned_join(
+            range(500), range(10), []))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -40,6 +40,18 @@ class RTypesTestCase(unittest.TestCase):
         time = rtypes.RelationStr('12:59').cast()
         self.assertTrue(time > time2)
 
+    def test_cast_function(self):
+        self.assertEqual(rtypes.cast('100'), 100)
+        self.assertEqual(rtypes.cast('20/01/1991'),
+                         datetime.date(1991, 1, 20))
+        self.assertEqual(rtypes.cast('Gabriel'), 'Gabriel')
+
+    def test_infer_type(self):
+        self.assertIs(rtypes.infer_type([1, 2]), int)
+        self.assertIs(rtypes.infer_type([1, 2.5]), float)
+        self.assertIs(rtypes.infer_type(['a', 'b']), str)
+        self.assertIsNone(rtypes.infer_type([1, 'null']))
+
 
 if __name__ == "__main__":
     unittest.main()
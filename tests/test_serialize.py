@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+import unittest
+from src.core import (
+    relation,
+    serialize
+)
+
+
+class SerializeTestCase(unittest.TestCase):
+
+    def create(self, columnar):
+        r = relation.Relation(columnar)
+        r.header = ['id', 'name', 'city']
+        for t in [['1', 'Gabriel', 'Belén'], ['23', 'Rodrigo', 'Belén'],
+                  ['01', 'Mariano', 'null']]:
+            r.insert(t)
+        return r
+
+    def test_round_trip(self):
+        for columnar in (False, True):
+            r = self.create(columnar)
+            new = serialize.unpack(pickle.loads(pickle.dumps(
+                serialize.pack(r))))
+            self.assertEqual(columnar, new.columnar)
+            self.assertEqual(r.header, new.header)
+            self.assertEqual(r.content.content, new.content.content)
+
+    def test_repeated_values(self):
+        header, columnar, cardinality, columns = serialize.pack(
+            self.create(False))
+        self.assertEqual(3, cardinality)
+        self.assertEqual(['Belén', 'null'], columns[2][0])
+
+    def test_without_fields(self):
+        for columnar in (False, True):
+            r = self.create(columnar).project()
+            new = serialize.unpack(serialize.pack(r))
+            self.assertEqual(r.cardinality(), new.cardinality())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from src.core import (
+    relation,
+    stats
+)
+
+
+class StatisticsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.r = relation.Relation()
+        self.r.header = ['id', 'name', 'age']
+        for t in [['1', 'Gabriel', '26'], ['2', 'Rodrigo', '30'],
+                  ['3', 'Gabriel', '20'], ['4', 'Mariano', 'x']]:
+            self.r.insert(t)
+
+    def test_collect(self):
+        statistics = stats.collect(self.r)
+        self.assertEqual(4, statistics.cardinality)
+        self.assertEqual({'id': 4, 'name': 3, 'age': 4},
+                         statistics.distinct)
+        self.assertEqual(1, statistics.minimum['id'])
+        self.assertEqual(4, statistics.maximum['id'])
+        self.assertEqual('Gabriel', statistics.minimum['name'])
+        # Mixed types
+        self.assertNotIn('age', statistics.minimum)
+
+    def test_estimate(self):
+        statistics = stats.estimate(self.r)
+        self.assertEqual(4, statistics.cardinality)
+        self.assertEqual(4, statistics.distinct_values('name'))
+        self.assertEqual({}, statistics.minimum)
+
+    def test_join(self):
+        left = stats.Statistics(100, {'id': 100, 'a': 10})
+        right = stats.Statistics(1000, {'id': 50, 'b': 5})
+        joined = stats.join(left, right, [('id', 'id')])
+        self.assertEqual(1000, joined.cardinality)
+        self.assertEqual(50, joined.distinct['id'])
+        product = stats.join(left, right, [])
+        self.assertEqual(100000, product.cardinality)
+
+    def test_selectivity(self):
+        statistics = stats.collect(self.r)
+        self.assertEqual(1 / 3,
+                         stats.selectivity(statistics, 'name', '=', 'x'))
+        self.assertAlmostEqual(2 / 3,
+                               stats.selectivity(statistics, 'id', '<', 3))
+        self.assertAlmostEqual(1 / 3,
+                               stats.selectivity(statistics, 'id', '>', 3))
+        self.assertEqual(stats.DEFAULT_SELECTIVITY,
+                         stats.selectivity(statistics, 'age', '<', 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2015 - Gabriel Acosta <acostadariogabriel@gmail.com>
+#
+# This file is part of Pireal.
+#
+# Pireal is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3 of the License, or
+# any later version.
+#
+# Pireal is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Pireal; If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from src.core import (
+    relation,
+    vectorized
+)
+
+
+@unittest.skipUnless(vectorized.ENABLED, "NumPy is not installed")
+class VectorizedTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.rela = relation.Relation()
+        self.rela.header = ['cod', 'nombre', 'fecha', 'hora', 'valor']
+        data = [
+            ['01142', 'Python', '13/01/2017', '10:00', '4000'],
+            ['02145', 'Django', '15/02/2017', '12:30', '2500'],
+            ['03547', 'POO', '01/03/2017', '08:15', '4000.5'],
+            ['04578', 'Funcional', '05/04/2017', '18:00', '1500']
+        ]
+        for t in data:
+            self.rela.insert(t)
+
+    def indexes(self, expression):
+        return vectorized.select_indexes(expression, self.rela.header,
+                                         self.rela.content)
+
+    def test_numbers(self):
+        self.assertEqual([1, 3], self.indexes("valor < 3000"))
+        self.assertEqual([0, 1, 2], self.indexes("cod < 3600"))
+
+    def test_bool_operation(self):
+        self.assertEqual([0, 3], self.indexes(
+            "valor == 4000 or nombre == 'Funcional'"))
+        self.assertEqual([1, 3], self.indexes(
+            "valor < 3000 and hora > datetime.time(12, 0)"))
+
+    def test_dates(self):
+        self.assertEqual([3], self.indexes(
+            "fecha > datetime.date(2017, 3, 1)"))
+
+    def test_constants(self):
+        self.assertEqual([2], self.indexes(
+            "nombre == 'POO' and valor > -4000.5"))
+        # The booleans are not compared with the columns
+        self.assertIsNone(self.indexes("valor == True"))
+
+    def test_fallback(self):
+        # Incompatible types are evaluated row by row
+        self.assertIsNone(self.indexes("nombre < 3"))
+        self.rela.update(0, 4, 'null')
+        self.assertIsNone(self.indexes("valor < 3000"))
+
+    def test_same_result_as_rows(self):
+        expression = "valor >= 2500 and fecha < datetime.date(2017, 3, 1)"
+        vectorized.ENABLED = False
+        try:
+            expected = self.rela.select(expression).content.content
+        finally:
+            vectorized.ENABLED = True
+        self.assertEqual(expected,
+                         self.rela.select(expression).content.content)
+
+
+if __name__ == "__main__":
+    unittest.main()